@@ -0,0 +1,167 @@
+"""
+Voice Activity Detection (VAD)
+==============================
+Segmentte konuşma olup olmadığını Gemini'ye göndermeden ÖNCE tespit eder.
+
+Opus segment ffmpeg ile düşük örnekleme hızında mono PCM'e açılır,
+ardından 30 ms'lik çerçevelerde basit enerji + zero-crossing dedektörü çalışır:
+- Enerji eşiği: gürültü tabanı (en sessiz çerçevelerin %10'luk dilimi) + marj;
+  ancak VAD_SPEECH_DB'den yüksek olamaz. Kesintisiz konuşmada / sabit arka plan
+  gürültüsü üstündeki konuşmada gürültü tabanı konuşma seviyesine çıkar; mutlak
+  eşik olmasa bu konuşma sessiz sayılıp atılırdı.
+- ZCR üst sınırı: yüksek ZCR'li çerçeveler (hışırtı / beyaz gürültü) konuşma sayılmaz
+- Hangover: kısa duraklamalar konuşmadan sayılır (kelime arası boşluklar)
+"""
+
+import math
+import os
+import subprocess
+import sys
+from array import array
+from operator import mul
+
+VAD_ENABLED = os.getenv("VAD_ENABLED", "1") not in ("0", "false", "False")
+VAD_SAMPLE_RATE = 8000
+VAD_FRAME_MS = 30
+VAD_MARGIN_DB = float(os.getenv("VAD_MARGIN_DB", "10"))
+VAD_MIN_DB = float(os.getenv("VAD_MIN_DB", "-50"))
+VAD_SPEECH_DB = float(os.getenv("VAD_SPEECH_DB", "-35"))  # Bunun üstündeki çerçeveler her zaman aday
+VAD_MAX_ZCR = float(os.getenv("VAD_MAX_ZCR", "0.35"))
+VAD_HANGOVER_FRAMES = 8  # ~240 ms
+
+# Segment ancak İKİ koşul birden sağlanırsa sessiz sayılır (yanlış atlamayı önlemek için)
+VAD_MIN_SPEECH_RATIO = float(os.getenv("VAD_MIN_SPEECH_RATIO", "0.01"))
+VAD_MIN_SPEECH_SECONDS = float(os.getenv("VAD_MIN_SPEECH_SECONDS", "1.0"))
+
+
+def decode_pcm(path, ffmpeg_path: str = "ffmpeg", sample_rate: int = VAD_SAMPLE_RATE):
+    """
+    Ses dosyasını mono 16-bit PCM'e açar.
+
+    Returns:
+        array('h'): PCM örnekleri, hata olursa None
+    """
+    cmd = [
+        ffmpeg_path, "-hide_banner", "-loglevel", "error",
+        "-i", str(path),
+        "-vn", "-ac", "1", "-ar", str(sample_rate),
+        "-f", "s16le", "pipe:1"
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=60)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+
+    raw = result.stdout
+    samples = array("h")
+    samples.frombytes(raw[:len(raw) - (len(raw) % 2)])
+    if sys.byteorder == "big":
+        samples.byteswap()  # s16le → big-endian host
+    return samples
+
+
+def speech_frames(samples, sample_rate: int = VAD_SAMPLE_RATE):
+    """
+    Her 30 ms çerçeve için konuşma kararı (hangover uygulanmış).
+
+    Returns:
+        tuple: (flags listesi, noise_floor_db, threshold_db) — çerçeve yoksa ([], None, None)
+    """
+    frame_len = int(sample_rate * VAD_FRAME_MS / 1000)
+    frame_count = len(samples) // frame_len
+    if frame_count == 0:
+        return [], None, None
+
+    # 1) Çerçeve enerjileri (dBFS)
+    energies = []
+    for i in range(frame_count):
+        frame = samples[i * frame_len:(i + 1) * frame_len]
+        power = sum(map(mul, frame, frame)) / frame_len
+        energies.append(10 * math.log10(power / (32768.0 ** 2)) if power > 0 else -120.0)
+
+    noise_floor = sorted(energies)[frame_count // 10]
+    # Göreli eşik, mutlak konuşma seviyesiyle sınırlı (yüksek gürültü tabanı konuşmayı gizlemesin)
+    threshold = min(max(noise_floor + VAD_MARGIN_DB, VAD_MIN_DB), VAD_SPEECH_DB)
+
+    # 2) Enerji + ZCR kararı (ZCR sadece enerji eşiğini geçen çerçevelerde hesaplanır)
+    # 3) Hangover: konuşma çerçevesinden sonraki kısa sessizlikleri konuşmaya dahil et
+    flags = []
+    hang = 0
+    for i, energy in enumerate(energies):
+        is_speech = False
+        if energy > threshold:
+            frame = samples[i * frame_len:(i + 1) * frame_len]
+            crossings = sum(1 for a, b in zip(frame, frame[1:]) if (a ^ b) < 0)
+            is_speech = crossings / frame_len <= VAD_MAX_ZCR
+        if is_speech:
+            hang = VAD_HANGOVER_FRAMES
+        elif hang > 0:
+            hang -= 1
+            is_speech = True
+        flags.append(is_speech)
+
+    return flags, noise_floor, threshold
+
+
+def measure_speech(samples, sample_rate: int = VAD_SAMPLE_RATE) -> dict:
+    """
+    PCM örneklerinde konuşma oranını hesaplar.
+
+    Returns:
+        dict: speech_ratio, speech_seconds, total_seconds, noise_floor_db, threshold_db
+    """
+    result = {
+        "speech_ratio": 0.0,
+        "speech_seconds": 0.0,
+        "total_seconds": len(samples) / sample_rate if sample_rate else 0.0,
+        "noise_floor_db": None,
+        "threshold_db": None,
+    }
+    flags, noise_floor, threshold = speech_frames(samples, sample_rate)
+    if not flags:
+        return result
+
+    speech_count = sum(flags)
+    result["speech_ratio"] = speech_count / len(flags)
+    result["speech_seconds"] = speech_count * VAD_FRAME_MS / 1000
+    result["noise_floor_db"] = round(noise_floor, 1)
+    result["threshold_db"] = round(threshold, 1)
+    return result
+
+
+def tail_is_silent(path, ffmpeg_path: str = "ffmpeg", tail_seconds: float = 0.5) -> bool:
+    """
+    Dosyanın son tail_seconds kısmında konuşma yok mu? (Kesim noktası seçimi için)
+    Ses açılamazsa False döner (sessizlik varsayılmaz).
+    """
+    samples = decode_pcm(path, ffmpeg_path)
+    if samples is None:
+        return False
+
+    flags, _, _ = speech_frames(samples)
+    tail_frames = max(1, int(tail_seconds * 1000 / VAD_FRAME_MS))
+    if len(flags) < tail_frames:
+        return False
+    return not any(flags[-tail_frames:])
+
+
+def analyze_segment(path, ffmpeg_path: str = "ffmpeg") -> dict:
+    """
+    Segmenti analiz edip sessiz olup olmadığına karar verir.
+
+    Returns:
+        dict: measure_speech alanları + "silent" (bool)
+        None: Ses açılamazsa (bu durumda segment gönderilmeli)
+    """
+    samples = decode_pcm(path, ffmpeg_path)
+    if samples is None:
+        return None
+
+    stats = measure_speech(samples)
+    stats["silent"] = (
+        stats["speech_ratio"] < VAD_MIN_SPEECH_RATIO
+        and stats["speech_seconds"] < VAD_MIN_SPEECH_SECONDS
+    )
+    return stats
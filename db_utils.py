@@ -1,27 +1,95 @@
+"""
+Supabase yardımcıları
+=====================
+Process başına TEK Supabase istemcisi: her çağrıda yeni istemci (ve yeni TLS
+bağlantısı) kurulmaz, istemcinin HTTP oturumu yeniden kullanılır.
+
+    client = get_client()               # Senkron (worker, rapor, Celery)
+    client = await get_async_client()   # FastAPI endpoint'leri (event loop'u bloklamaz)
+    status_batcher.update(task_id, {...})  # task_queue durum yazımları toplu / gecikmeli
+
+- Celery prefork gibi fork eden process'lerde çocuk process kendi istemcisini
+  kurar (bağlantılar process'ler arasında paylaşılmaz).
+- supabase paketi ilk kullanımda import edilir (server başlangıcını yavaşlatmaz).
+"""
+
+import atexit
+import asyncio
 import os
 import mimetypes
+import threading
+import time
 from pathlib import Path
 from dotenv import load_dotenv
-from supabase import create_client, Client
 
 # .env yükle
 load_dotenv(override=True)
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 # Backend işlemleri için Service Role Key tercih edilir (RLS bypass)
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY")
 
-def init_supabase() -> Client:
-    """Supabase istemcisini başlatır"""
+_client_lock = threading.Lock()
+_client_state = {"client": None, "pid": None}
+_async_clients = {}  # event loop → AsyncClient (istemci oluşturulduğu loop'a bağlı)
+
+
+def get_client():
+    """Process genelinde paylaşılan Supabase istemcisi (yoksa / hata olursa None)"""
     if not SUPABASE_URL or not SUPABASE_KEY:
         print("[ERROR] SUPABASE_URL veya SUPABASE_KEY eksik! .env dosyasını kontrol edin.")
         return None
+    pid = os.getpid()
+    if _client_state["client"] is not None and _client_state["pid"] == pid:
+        return _client_state["client"]
+    with _client_lock:
+        if _client_state["client"] is None or _client_state["pid"] != pid:
+            try:
+                from supabase import create_client
+                _client_state["client"] = create_client(SUPABASE_URL, SUPABASE_KEY)
+                _client_state["pid"] = pid
+            except Exception as e:
+                print(f"[ERROR] Supabase bağlantı hatası: {e}")
+                return None
+    return _client_state["client"]
+
+
+def init_supabase():
+    """Eski ad: paylaşılan istemciyi döner (artık her çağrıda yeni istemci kurulmaz)"""
+    return get_client()
+
+
+def _import_acreate_client():
+    """
+    Async istemci fabrikası: yeni sürümler supabase.acreate_client'ı dışa açar,
+    requirements'taki supabase==2.3.0 sadece supabase._async.client.create_client'ı.
+    """
     try:
-        return create_client(SUPABASE_URL, SUPABASE_KEY)
-    except Exception as e:
-        print(f"[ERROR] Supabase bağlantı hatası: {e}")
+        from supabase import acreate_client
+    except ImportError:
+        from supabase._async.client import create_client as acreate_client
+    return acreate_client
+
+
+async def get_async_client():
+    """Çalışan event loop'a ait paylaşılan async Supabase istemcisi (yoksa / hata olursa None)"""
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        print("[ERROR] SUPABASE_URL veya SUPABASE_KEY eksik! .env dosyasını kontrol edin.")
         return None
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(loop)
+    if entry is None:
+        entry = _async_clients[loop] = {"client": None, "lock": asyncio.Lock()}
+    if entry["client"] is None:
+        async with entry["lock"]:
+            if entry["client"] is None:
+                acreate_client = _import_acreate_client()  # ImportError bağlantı hatası sayılmaz, yükselir
+                try:
+                    entry["client"] = await acreate_client(SUPABASE_URL, SUPABASE_KEY)
+                except Exception as e:
+                    print(f"[ERROR] Supabase (async) bağlantı hatası: {e}")
+                    return None
+    return entry["client"]
 
 def upload_file(bucket_name: str, file_path: str, destination_path: str = None) -> str:
     """
@@ -35,7 +103,7 @@ def upload_file(bucket_name: str, file_path: str, destination_path: str = None)
     Returns:
         str: Public URL veya None
     """
-    client = init_supabase()
+    client = get_client()
     if not client:
         return None
 
@@ -80,6 +148,25 @@ def upload_file(bucket_name: str, file_path: str, destination_path: str = None)
         print(f"[ERROR] Dosya yükleme hatası: {e}")
         return None
 
+def delete_file(bucket_name: str, destination_path: str) -> bool:
+    """
+    Bucket'taki dosyayı siler (ör. toplantı kaydına bağlanamayan transkript).
+
+    Returns:
+        bool: Silindiyse True
+    """
+    client = get_client()
+    if not client:
+        return False
+
+    try:
+        client.storage.from_(bucket_name).remove([destination_path])
+        print(f"[DELETE] {bucket_name}/{destination_path} silindi")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Dosya silme hatası: {e}")
+        return False
+
 def save_meeting_record(user_id: str, title: str, platform: str, start_time: str, duration: str, 
                         transcript_url: str = None, report_url: str = None, summary_text: str = None) -> bool:
     """
@@ -90,7 +177,7 @@ def save_meeting_record(user_id: str, title: str, platform: str, start_time: str
         title (str): Toplantı başlığı
         ...
     """
-    client = init_supabase()
+    client = get_client()
     if not client:
         return False
 
@@ -119,7 +206,7 @@ def delete_user_account(user_id: str) -> bool:
     Kullanıcıyı sistemden (Auth ve DB) tamamen siler.
     Dikkat: Bu işlem için SERVICE_ROLE anahtarı gerekebilir.
     """
-    client = init_supabase()
+    client = get_client()
     if not client:
         return False
 
@@ -132,3 +219,125 @@ def delete_user_account(user_id: str) -> bool:
     except Exception as e:
         print(f"[ERROR] Hesap silme hatası: {e}")
         return False
+
+
+async def adelete_user_account(user_id: str) -> bool:
+    """delete_user_account'ın async hali (FastAPI endpoint'leri için)"""
+    client = await get_async_client()
+    if not client:
+        return False
+
+    try:
+        print(f"[ADMIN] Kullanıcı siliniyor: {user_id}")
+        await client.auth.admin.delete_user(user_id)
+        print("[SUCCESS] Kullanıcı silindi.")
+        return True
+    except Exception as e:
+        print(f"[ERROR] Hesap silme hatası: {e}")
+        return False
+
+
+# ============================================================
+# DURUM YAZIMLARI (write-behind)
+# ============================================================
+STATUS_FLUSH_SECONDS = float(os.getenv("STATUS_FLUSH_SECONDS", "2.0"))
+STATUS_MAX_ATTEMPTS = 3  # Yazılamayan güncelleme en fazla bu kadar denenir
+
+
+class StatusBatcher:
+    """
+    Satır güncellemelerini bellekte biriktirip arka planda yazar. Aynı satıra
+    gelen ardışık güncellemeler tek UPDATE'te birleşir (ör. "processing" →
+    "completed" hızlıca geldiyse tek istek). flush=True verilen güncelleme
+    (son durumlar) beklemeden, sırasıyla yazılır; process kapanırken kalanlar
+    da yazılır. Yazılamayan güncelleme (istemci o an kurulamadıysa da) sonraki
+    turlarda STATUS_MAX_ATTEMPTS'e kadar tekrar denenir; Supabase hiç
+    yapılandırılmamışsa güncellemeler tek uyarıyla bırakılır.
+    """
+
+    def __init__(self, table: str, key: str = "id", interval: float = STATUS_FLUSH_SECONDS):
+        self.table = table
+        self.key = key
+        self.interval = interval
+        self._pending = {}  # satır id → birleşmiş alanlar
+        self._attempts = {}  # satır id → başarısız yazım sayısı
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # Yazımlar sırayla (eski değer yenisini ezmesin)
+        self._thread = None
+        self._pid = None
+        self._unconfigured_logged = False
+
+    def update(self, row_id: str, fields: dict, flush: bool = False):
+        with self._lock:
+            self._pending.setdefault(row_id, {}).update(fields)
+        if flush:
+            self.flush()
+        else:
+            self._ensure_thread()
+
+    def _ensure_thread(self):
+        pid = os.getpid()
+        if self._thread is not None and self._thread.is_alive() and self._pid == pid:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._pid != pid:
+                self._pid = pid
+                self._thread = threading.Thread(target=self._run, name=f"{self.table}-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self) -> int:
+        """Bekleyen güncellemeleri şimdi yaz; yazılan satır sayısını döner"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                if not SUPABASE_URL or not SUPABASE_KEY:
+                    # Yapılandırılmamış: hiçbir zaman yazılamaz, biriktirmenin anlamı yok
+                    if not self._unconfigured_logged:
+                        print(f"[WARN] Supabase yapılandırılmamış, {self.table} durum güncellemeleri yazılmayacak.")
+                        self._unconfigured_logged = True
+                    self._pending.clear()
+                    return 0
+                batch, self._pending = self._pending, {}
+            client = get_client()
+            written = 0
+            failed = {}
+            for row_id, fields in batch.items():
+                if client is None:
+                    failed[row_id] = fields  # Bağlantı kurulamadı: bu tur başarısız deneme sayılır
+                    continue
+                try:
+                    client.table(self.table).update(fields).eq(self.key, row_id).execute()
+                    self._attempts.pop(row_id, None)
+                    written += 1
+                except Exception as e:
+                    print(f"[ERROR] {self.table} güncellenemedi ({row_id}): {e}")
+                    failed[row_id] = fields
+            if failed and self._requeue(failed):
+                self._ensure_thread()  # flush=True ile gelen güncelleme atexit'i beklemesin
+            return written
+
+    def _requeue(self, failed: dict) -> bool:
+        """Başarısız yazımları sonraki tura bırak (STATUS_MAX_ATTEMPTS'e kadar); kalan varsa True"""
+        requeued = False
+        for row_id, fields in failed.items():
+            attempts = self._attempts[row_id] = self._attempts.get(row_id, 0) + 1
+            if attempts >= STATUS_MAX_ATTEMPTS:
+                self._attempts.pop(row_id, None)
+                print(f"[ERROR] {self.table} güncellemesi {attempts} denemeden sonra bırakıldı ({row_id})")
+                continue
+            # Bu arada gelen daha yeni alanlar korunur
+            with self._lock:
+                self._pending[row_id] = {**fields, **self._pending.get(row_id, {})}
+            requeued = True
+        return requeued
+
+
+# Celery görev durumları (tasks.update_task_status)
+status_batcher = StatusBatcher("task_queue")
+atexit.register(status_batcher.flush)
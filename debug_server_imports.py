@@ -1,23 +1,113 @@
+"""
+Sunucu başlangıç süresi ölçümü
+==============================
+server.py'yi temiz bir Python sürecinde import eder (python -X importtime) ve
+modül başına import süresini raporlar.
+
+    python debug_server_imports.py            # Özet + en yavaş 15 modül
+    python debug_server_imports.py --top 40
+
+- Toplam import süresi STARTUP_BUDGET_SECONDS'ı (varsayılan 1.0) aşarsa
+  çıkış kodu 1 olur (CI / container sağlık kontrolü için).
+- İlk kullanımda yüklenmesi gereken ağır kütüphaneler (lazy_imports.py)
+  import sırasında yüklendiyse uyarı verilir.
+"""
+
+import argparse
+import json
+import os
+import subprocess
 import sys
-print(f"Python Executable: {sys.executable}")
-print("Importing modules...")
-
-try:
-    import fastapi
-    print("✓ fastapi imported")
-    import uvicorn
-    print("✓ uvicorn imported")
-    import supabase
-    print("✓ supabase imported")
-    import google.generativeai
-    print("✓ google.generativeai imported")
-    import db_utils
-    print("✓ db_utils imported")
-    import server 
-    print("✓ server imported (syntax check complete)")
-    
-    print("ALL IMPORTS SUCCESSFUL")
-except Exception as e:
-    print(f"❌ IMPORT ERROR: {e}")
-    import traceback
-    traceback.print_exc()
+from collections import defaultdict
+
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "1.0"))
+
+# server import edilirken YÜKLENMEMESİ gereken paketler
+LAZY_PACKAGES = ["google.generativeai", "supabase", "celery", "jinja2", "httpx", "rapor", "tasks"]
+
+CHILD_CODE = f"""
+import json, sys, time
+t0 = time.perf_counter()
+import server
+elapsed = time.perf_counter() - t0
+print("@@RESULT@@" + json.dumps({{
+    "elapsed": elapsed,
+    "eager": [m for m in {LAZY_PACKAGES!r} if m in sys.modules],
+}}))
+"""
+
+
+def _parse_line(line: str):
+    """ "import time:   123 |   4567 |   paket.modül" → (modül, self_us, cumulative_us, derinlik)"""
+    head, cumulative, name = line.split("|", 2)
+    self_us = int(head.split(":", 1)[1])
+    depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+    return name.strip(), self_us, int(cumulative), depth
+
+
+def run(top: int) -> int:
+    print(f"Python: {sys.executable}")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD_CODE],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)) or "."
+    )
+
+    rows = []
+    other_stderr = []
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:"):
+            if "self [us]" in line:
+                continue
+            try:
+                rows.append(_parse_line(line))
+            except ValueError:
+                continue
+        else:
+            other_stderr.append(line)
+
+    result = None
+    for line in proc.stdout.splitlines():
+        if line.startswith("@@RESULT@@"):
+            result = json.loads(line[len("@@RESULT@@"):])
+
+    if proc.returncode != 0 or result is None:
+        print("❌ IMPORT ERROR: server import edilemedi")
+        print("\n".join(other_stderr[-30:]))
+        return 1
+
+    # server'ın doğrudan import ettikleri (server satırının çocukları)
+    server_depth = next((d for name, _, _, d in rows if name == "server"), 0)
+    direct = [(name, cum) for name, _, cum, d in rows if d == server_depth + 1]
+
+    # Paket bazında toplam (self süreleri, üst paket adına göre)
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+
+    elapsed = result["elapsed"]
+    print(f"\nserver import süresi: {elapsed:.3f}s (bütçe {STARTUP_BUDGET_SECONDS:.1f}s)")
+
+    print(f"\nserver.py'nin doğrudan import ettikleri (kümülatif, en yavaş {top}):")
+    for name, cum in sorted(direct, key=lambda r: -r[1])[:top]:
+        print(f"  {cum / 1e6:8.3f}s  {name}")
+
+    print(f"\nPaket bazında (self toplamı, en yavaş {top}):")
+    for name, self_us in sorted(by_package.items(), key=lambda r: -r[1])[:top]:
+        print(f"  {self_us / 1e6:8.3f}s  {name}")
+
+    status = 0
+    if result["eager"]:
+        print(f"\n[WARN] İlk kullanımda yüklenmesi gereken paketler import sırasında yüklendi: "
+              f"{', '.join(result['eager'])}")
+    if elapsed > STARTUP_BUDGET_SECONDS:
+        print(f"\n❌ Başlangıç bütçesi aşıldı: {elapsed:.3f}s > {STARTUP_BUDGET_SECONDS:.1f}s")
+        status = 1
+    else:
+        print("\n✓ Başlangıç bütçesi içinde")
+    return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="server.py import süresi ölçümü")
+    parser.add_argument("--top", type=int, default=15)
+    sys.exit(run(parser.parse_args().top))
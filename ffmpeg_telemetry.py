@@ -0,0 +1,147 @@
+"""
+FFmpeg Recorder Telemetry
+=========================
+ffmpeg'in stderr çıktısını canlı okuyup kayıt sağlığı metriklerine çevirir.
+
+- İlerleme satırı:  size=  512KiB time=00:04:10.32 bitrate=  16.8kbits/s speed=   1x
+  → yakalanan ses süresi, bitrate, hız. Segment muxer'ı boyut bilmez
+  (size=N/A time=... bitrate=N/A); ilerleme time= alanından izlenir.
+- Uyarılar: buffer overrun / "too full" / "frame dropped" (kayıp ses),
+  aresample drift düzeltmeleri, thread queue blokajı, zaman damgası hataları
+
+Yakalanan ses süresi duvar saatinin gerisinde kalıyorsa (drift) veya ilerleme
+satırı bir süredir güncellenmiyorsa kaynak (pulse monitor) takılmış demektir;
+bu durum transkriptte boşluk oluşmadan önce görülebilir.
+"""
+
+import re
+import threading
+import time
+from pathlib import Path
+
+# Yakalanan süre duvar saatinin bu kadar gerisindeyse kayıt "sağlıksız" sayılır
+DRIFT_WARN_SECONDS = 5.0
+# İlerleme satırı bu kadar süredir gelmiyorsa kaynak takılmış sayılır
+STALL_SECONDS = 15.0
+
+_PROGRESS_RE = re.compile(
+    r"(?:size=\s*(?:(?P<size>\d+)\s*(?P<unit>[kKmMgG]?i?B)|N/A)\s+)?"
+    r"time=\s*(?P<time>-?[\d:.]+|N/A)\s+"
+    r"bitrate=\s*(?P<bitrate>[\d.]+|N/A)"
+    r"(?:.*?speed=\s*(?P<speed>[\d.]+|N/A)x?)?"
+)
+
+# (metrik adı, stderr'deki işaret) — satır küçük harfe çevrilip aranır
+_WARNING_PATTERNS = (
+    ("overruns", ("overrun", "too full", "buffer full")),
+    ("dropped_frames", ("frame dropped", "dropping", "packet dropped")),
+    ("drift_corrections", ("aresample", "compensat", "samples drop", "samples add")),
+    ("queue_blocks", ("thread message queue blocking",)),
+    ("timestamp_errors", ("non-monotonous", "backward in time", "non monotonically")),
+)
+
+_SIZE_UNITS = {"b": 1 / 1024, "kb": 1, "kib": 1, "mb": 1024, "mib": 1024, "gb": 1024 ** 2, "gib": 1024 ** 2}
+
+
+def _parse_clock(value: str):
+    """HH:MM:SS.ss → saniye"""
+    if not value or value == "N/A":
+        return None
+    try:
+        seconds = 0.0
+        for part in value.split(":"):
+            seconds = seconds * 60 + float(part)
+        return seconds
+    except ValueError:
+        return None
+
+
+class FFmpegTelemetry:
+    """ffmpeg stderr satırlarından kayıt metrikleri üretir (thread-safe)"""
+
+    def __init__(self, start_time: float = None):
+        self._lock = threading.Lock()
+        self.start_time = start_time or time.time()
+        self.captured_seconds = 0.0
+        self.size_kb = 0.0
+        self.bitrate_kbps = None
+        self.speed = None
+        self.last_progress = None
+        self.counters = {name: 0 for name, _ in _WARNING_PATTERNS}
+        self.last_warning = None
+
+    def feed_line(self, line: str):
+        line = line.strip()
+        if not line:
+            return
+        match = _PROGRESS_RE.search(line)
+        with self._lock:
+            if match:
+                captured = _parse_clock(match.group("time"))
+                if captured is not None:
+                    self.captured_seconds = captured
+                if match.group("size") is not None:
+                    self.size_kb = int(match.group("size")) * _SIZE_UNITS.get(match.group("unit").lower(), 1)
+                if match.group("bitrate") not in (None, "N/A"):
+                    self.bitrate_kbps = float(match.group("bitrate"))
+                if match.group("speed") not in (None, "N/A"):
+                    self.speed = float(match.group("speed"))
+                self.last_progress = time.time()
+                return
+
+            # Bir satır birden fazla kategoriye girebilir ("too full ... frame dropped!")
+            lowered = line.lower()
+            for name, needles in _WARNING_PATTERNS:
+                if any(needle in lowered for needle in needles):
+                    self.counters[name] += 1
+                    self.last_warning = {"time": time.time(), "kind": name, "line": line[:300]}
+
+    def follow(self, stream, log_path: Path = None):
+        """
+        stderr'i sonuna kadar oku (ayrı thread'de çalıştırılır).
+        İlerleme satırları '\\r' ile bittiği için hem '\\r' hem '\\n' satır sonu sayılır.
+        Okunan her şey log_path'e de yazılır (eski ffmpeg_debug.log davranışı).
+        """
+        log_file = open(log_path, "w", encoding="utf-8") if log_path else None
+        buffer = ""
+        try:
+            while True:
+                chunk = stream.read1(4096) if hasattr(stream, "read1") else stream.read(4096)
+                if not chunk:
+                    break
+                text = chunk.decode("utf-8", errors="replace")
+                if log_file:
+                    log_file.write(text)
+                    log_file.flush()
+                buffer += text
+                *lines, buffer = re.split(r"[\r\n]", buffer)
+                for line in lines:
+                    self.feed_line(line)
+            self.feed_line(buffer)
+        finally:
+            if log_file:
+                log_file.close()
+
+    def snapshot(self) -> dict:
+        """Anlık metrikler"""
+        now = time.time()
+        with self._lock:
+            wall_seconds = now - self.start_time
+            drift = wall_seconds - self.captured_seconds if self.last_progress else None
+            progress_age = now - self.last_progress if self.last_progress else None
+            stalled = progress_age is not None and progress_age > STALL_SECONDS
+            return {
+                "timestamp": now,
+                "wall_seconds": round(wall_seconds, 1),
+                "captured_seconds": round(self.captured_seconds, 1),
+                "capture_ratio": round(self.captured_seconds / wall_seconds, 3) if wall_seconds > 0 else None,
+                "drift_seconds": round(drift, 2) if drift is not None else None,
+                "size_kb": round(self.size_kb, 1),
+                "bitrate_kbps": self.bitrate_kbps,
+                "speed": self.speed,
+                "progress_age_seconds": round(progress_age, 1) if progress_age is not None else None,
+                "stalled": stalled,
+                **self.counters,
+                "last_warning": self.last_warning,
+                "healthy": not stalled and (drift is None or drift < DRIFT_WARN_SECONDS),
+            }
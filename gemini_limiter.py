@@ -0,0 +1,250 @@
+"""
+Gemini Rate Limiter
+===================
+API, Celery worker'ları ve rapor üretimi aynı Gemini kotasını paylaşır.
+Her çağrı göndermeden ÖNCE kapasite ayırır (token bucket):
+
+- RPM: dakikadaki istek sayısı
+- TPM: dakikadaki token sayısı (ses ~32 token/sn + prompt ~4 karakter/token)
+- RPD: günlük istek kotası (Pasifik saatiyle gece yarısı sıfırlanır)
+
+Durum Redis'te tutulur (tüm process'ler ortak, Lua script ile atomik);
+Redis yoksa / erişilemezse process içi sayaçlara düşülür.
+429 alındığında penalize() ile tüm çağıranlar aynı süre bekletilir.
+"""
+
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+try:
+    from zoneinfo import ZoneInfo
+    _QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+except Exception:
+    _QUOTA_TZ = None
+
+GEMINI_RPM = int(os.getenv("GEMINI_RPM", "15"))
+GEMINI_TPM = int(os.getenv("GEMINI_TPM", "1000000"))
+GEMINI_RPD = int(os.getenv("GEMINI_RPD", "1500"))
+GEMINI_LIMIT_TIMEOUT = float(os.getenv("GEMINI_LIMIT_TIMEOUT", "600"))
+REDIS_URL = os.getenv("REDIS_URL", "")
+
+AUDIO_TOKENS_PER_SECOND = 32
+CHARS_PER_TOKEN = 4
+REDIS_RETRY_SECONDS = 30
+KEY_PREFIX = "sesly:gemini"
+
+
+class GeminiQuotaExceeded(Exception):
+    """Günlük Gemini kotası doldu"""
+
+
+class GeminiLimitTimeout(GeminiQuotaExceeded):
+    """Kapasite verilen süre içinde ayrılamadı"""
+
+
+def estimate_tokens(text: str = "", audio_seconds: float = 0.0) -> int:
+    """İstek için kaba token tahmini (prompt + ses)"""
+    return int(len(text or "") / CHARS_PER_TOKEN + (audio_seconds or 0) * AUDIO_TOKENS_PER_SECOND) + 1
+
+
+def retry_after_seconds(error, default: float) -> float:
+    """429 hata mesajındaki 'retry in 23.5s' / 'retry_delay { seconds: 23 }' ipucunu oku"""
+    text = str(error)
+    match = (re.search(r"retry_delay\s*\{\s*seconds:\s*(\d+)", text, re.IGNORECASE)
+             or re.search(r"retry(?:_delay)?\D{0,20}?(\d+(?:\.\d+)?)\s*s", text, re.IGNORECASE))
+    return float(match.group(1)) if match else default
+
+
+def _quota_day() -> str:
+    now = datetime.now(_QUOTA_TZ) if _QUOTA_TZ else datetime.utcnow()
+    return now.strftime("%Y%m%d")
+
+
+# KEYS: rpm bucket, tpm bucket, günlük sayaç, cooldown
+# ARGV: now, rpm, tpm, tokens, rpd
+# Dönüş: "0" = ayrıldı, "-1" = günlük kota dolu, diğer = beklenecek saniye
+_RESERVE_LUA = """
+local now = tonumber(ARGV[1])
+local rpm = tonumber(ARGV[2])
+local tpm = tonumber(ARGV[3])
+local tokens = math.min(tonumber(ARGV[4]), tpm)
+local rpd = tonumber(ARGV[5])
+
+local cooldown = tonumber(redis.call('GET', KEYS[4]) or '0')
+if cooldown > now then return tostring(cooldown - now) end
+
+local function level(key, cap)
+  local b = redis.call('HMGET', key, 'level', 'ts')
+  local lvl = tonumber(b[1]) or cap
+  local ts = tonumber(b[2]) or now
+  return math.min(cap, lvl + (now - ts) * cap / 60)
+end
+
+local r = level(KEYS[1], rpm)
+local t = level(KEYS[2], tpm)
+local wait = 0
+if r < 1 then wait = (1 - r) * 60 / rpm end
+if t < tokens then wait = math.max(wait, (tokens - t) * 60 / tpm) end
+if wait > 0 then return tostring(wait) end
+
+if tonumber(redis.call('GET', KEYS[3]) or '0') >= rpd then return '-1' end
+
+redis.call('HSET', KEYS[1], 'level', tostring(r - 1), 'ts', tostring(now))
+redis.call('HSET', KEYS[2], 'level', tostring(t - tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], 120)
+redis.call('EXPIRE', KEYS[2], 120)
+redis.call('INCR', KEYS[3])
+redis.call('EXPIRE', KEYS[3], 172800)
+return '0'
+"""
+
+
+class GeminiRateLimiter:
+    """RPM / TPM / günlük kota için paylaşımlı token bucket"""
+
+    def __init__(self, rpm=GEMINI_RPM, tpm=GEMINI_TPM, rpd=GEMINI_RPD, redis_url=REDIS_URL):
+        self.rpm = max(1, rpm)
+        self.tpm = max(1, tpm)
+        self.rpd = max(1, rpd)
+        self.redis_url = redis_url
+        self._redis = None
+        self._script = None
+        self._redis_retry_at = 0.0
+        self._lock = threading.Lock()
+        # Process içi fallback durumu
+        self._local = {"rpm": (float(self.rpm), time.time()), "tpm": (float(self.tpm), time.time()),
+                       "day": (_quota_day(), 0), "cooldown": 0.0}
+
+    # --------------------------------------------------------
+    # Backend'ler
+    # --------------------------------------------------------
+    def _get_redis(self):
+        if not self.redis_url or time.time() < self._redis_retry_at:
+            return None
+        if self._redis is None:
+            try:
+                import redis
+                self._redis = redis.Redis.from_url(self.redis_url, socket_timeout=2, socket_connect_timeout=2)
+                self._script = self._redis.register_script(_RESERVE_LUA)
+            except Exception as e:
+                self._redis_unavailable(e)
+                return None
+        return self._redis
+
+    def _redis_unavailable(self, error):
+        print(f"[LIMITER] Redis kullanılamıyor, process içi limit kullanılıyor: {error}")
+        self._redis = None
+        self._script = None
+        self._redis_retry_at = time.time() + REDIS_RETRY_SECONDS
+
+    def _reserve_redis(self, tokens: int):
+        day = _quota_day()
+        keys = [f"{KEY_PREFIX}:rpm", f"{KEY_PREFIX}:tpm", f"{KEY_PREFIX}:day:{day}", f"{KEY_PREFIX}:cooldown"]
+        result = self._script(keys=keys, args=[time.time(), self.rpm, self.tpm, tokens, self.rpd])
+        return float(result)
+
+    def _reserve_local(self, tokens: int) -> float:
+        now = time.time()
+        tokens = min(tokens, self.tpm)
+        with self._lock:
+            if self._local["cooldown"] > now:
+                return self._local["cooldown"] - now
+
+            def level(name, cap):
+                lvl, ts = self._local[name]
+                return min(cap, lvl + (now - ts) * cap / 60)
+
+            r = level("rpm", self.rpm)
+            t = level("tpm", self.tpm)
+            wait = 0.0
+            if r < 1:
+                wait = (1 - r) * 60 / self.rpm
+            if t < tokens:
+                wait = max(wait, (tokens - t) * 60 / self.tpm)
+            if wait > 0:
+                return wait
+
+            day, used = self._local["day"]
+            if day != _quota_day():
+                day, used = _quota_day(), 0
+            if used >= self.rpd:
+                return -1.0
+
+            self._local["rpm"] = (r - 1, now)
+            self._local["tpm"] = (t - tokens, now)
+            self._local["day"] = (day, used + 1)
+            return 0.0
+
+    def _reserve(self, tokens: int) -> float:
+        client = self._get_redis()
+        if client is not None:
+            try:
+                return self._reserve_redis(tokens)
+            except Exception as e:
+                self._redis_unavailable(e)
+        return self._reserve_local(tokens)
+
+    # --------------------------------------------------------
+    # Public API
+    # --------------------------------------------------------
+    def acquire(self, tokens: int = 1, timeout: float = GEMINI_LIMIT_TIMEOUT, label: str = "gemini"):
+        """
+        Kapasite ayrılana kadar bekle.
+
+        Raises:
+            GeminiQuotaExceeded: Günlük kota dolu
+            GeminiLimitTimeout: timeout içinde kapasite bulunamadı
+        """
+        deadline = time.time() + timeout
+        announced = False
+        while True:
+            wait = self._reserve(tokens)
+            if wait == 0:
+                return
+            if wait < 0:
+                raise GeminiQuotaExceeded("Günlük Gemini kotası doldu")
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise GeminiLimitTimeout(f"Gemini kapasitesi {timeout:.0f}s içinde ayrılamadı")
+            if not announced:
+                print(f"[LIMITER] {label}: kapasite bekleniyor (~{wait:.1f}s, {tokens} token)")
+                announced = True
+            time.sleep(min(wait, remaining, 5.0))
+
+    def penalize(self, seconds: float):
+        """429 alındı: tüm çağıranları (tüm process'ler) seconds boyunca beklet"""
+        until = time.time() + seconds
+        client = self._get_redis()
+        if client is not None:
+            try:
+                key = f"{KEY_PREFIX}:cooldown"
+                current = float(client.get(key) or 0)
+                if until > current:
+                    client.set(key, until, ex=int(seconds) + 1)
+                return
+            except Exception as e:
+                self._redis_unavailable(e)
+        with self._lock:
+            self._local["cooldown"] = max(self._local["cooldown"], until)
+
+
+gemini_limiter = GeminiRateLimiter()
+
+
+def limited_generate(model, contents, tokens: int = None, label: str = "gemini", **kwargs):
+    """
+    Kapasite ayırıp model.generate_content çağır (retry yok).
+    429 alınırsa bekleme süresi limiter'a bildirilir ve hata yükseltilir.
+    """
+    if tokens is None:
+        tokens = estimate_tokens(contents if isinstance(contents, str) else "")
+    gemini_limiter.acquire(tokens, label=label)
+    try:
+        return model.generate_content(contents, **kwargs)
+    except Exception as e:
+        if "429" in str(e):
+            gemini_limiter.penalize(retry_after_seconds(e, 30))
+        raise
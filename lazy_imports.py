@@ -0,0 +1,67 @@
+"""
+Lazy Imports
+============
+Ağır kütüphaneler (google.generativeai, supabase, celery, jinja2, httpx)
+server.py import edilirken değil, ilk kullanıldıklarında yüklenir. Böylece
+container restart / uvicorn reload'da sunucu bir saniyenin altında ayağa
+kalkar; Gemini veya Redis gerektirmeyen endpoint'ler onları hiç yüklemez.
+
+    genai.GenerativeModel(...)   # İlk erişimde import + configure
+
+Başlangıç süresi ölçümü:  python debug_server_imports.py
+"""
+
+import importlib
+import os
+import threading
+
+
+class Lazy:
+    """İlk attribute erişiminde factory() ile oluşturulan nesnenin vekili (thread-safe)"""
+
+    def __init__(self, factory, name: str = None):
+        self._factory = factory
+        self._name = name or getattr(factory, "__name__", "lazy")
+        self._value = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    self._value = self._factory()
+        return self._value
+
+    @property
+    def loaded(self) -> bool:
+        return self._value is not None
+
+    def __getattr__(self, attr):
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<Lazy {self._name} ({state})>"
+
+
+def lazy_module(name: str, on_load=None) -> Lazy:
+    """Modülü ilk kullanımda import et; on_load(module) bir kez çağrılır"""
+    def factory():
+        module = importlib.import_module(name)
+        if on_load is not None:
+            on_load(module)
+        return module
+    return Lazy(factory, name)
+
+
+def _configure_genai(module):
+    api_key = os.getenv("GEMINI_API_KEY")
+    if api_key:
+        module.configure(api_key=api_key, transport="rest")
+
+
+# Tüm modüller aynı (yapılandırılmış) Gemini istemcisini kullanır
+genai = lazy_module("google.generativeai", on_load=_configure_genai)
+genai_types = lazy_module("google.generativeai.types", on_load=lambda _: genai._load())
@@ -0,0 +1,146 @@
+"""
+Live Events
+===========
+Dashboard'a push edilen canlı olaylar (/events, Server-Sent Events).
+
+- Yazanlar (transkript deposuna ekleme, durum değişikliği, rapor) publish()
+  çağırır; event loop dışındaki thread'lerden (transkripsiyon havuzu) de
+  güvenle çağrılabilir.
+- Son durum (ör. "status") bellekte tutulur; yeni bağlanan istemci önce onu
+  alır, sonra sadece değişiklikler gelir. Aynı olayın birden fazla anlık
+  görüntüsü olabilir (toplantı başına "status").
+- Abone bir filtre (accept) verebilir; ör. sadece kendi toplantısının
+  olaylarını alır.
+- Son HISTORY_SIZE olay saklanır: EventSource yeniden bağlanırken gönderdiği
+  Last-Event-ID'den sonrası tekrar oynatılır.
+- Yavaş istemcinin kuyruğu dolarsa bağlantısı kapatılır (tarayıcı yeniden
+  bağlanıp güncel durumu alır); diğer istemciler beklemez.
+"""
+
+import asyncio
+import json
+import threading
+from collections import deque
+
+HISTORY_SIZE = 500
+CLIENT_QUEUE_SIZE = 200
+
+_CLOSE = object()  # Kuyruk sonu işareti
+
+
+class EventHub:
+    """Process içi yayın / abonelik merkezi"""
+
+    def __init__(self, history_size: int = HISTORY_SIZE):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._subscribers = {}  # kuyruk → accept(event, data) filtresi (None: hepsi)
+        self._history = deque(maxlen=history_size)
+        self._state = {}
+        self._next_id = 1
+
+    def attach_loop(self, loop):
+        """Abonelere teslimatın yapılacağı event loop (lifespan'de)"""
+        self._loop = loop
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    # --------------------------------------------------------
+    # Yayın
+    # --------------------------------------------------------
+    def publish(self, event: str, data: dict) -> int:
+        """Olayı tüm abonelere gönder; olay id'sini döner"""
+        with self._lock:
+            event_id = self._next_id
+            self._next_id += 1
+            item = (event_id, event, data)
+            self._history.append(item)
+            subscribers = list(self._subscribers.items())
+        if subscribers and self._loop is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._deliver, item, subscribers)
+            except RuntimeError:
+                pass  # Loop kapanıyor
+        return event_id
+
+    def set_state(self, name: str, data: dict, event: str = None) -> bool:
+        """
+        Durum anlık görüntüsünü güncelle; değiştiyse `event` (varsayılan `name`)
+        olayı olarak yayınla
+        """
+        event = event or name
+        with self._lock:
+            if self._state.get(name) == (event, data):
+                return False
+            self._state[name] = (event, data)
+        self.publish(event, data)
+        return True
+
+    def get_state(self, name: str):
+        with self._lock:
+            state = self._state.get(name)
+        return state[1] if state else None
+
+    def clear_state(self, name: str):
+        """Anlık görüntüyü unut (yeni bağlananlara artık gönderilmez)"""
+        with self._lock:
+            self._state.pop(name, None)
+
+    def _deliver(self, item, subscribers):
+        for queue, accept in subscribers:
+            if queue not in self._subscribers:
+                continue
+            if accept is not None and not accept(item[1], item[2]):
+                continue
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                # Yavaş istemci: bağlantısını kapat (yeniden bağlanınca güncel durumu alır)
+                self.unsubscribe(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(_CLOSE)
+
+    # --------------------------------------------------------
+    # Abonelik
+    # --------------------------------------------------------
+    def subscribe(self, last_event_id: int = None, accept=None):
+        """
+        Yeni abone kuyruğu ve hemen gönderilecek olaylar:
+        Last-Event-ID geçmişte varsa ondan sonrakiler, yoksa durum anlık görüntüleri.
+        accept(event, data) verilirse sadece True döndüğü olaylar gönderilir.
+        """
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[queue] = accept
+            history = list(self._history)
+            state = list(self._state.values())
+            current_id = self._next_id - 1
+        # Sunucu yeniden başladıysa id'ler 1'den başlar: istemcinin eski (mevcut en
+        # yeniden büyük) Last-Event-ID'si geçmişte aranmaz, anlık görüntüler gönderilir
+        if (last_event_id is not None and history
+                and history[0][0] <= last_event_id + 1 and last_event_id <= current_id):
+            initial = [item for item in history if item[0] > last_event_id]
+        else:
+            initial = [(current_id, event, data) for event, data in state]
+        if accept is not None:
+            initial = [item for item in initial if accept(item[1], item[2])]
+        return queue, initial
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    @staticmethod
+    def is_close(item) -> bool:
+        return item is _CLOSE
+
+
+def format_sse(event_id: int, event: str, data: dict) -> str:
+    """SSE çerçevesi"""
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+hub = EventHub()
@@ -15,6 +15,7 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
 # Platform abstraction
 from platform_utils import IS_WINDOWS, IS_LINUX, get_chrome_options_for_platform, setup_display
+from meeting_state import meeting
 
 # Linux'ta display ayarla
 setup_display()
@@ -267,12 +268,10 @@ class MeetWebBot:
     def _check_stop_command(self):
         """stop komutu gelip gelmediğini kontrol eder."""
         try:
-            cmd_path = Path("data/bot_command.json")
-            if cmd_path.exists():
-                data = json.loads(cmd_path.read_text(encoding="utf-8"))
-                if data.get("command") == "stop" and not data.get("processed"):
-                    logger.info("🛑 İşlem sırasında STOP komutu algılandı.")
-                    return True
+            data = meeting().get("command") or {}  # Toplantının komutu (TASK_ID)
+            if data.get("command") == "stop" and not data.get("processed"):
+                logger.info("🛑 İşlem sırasında STOP komutu algılandı.")
+                return True
         except: pass
         return False
 
@@ -620,13 +619,9 @@ class MeetWebBot:
                         
                         # STOP KOMUTU KONTROLÜ (Kritik)
                         # Eğer bu süreçte kullanıcı durdur derse çıkmalıyız.
-                        if Path("data/bot_command.json").exists():
-                            try:
-                                cmd = json.loads(Path("data/bot_command.json").read_text("utf-8"))
-                                if cmd.get("command") == "stop" and not cmd.get("processed"):
-                                    logger.info("🛑 Bekleme sırasında STOP komutu algılandı.")
-                                    return False
-                            except: pass
+                        if self._check_stop_command():
+                            logger.info("🛑 Bekleme sırasında STOP komutu algılandı.")
+                            return False
 
                         # Her 30 saniyede bir log at
                         if int(elapsed) % 30 == 0:
@@ -5,6 +5,8 @@ import asyncio
 import subprocess
 import traceback
 from pathlib import Path
+from workspace import recorder_command, task_file, meeting_file
+from meeting_state import meeting
 from meet_web_client import MeetWebBot
 import logging
 
@@ -27,16 +29,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger("MeetWorker")
 
-BOT_TASK_FILE = Path("data/bot_task.json")
-BOT_COMMAND_FILE = Path("data/bot_command.json")
-WORKER_STATUS_FILE = Path("data/worker_status.json")
-
 # Script Paths
 RECORDER_SCRIPT = "zoom_bot_recorder.py"
 RAPOR_SCRIPT = "rapor.py"
 
 def update_status(**kwargs):
-    """worker_status.json dosyasını güncelle."""
+    """Toplantının worker durumunu güncelle (meeting_state "status"; TASK_ID yoksa data/worker_status.json)."""
     status = {
         "running": False,
         "recording": False,
@@ -46,19 +44,12 @@ def update_status(**kwargs):
         "timestamp": time.time(),
     }
 
-    if WORKER_STATUS_FILE.exists():
-        try:
-            old = json.loads(WORKER_STATUS_FILE.read_text(encoding="utf-8"))
-            status.update(old)
-        except Exception:
-            pass
+    state = meeting()
+    status.update(state.get("status") or {})
 
     status.update(kwargs)
     try:
-        WORKER_STATUS_FILE.write_text(
-            json.dumps(status, ensure_ascii=False, indent=2),
-            encoding="utf-8"
-        )
+        state.set("status", status)
     except Exception as e:
         logger.error(f"Status update error: {e}")
 
@@ -68,13 +59,13 @@ async def run_meet_task(meeting_url):
     recorder_proc = None
 
     try:
-        BOT_COMMAND_FILE = Path("data/bot_command.json")
-        STOP_SIGNAL_FILE = Path("stop_recording.signal")
+        state = meeting()
+        STOP_SIGNAL_FILE = task_file("stop_recording.signal")
         
-        if BOT_COMMAND_FILE.exists():
+        if state.get("command") is not None:
             try:
-                BOT_COMMAND_FILE.unlink()
-                logger.info("Eski bot komut dosyası temizlendi.")
+                state.delete("command")
+                logger.info("Eski bot komutu temizlendi.")
             except: pass
 
         if STOP_SIGNAL_FILE.exists():
@@ -86,11 +77,12 @@ async def run_meet_task(meeting_url):
         # Data dosyalarını temizle
         files_to_clean = [
             "latest_transcript.txt", 
+            "transcript_segments.jsonl",
             "speaker_activity_log.json", 
             "current_meeting_participants.json"
         ]
         for fname in files_to_clean:
-            f = Path(fname)
+            f = meeting_file(fname)
             if f.exists():
                 try:
                     f.unlink()
@@ -136,7 +128,7 @@ async def run_meet_task(meeting_url):
                     "participants": participants,
                     "platform": "meet"
                 }
-                Path("current_meeting_participants.json").write_text(
+                meeting_file("current_meeting_participants.json").write_text(
                     json.dumps(participant_data, ensure_ascii=False), 
                     encoding="utf-8"
                 )
@@ -149,14 +141,15 @@ async def run_meet_task(meeting_url):
         
         # Timeline ve transcript dosyalarını temizle (yeni göreve hazırlan)
         try:
-            Path("speaker_timeline.jsonl").write_text("", encoding="utf-8")
-            Path("latest_transcript.txt").write_text("", encoding="utf-8")
+            meeting_file("speaker_timeline.jsonl").write_text("", encoding="utf-8")
+            meeting_file("latest_transcript.txt").write_text("", encoding="utf-8")
+            meeting_file("transcript_segments.jsonl").unlink(missing_ok=True)
             logger.info("Timeline ve transcript temizlendi (yeni görev).")
         except: pass
         
         try:
             # Recorder script'ini ayrı process olarak çalıştır
-            recorder_proc = subprocess.Popen(["python", RECORDER_SCRIPT, "--platform", "meet"])
+            recorder_proc = subprocess.Popen(recorder_command(RECORDER_SCRIPT, "meet"))
             update_status(recording=True, status_message="🔴 Kayıt Alınıyor")
         except Exception as e:
             logger.error(f"Recorder hatası: {e}")
@@ -203,25 +196,23 @@ async def run_meet_task(meeting_url):
         
         while True:
             # Task iptal edildi mi kontrol et
-            if BOT_TASK_FILE.exists():
-                try:
-                    task = json.loads(BOT_TASK_FILE.read_text(encoding="utf-8"))
-                    if not task.get("active", False):
-                        logger.info("Görev iptal edildi.")
-                        break
-                except:
-                    pass
+            try:
+                task = state.get("task")
+                if task is not None and not task.get("active", False):
+                    logger.info("Görev iptal edildi.")
+                    break
+            except:
+                pass
 
             # Komut kontrolü (Stop/Pause)
-            if BOT_COMMAND_FILE.exists():
-                try:
-                    cmd_data = json.loads(BOT_COMMAND_FILE.read_text(encoding="utf-8"))
-                    if not cmd_data.get("processed", False) and cmd_data.get("command") == "stop":
-                         logger.info("🛑 STOP komutu alındı. Çıkış yapılıyor...")
-                         cmd_data["processed"] = True
-                         BOT_COMMAND_FILE.write_text(json.dumps(cmd_data), encoding="utf-8")
-                         break
-                except: pass
+            try:
+                cmd_data = state.get("command")
+                if cmd_data and not cmd_data.get("processed", False) and cmd_data.get("command") == "stop":
+                     logger.info("🛑 STOP komutu alındı. Çıkış yapılıyor...")
+                     cmd_data["processed"] = True
+                     state.set("command", cmd_data)
+                     break
+            except: pass
 
             # Toplantı bitti mi?
             if await bot.check_meeting_ended():
@@ -244,7 +235,7 @@ async def run_meet_task(meeting_url):
                             "participants": new_participants,
                             "platform": "meet"
                         }
-                        Path("current_meeting_participants.json").write_text(
+                        meeting_file("current_meeting_participants.json").write_text(
                             json.dumps(participant_data, ensure_ascii=False), 
                             encoding="utf-8"
                         )
@@ -269,7 +260,7 @@ async def run_meet_task(meeting_url):
                     }
                     try:
                         # 1. Log History (Recorder bunu okur) - LIST FORMAT (Append)
-                        activity_log = Path("speaker_activity_log.json")
+                        activity_log = meeting_file("speaker_activity_log.json")
                         logs = []
                         if activity_log.exists():
                             try:
@@ -280,8 +271,14 @@ async def run_meet_task(meeting_url):
                         logs.append(log_data)
                         activity_log.write_text(json.dumps(logs, ensure_ascii=False, indent=2), encoding="utf-8")
                         
-                        # 2. Timeline Append (Geçmiş)
-                        # ...
+                        # 2. Timeline Append (Geçmiş) - JSONL, timeline indeksi sadece yeni satırları okur
+                        timeline_entry = {
+                            "ts": log_data["timestamp"],
+                            "time": time.strftime("%H:%M:%S"),
+                            "speakers": active_speakers
+                        }
+                        with open(meeting_file("speaker_timeline.jsonl"), "a", encoding="utf-8") as tf:
+                            tf.write(json.dumps(timeline_entry, ensure_ascii=False) + "\n")
 
                         # 3. Current Snapshot (UI/Backend integration)
                         # Platform bilgisi eklendi - Hibrit diarization için
@@ -289,7 +286,7 @@ async def run_meet_task(meeting_url):
                             "participants": active_speakers,
                             "platform": "meet"
                         }
-                        Path("current_meeting_participants.json").write_text(
+                        meeting_file("current_meeting_participants.json").write_text(
                             json.dumps(participant_data, ensure_ascii=False), 
                             encoding="utf-8"
                         )
@@ -320,7 +317,7 @@ async def run_meet_task(meeting_url):
         # SONRA recorder'ı durdur (arka planda bekleyebilir)
         if recorder_proc:
             logger.info("Recorder durduruluyor (Graceful)...")
-            Path("stop_recording.signal").touch()
+            task_file("stop_recording.signal").touch()
             
             try:
                 recorder_proc.wait(timeout=20)  # 20 saniye bekle
@@ -363,7 +360,7 @@ async def run_meet_task(meeting_url):
                 
                 for filename in cleanup_files:
                     try:
-                        file_path = Path(filename)
+                        file_path = meeting_file(filename)
                         if file_path.exists():
                             file_path.unlink()
                             logger.info(f"  ✓ {filename} silindi")
@@ -389,23 +386,21 @@ async def run_meet_task(meeting_url):
         )
         
         # Task'i pasife çek
-        if BOT_TASK_FILE.exists():
-            try:
-                t = json.loads(BOT_TASK_FILE.read_text("utf-8"))
-                t["active"] = False
-                BOT_TASK_FILE.write_text(json.dumps(t, indent=2), "utf-8")
-            except:
-                pass
+        try:
+            if meeting().get("task") is not None:
+                meeting().update("task", active=False)
+        except:
+            pass
 
 async def main():
     logger.info("🤖 Meet Web Worker Başlatıldı")
     while True:
-        if not BOT_TASK_FILE.exists():
+        task = meeting().get("task")
+        if not task:
             await asyncio.sleep(2)
             continue
 
         try:
-            task = json.loads(BOT_TASK_FILE.read_text(encoding="utf-8"))
             if task.get("active") and task.get("platform") == "meet":
                 url = task.get("meeting_url")
                 if url:
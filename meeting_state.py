@@ -0,0 +1,357 @@
+"""
+Meeting State
+=============
+Toplantı koordinasyon durumu (görev, komut, worker durumu) görev kimliği
+(task_id) başına tutulur; böylece aynı dağıtımda birden fazla toplantı
+(Celery worker replica'ları) birbirinin dosyasını ezmeden çalışır.
+
+    state = meeting(task_id)          # task_id yoksa TASK_ID ortam değişkeni
+    state.set("task", {...})          # server: yeni görev
+    state.get("command")              # worker: stop / pause / resume
+    state.update("status", recording=True)
+
+Backend'ler:
+- Redis (REDIS_URL): sesly:meeting:<task_id> hash'i, alan başına JSON.
+  API ve tüm worker container'ları ortak görür.
+- SQLite (data/meeting_state.db): Redis yoksa / erişilemezse. data/
+  volume'u paylaşıldığı için container'lar arasında da çalışır.
+  Redis kesintisinde SQLite'a yapılan yazımlar (ör. "stop" komutu) process
+  içinde günlüğe alınır; Redis'e yeniden bağlanırken önce bunlar Redis'e
+  aktarılır, sonra okumalar Redis'e döner (kesintide yazılan kaybolmaz).
+- task_id olmadan (sistem.py / tek bot): eski data/bot_task.json,
+  data/bot_command.json, data/worker_status.json dosyaları aynen kullanılır.
+
+state_version() herhangi bir yazmada değişir; server'ın durum izleyicisi
+dosya imzaları yerine bunu yoklar.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from workspace import SHARED_DATA_DIR, get_task_id
+
+MEETING_STATE_BACKEND = os.getenv("MEETING_STATE_BACKEND", "auto").lower()  # auto | redis | sqlite
+REDIS_URL = os.getenv("REDIS_URL", "")
+SQLITE_PATH = SHARED_DATA_DIR / "meeting_state.db"
+MEETING_TTL = 2 * 24 * 3600  # Redis'te bitmiş toplantılar bu süre sonra silinir
+REDIS_RETRY_SECONDS = 30
+KEY_PREFIX = "sesly:meeting"
+
+# task_id olmayan (eski, tek toplantılı) kurulumun dosyaları
+LEGACY_FILES = {
+    "task": SHARED_DATA_DIR / "bot_task.json",
+    "command": SHARED_DATA_DIR / "bot_command.json",
+    "status": SHARED_DATA_DIR / "worker_status.json",
+}
+
+
+# ============================================================
+# BACKEND'LER
+# ============================================================
+
+class SQLiteBackend:
+    """data/meeting_state.db (WAL); thread başına bağlantı"""
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = Path(path)
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            conn.execute("CREATE TABLE IF NOT EXISTS state (task_id TEXT, name TEXT, value TEXT, "
+                         "updated REAL, PRIMARY KEY (task_id, name))")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+            conn.execute("INSERT OR IGNORE INTO meta VALUES ('version', 0)")
+            self._local.conn = conn
+        return conn
+
+    def _write(self, sql: str, args: tuple):
+        conn = self._conn()
+        with conn:  # Tek transaction: değişiklik + sürüm
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(sql, args)
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def get(self, task_id, name):
+        row = self._conn().execute("SELECT value FROM state WHERE task_id = ? AND name = ?",
+                                   (task_id, name)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, task_id, name, value):
+        self._write("INSERT OR REPLACE INTO state VALUES (?, ?, ?, ?)",
+                    (task_id, name, json.dumps(value, ensure_ascii=False), time.time()))
+
+    def delete(self, task_id, name=None):
+        if name is None:
+            self._write("DELETE FROM state WHERE task_id = ?", (task_id,))
+        else:
+            self._write("DELETE FROM state WHERE task_id = ? AND name = ?", (task_id, name))
+
+    def meetings(self) -> list:
+        return [row[0] for row in self._conn().execute("SELECT DISTINCT task_id FROM state")]
+
+    def version(self):
+        row = self._conn().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else 0
+
+
+class RedisBackend:
+    """sesly:meeting:<task_id> hash'leri + sesly:meetings kümesi"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def _key(self, task_id):
+        return f"{KEY_PREFIX}:{task_id}"
+
+    def get(self, task_id, name):
+        raw = self.client.hget(self._key(task_id), name)
+        return json.loads(raw) if raw else None
+
+    def set(self, task_id, name, value):
+        key = self._key(task_id)
+        pipe = self.client.pipeline()
+        pipe.hset(key, name, json.dumps(value, ensure_ascii=False))
+        pipe.expire(key, MEETING_TTL)
+        pipe.sadd(f"{KEY_PREFIX}s", task_id)
+        pipe.incr(f"{KEY_PREFIX}:version")
+        pipe.execute()
+
+    def delete(self, task_id, name=None):
+        pipe = self.client.pipeline()
+        if name is None:
+            pipe.delete(self._key(task_id))
+            pipe.srem(f"{KEY_PREFIX}s", task_id)
+        else:
+            pipe.hdel(self._key(task_id), name)
+        pipe.incr(f"{KEY_PREFIX}:version")
+        pipe.execute()
+
+    def meetings(self) -> list:
+        ids = [m.decode() if isinstance(m, bytes) else m for m in self.client.smembers(f"{KEY_PREFIX}s")]
+        alive = []
+        for task_id in ids:
+            if self.client.exists(self._key(task_id)):
+                alive.append(task_id)
+            else:
+                self.client.srem(f"{KEY_PREFIX}s", task_id)  # TTL ile silinmiş
+        return alive
+
+    def version(self):
+        return int(self.client.get(f"{KEY_PREFIX}:version") or 0)
+
+
+class LegacyFileBackend:
+    """task_id yokken eski data/*.json dosyaları (sistem.py ile uyumlu)"""
+
+    def _path(self, name) -> Path:
+        return LEGACY_FILES.get(name) or SHARED_DATA_DIR / f"meeting_{name}.json"
+
+    def get(self, task_id, name):
+        try:
+            return json.loads(self._path(name).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def set(self, task_id, name, value):
+        path = self._path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(value, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(path)
+
+    def delete(self, task_id, name=None):
+        names = [name] if name else list(LEGACY_FILES)
+        for n in names:
+            try:
+                self._path(n).unlink()
+            except FileNotFoundError:
+                pass
+
+    def version(self):
+        sig = []
+        for path in LEGACY_FILES.values():
+            try:
+                st = path.stat()
+                sig.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                sig.append(None)
+        return tuple(sig)
+
+
+_sqlite = SQLiteBackend()
+_legacy = LegacyFileBackend()
+_redis_state = {"backend": None, "retry_at": 0.0}
+_redis_lock = threading.Lock()
+# Redis yokken SQLite'a yapılan yazımlar: (task_id, name) → değer / _DELETED
+# (name None: toplantının tamamı silindi). Redis'e dönerken sırayla aktarılır.
+_fallback_writes = OrderedDict()
+_fallback_lock = threading.Lock()
+_DELETED = object()
+
+
+def _redis_backend():
+    if MEETING_STATE_BACKEND == "sqlite" or not REDIS_URL:
+        return None
+    if _redis_state["backend"] is not None:
+        return _redis_state["backend"]
+    if time.time() < _redis_state["retry_at"]:
+        return None
+    with _redis_lock:
+        if _redis_state["backend"] is None:
+            try:
+                import redis
+                client = redis.Redis.from_url(REDIS_URL, socket_timeout=2, socket_connect_timeout=2)
+                client.ping()
+                backend = RedisBackend(client)
+                _replay_fallback_writes(backend)
+                _redis_state["backend"] = backend
+            except Exception as e:
+                _redis_unavailable(e)
+    return _redis_state["backend"]
+
+
+def _redis_unavailable(error):
+    print(f"[STATE] Redis kullanılamıyor, SQLite kullanılıyor ({SQLITE_PATH}): {error}")
+    _redis_state["backend"] = None
+    _redis_state["retry_at"] = time.time() + REDIS_RETRY_SECONDS
+
+
+def _record_fallback_write(method: str, args: tuple):
+    """Redis kullanılamazken yapılan yazımı Redis'e dönüşte aktarmak için sakla"""
+    if MEETING_STATE_BACKEND == "sqlite" or not REDIS_URL:
+        return
+    task_id, name = args[0], args[1]
+    value = args[2] if method == "set" else _DELETED
+    with _fallback_lock:
+        if name is None:
+            for key in [k for k in _fallback_writes if k[0] == task_id]:
+                del _fallback_writes[key]
+        _fallback_writes.pop((task_id, name), None)
+        _fallback_writes[(task_id, name)] = value
+
+
+def _replay_fallback_writes(backend):
+    """Kesinti sırasında SQLite'a yazılanları Redis'e aktar (hata olursa yükselir, günlük korunur)"""
+    with _fallback_lock:
+        pending = list(_fallback_writes.items())
+    if not pending:
+        return
+    for (task_id, name), value in pending:
+        if value is _DELETED:
+            backend.delete(task_id, name)
+        else:
+            backend.set(task_id, name, value)
+    with _fallback_lock:
+        for key, value in pending:
+            if _fallback_writes.get(key) is value:
+                del _fallback_writes[key]
+    print(f"[STATE] Redis'e dönüldü: kesintide yazılan {len(pending)} kayıt aktarıldı")
+
+
+def _call(method: str, *args):
+    """Redis varsa onunla, hata olursa / yoksa SQLite ile"""
+    backend = _redis_backend()
+    if backend is not None:
+        try:
+            return getattr(backend, method)(*args)
+        except Exception as e:
+            _redis_unavailable(e)
+    result = getattr(_sqlite, method)(*args)
+    if method in ("set", "delete"):
+        _record_fallback_write(method, args)
+    return result
+
+
+# ============================================================
+# PUBLIC API
+# ============================================================
+
+class MeetingState:
+    """Tek toplantının durum belgeleri (task, command, status, ...)"""
+
+    def __init__(self, task_id: str = None):
+        self.task_id = task_id or None
+
+    @property
+    def legacy(self) -> bool:
+        return self.task_id is None
+
+    def _do(self, method: str, *args):
+        if self.legacy:
+            return getattr(_legacy, method)(None, *args)
+        return _call(method, self.task_id, *args)
+
+    def get(self, name: str, default=None):
+        try:
+            value = self._do("get", name)
+        except Exception as e:
+            print(f"[STATE] {name} okunamadı ({self.task_id}): {e}")
+            return default
+        return default if value is None else value
+
+    def set(self, name: str, value: dict):
+        self._do("set", name, value)
+
+    def update(self, name: str, **fields) -> dict:
+        """Belgedeki alanları güncelle (yoksa oluştur); yeni belgeyi döner"""
+        value = dict(self.get(name) or {})
+        value.update(fields)
+        self.set(name, value)
+        return value
+
+    def delete(self, name: str):
+        self._do("delete", name)
+
+    def clear(self):
+        """Toplantının tüm durumunu sil"""
+        self._do("delete", None)
+
+    def __repr__(self):
+        return f"<MeetingState {self.task_id or 'legacy'}>"
+
+
+def meeting(task_id: str = None) -> MeetingState:
+    """Görevin durumu; task_id verilmezse TASK_ID (worker), o da yoksa eski dosyalar"""
+    return MeetingState(task_id or get_task_id())
+
+
+def active_meetings(user_id: str = None) -> list:
+    """Aktif görevler (task belgeleri, en yeni önce); user_id verilirse sadece o kullanıcının"""
+    tasks = []
+    try:
+        task_ids = _call("meetings")
+    except Exception as e:
+        print(f"[STATE] Toplantı listesi okunamadı: {e}")
+        return []
+    for task_id in task_ids:
+        task = MeetingState(task_id).get("task")
+        if not task or not task.get("active"):
+            continue
+        if user_id and task.get("user_id") != user_id:
+            continue
+        tasks.append({**task, "task_id": task_id})
+    return sorted(tasks, key=lambda t: t.get("timestamp", 0), reverse=True)
+
+
+def state_version():
+    """
+    Herhangi bir toplantı durumu (veya eski dosyalar) değiştiğinde değişen değer.
+    Sayaç hangi backend'den okunduğuyla birlikte döner: Redis ↔ SQLite geçişi
+    ilgisiz iki sayacı karşılaştırmaz, tek bir değişiklik olarak görünür.
+    """
+    try:
+        backend = "redis" if _redis_backend() is not None else "sqlite"
+        return ((backend, _call("version")), _legacy.version())
+    except Exception:
+        return (None, _legacy.version())
@@ -0,0 +1,272 @@
+"""
+Proxy Cache
+===========
+/view-report ve /view-transcript Supabase storage'daki dosyaları tarayıcıya
+doğru Content-Type ile sunar. Her istekte yeni httpx.AsyncClient açmak
+(her seferinde yeni TCP + TLS el sıkışması) ve dosyanın tamamını indirmek
+yerine:
+
+- Uygulama ömrü boyunca tek paylaşımlı AsyncClient (connection pooling,
+  h2 paketi kuruluysa HTTP/2).
+- URL anahtarlı, toplam boyutu sınırlı LRU önbellek (bellekte; isteğe bağlı
+  diskte data/proxy_cache). Raporlar yazıldıktan sonra değişmez, bu yüzden
+  PROXY_CACHE_FRESH_SECONDS boyunca doğrudan önbellekten sunulur; sonrasında
+  ETag / Last-Modified ile yeniden doğrulanır (304 → önbellek kullanılır).
+- Büyük (PROXY_CACHE_ENTRY_MAX_MB üstü / boyutu bilinmeyen) gövdeler belleğe
+  alınmadan parça parça istemciye akıtılır.
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import json
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from fastapi.responses import Response, StreamingResponse
+
+PROXY_CACHE_MAX_MB = float(os.getenv("PROXY_CACHE_MAX_MB", "64"))
+PROXY_CACHE_ENTRY_MAX_MB = float(os.getenv("PROXY_CACHE_ENTRY_MAX_MB", "8"))
+PROXY_CACHE_FRESH_SECONDS = float(os.getenv("PROXY_CACHE_FRESH_SECONDS", "300"))
+# Boş bırakılırsa disk önbelleği kapalı
+PROXY_CACHE_DIR = os.getenv("PROXY_CACHE_DIR", "data/proxy_cache")
+PROXY_CACHE_DISK_MB = float(os.getenv("PROXY_CACHE_DISK_MB", "256"))
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_MB = 1024 * 1024
+
+
+class CacheEntry:
+    __slots__ = ("url", "body", "content_type", "etag", "last_modified", "checked_at")
+
+    def __init__(self, url, body, content_type=None, etag=None, last_modified=None, checked_at=None):
+        self.url = url
+        self.body = body
+        self.content_type = content_type
+        self.etag = etag
+        self.last_modified = last_modified
+        self.checked_at = checked_at or time.time()
+
+    def meta(self) -> dict:
+        return {"url": self.url, "content_type": self.content_type, "etag": self.etag,
+                "last_modified": self.last_modified, "checked_at": self.checked_at}
+
+
+class ProxyCache:
+    """Bayt sınırlı LRU (bellek) + isteğe bağlı disk katmanı. Sadece event loop'tan kullanılır."""
+
+    def __init__(self, max_bytes: int, disk_dir=None, disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self.stats = {"hit": 0, "revalidated": 0, "miss": 0, "stream": 0}
+
+    # --------------------------------------------------------
+    # Bellek
+    # --------------------------------------------------------
+    def _remember(self, entry: CacheEntry):
+        old = self._entries.pop(entry.url, None)
+        if old is not None:
+            self._size -= len(old.body)
+        self._entries[entry.url] = entry
+        self._size += len(entry.body)
+        while self._size > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted.body)
+
+    async def get(self, url: str):
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries.move_to_end(url)
+            return entry
+        if self.disk_dir is None:
+            return None
+        entry = await asyncio.to_thread(self._disk_read, url)
+        if entry is not None:
+            self._remember(entry)
+        return entry
+
+    async def put(self, entry: CacheEntry):
+        self._remember(entry)
+        if self.disk_dir is not None:
+            await asyncio.to_thread(self._disk_write, entry)
+
+    async def touch(self, entry: CacheEntry):
+        """304 sonrası: içerik aynı, sadece doğrulama zamanı güncellenir"""
+        entry.checked_at = time.time()
+        if self.disk_dir is not None:
+            await asyncio.to_thread(self._disk_write_meta, entry)
+
+    # --------------------------------------------------------
+    # Disk
+    # --------------------------------------------------------
+    def _disk_paths(self, url: str):
+        name = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.disk_dir / f"{name}.body", self.disk_dir / f"{name}.json"
+
+    def _disk_read(self, url: str):
+        body_path, meta_path = self._disk_paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if meta.get("url") != url:
+                return None
+            return CacheEntry(url, body_path.read_bytes(), meta.get("content_type"), meta.get("etag"),
+                              meta.get("last_modified"), meta.get("checked_at"))
+        except (OSError, ValueError):
+            return None
+
+    def _disk_write_meta(self, entry: CacheEntry):
+        _, meta_path = self._disk_paths(entry.url)
+        tmp = meta_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(entry.meta(), ensure_ascii=False), encoding="utf-8")
+        tmp.replace(meta_path)
+
+    def _disk_write(self, entry: CacheEntry):
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            body_path, _ = self._disk_paths(entry.url)
+            tmp = body_path.with_suffix(".body.tmp")
+            tmp.write_bytes(entry.body)
+            tmp.replace(body_path)
+            self._disk_write_meta(entry)
+        except OSError as e:
+            print(f"[PROXY] Disk önbellek yazma hatası: {e}")
+            return
+        self._disk_evict()
+
+    def _disk_evict(self):
+        """Disk sınırı aşılırsa en eski gövdelerden başlayarak sil"""
+        files = []
+        for path in self.disk_dir.glob("*.body"):
+            try:
+                st = path.stat()
+                files.append((st.st_mtime, st.st_size, path))
+            except OSError:
+                continue
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            for p in (path, path.with_suffix(".json")):
+                try: p.unlink()
+                except OSError: pass
+            total -= size
+
+
+cache = ProxyCache(
+    int(PROXY_CACHE_MAX_MB * _MB),
+    disk_dir=PROXY_CACHE_DIR or None,
+    disk_max_bytes=int(PROXY_CACHE_DISK_MB * _MB),
+)
+
+_client = None
+
+
+def get_client():
+    """Paylaşımlı httpx.AsyncClient (httpx ilk kullanımda import edilir)"""
+    global _client
+    if _client is None or _client.is_closed:
+        import httpx
+        _client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            # Yönlendirme izlenmez: URL kontrolünden geçen adres başka host'a yönlendiremesin
+        )
+    return _client
+
+
+async def close_client():
+    """Lifespan kapanışında"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _response(body: bytes, media_type: str, transform, status: str, etag=None) -> Response:
+    headers = {"Content-Type": media_type, "X-Proxy-Cache": status}
+    if etag:
+        headers["ETag"] = etag
+    return Response(content=transform(body) if transform else body, media_type=media_type, headers=headers)
+
+
+async def _tee(url: str, response, entry_max: int, meta: dict):
+    """Gövdeyi istemciye akıt; sınıra sığarsa sonunda önbelleğe yaz"""
+    parts, size = [], 0
+    try:
+        async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+            if parts is not None:
+                size += len(chunk)
+                if size <= entry_max:
+                    parts.append(chunk)
+                else:
+                    parts = None  # Çok büyük: önbelleğe alınmaz
+            yield chunk
+    finally:
+        await response.aclose()
+    if parts is not None:
+        await cache.put(CacheEntry(url, b"".join(parts), **meta))
+
+
+async def proxy_get(url: str, media_type: str, label: str = "Dosya", transform=None) -> Response:
+    """
+    URL'deki dosyayı media_type ile sun (önbellek → yeniden doğrulama → indirme).
+    transform (ör. metin encoding düzeltme) tam gövde gerektirdiği için sadece
+    önbelleğe sığan gövdelere uygulanır; büyük gövdeler olduğu gibi akıtılır.
+    """
+    entry = await cache.get(url)
+    if entry is not None and time.time() - entry.checked_at < PROXY_CACHE_FRESH_SECONDS:
+        cache.stats["hit"] += 1
+        return _response(entry.body, media_type, transform, "HIT", entry.etag)
+
+    headers = {}
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+    client = get_client()
+    response = await client.send(client.build_request("GET", url, headers=headers), stream=True)
+
+    if response.status_code == 304 and entry is not None:
+        await response.aclose()
+        await cache.touch(entry)
+        cache.stats["revalidated"] += 1
+        return _response(entry.body, media_type, transform, "REVALIDATED", entry.etag)
+
+    if response.status_code != 200:
+        await response.aclose()
+        return Response(content=f"{label} yüklenemedi: {response.status_code}", status_code=response.status_code)
+
+    meta = {
+        "content_type": response.headers.get("content-type"),
+        "etag": response.headers.get("etag"),
+        "last_modified": response.headers.get("last-modified"),
+    }
+    entry_max = int(PROXY_CACHE_ENTRY_MAX_MB * _MB)
+    try:
+        length = int(response.headers.get("content-length", ""))
+    except ValueError:
+        length = None
+
+    if length is not None and length <= entry_max:
+        try:
+            body = await response.aread()
+        finally:
+            await response.aclose()
+        await cache.put(CacheEntry(url, body, **meta))
+        cache.stats["miss"] += 1
+        return _response(body, media_type, transform, "MISS", meta["etag"])
+
+    cache.stats["stream"] += 1
+    # Content-Length aktarılmaz: httpx sıkıştırılmış gövdeyi açarak akıtır
+    out_headers = {"Content-Type": media_type, "X-Proxy-Cache": "STREAM"}
+    if meta["etag"]:
+        out_headers["ETag"] = meta["etag"]
+    return StreamingResponse(_tee(url, response, entry_max, meta), media_type=media_type, headers=out_headers)
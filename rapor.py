@@ -5,11 +5,20 @@ import json
 import os
 import datetime
 import re
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 from collections import Counter
-import google.generativeai as genai
-from db_utils import upload_file, save_meeting_record  # Supabase fonksiyonları
+from lazy_imports import genai  # İlk kullanımda import + configure
+from db_utils import upload_file, delete_file, save_meeting_record  # Supabase fonksiyonları
+from speaker_timeline import get_timeline
+from gemini_limiter import limited_generate
+from transcript_store import load_transcript
+from report_registry import register_report, registry as report_registry
+from meeting_state import meeting
+from workspace import meeting_file
 
 # API Key'i environment variable'dan al (güvenlik için)
 # ✅ .env dosyasından yükle
@@ -19,10 +28,34 @@ load_dotenv(override=True)
 API_KEY = os.getenv("GEMINI_API_KEY")
 if not API_KEY:
     print("[WARN] GEMINI_API_KEY bulunamadı! Rapor oluşturma devre dışı.")
-else:
-    genai.configure(api_key=API_KEY)
 
-def raporu_html_olarak_kaydet(rapor_metni, dosya_adi, meeting_title=None):
+# Toplantı sonu yüklemeleri: transkript yüklemesi rapor üretilirken arka planda yürür
+UPLOAD_WORKERS = int(os.getenv("REPORT_UPLOAD_WORKERS", "2"))
+_upload_executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="upload")
+
+# "Stop"tan rapora geçen süre: aşama başına ölçüm ([TIMING] satırları)
+stage_timings = {}
+
+
+@contextmanager
+def stage(name):
+    """Aşamanın süresini ölç ve logla"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_timings[name] = elapsed
+        print(f"[TIMING] {name}: {elapsed:.2f}s", flush=True)
+
+
+def print_stage_timings(started_at: float):
+    """Toplam süre + aşama dökümü (started_at: time.perf_counter() değeri)"""
+    stages = ", ".join(f"{name}={elapsed:.2f}s" for name, elapsed in stage_timings.items())
+    print(f"[TIMING] Toplam {time.perf_counter() - started_at:.2f}s ({stages})", flush=True)
+
+
+def raporu_html_olarak_kaydet(rapor_metni, dosya_adi, meeting_title=None, task_id=None):
     """
     Rapor metnini HTML formatında kaydederek Türkçe karakter sorununu çözer.
     Gemini'dan gelen HTML formatını düzenli bir HTML dosyası olarak kaydeder.
@@ -232,6 +265,8 @@ def raporu_html_olarak_kaydet(rapor_metni, dosya_adi, meeting_title=None):
             f.write(html_content)
         
         print(f"✓ HTML raporu kaydedildi: {dosya_adi}")
+        # /latest-pdf ve /download-pdf dizini taramadan bulsun (data/report_registry.json)
+        register_report(dosya_adi, title=meeting_title, task_id=task_id)
         return dosya_adi
         
     except Exception as e:
@@ -292,11 +327,11 @@ def analyze_speaker_statistics(transcript_text, participant_names):
     print(f"[OK] {processed_lines} satır işlendi, {stats['total_speakers']} konuşmacı bulundu")
     return stats
 
-def load_participant_data():
+def load_participant_data(task_id=None):
     """Katılımcı bilgilerini güvenle yükle"""
     print("[LOAD] Katılımcı bilgisi yükleniyor...")
     
-    participants_file = "current_meeting_participants.json"
+    participants_file = str(meeting_file("current_meeting_participants.json", task_id))
     
     if not os.path.exists(participants_file):
         print(f"[WARN] {participants_file} bulunamadı")
@@ -349,10 +384,10 @@ def load_participant_data():
         print(f"[ERROR] Dosya okuma hatası: {e}")
         return [], 0, "read_error"
 
-def load_speaker_stats_json():
+def load_speaker_stats_json(task_id=None):
     """Vision monitor veya Worker'dan gelen konuşmacı istatistiklerini yükle"""
     print("[LOAD] Konuşmacı logları yükleniyor...")
-    stats_file = "speaker_activity_log.json"
+    stats_file = str(meeting_file("speaker_activity_log.json", task_id))
     
     if not os.path.exists(stats_file):
         print(f"[WARN] {stats_file} bulunamadı")
@@ -382,8 +417,11 @@ def load_speaker_stats_json():
                 if not data:
                     return processed_data
                     
-                # Zamana göre sırala
-                sorted_logs = sorted(data, key=lambda x: x.get('timestamp', 0))
+                # Zamana göre sıralı kayıtlar (recorder/server ile paylaşılan timeline indeksi)
+                sorted_logs = [
+                    {"timestamp": ts, "speakers": speakers}
+                    for ts, speakers in get_timeline(legacy_path=stats_file).entries()
+                ] or sorted(data, key=lambda x: x.get('timestamp', 0))
                 start_time = sorted_logs[0].get('timestamp')
                 end_time = sorted_logs[-1].get('timestamp')
                 total_duration_sec = end_time - start_time
@@ -469,32 +507,34 @@ def extract_names_from_transcript(transcript_text):
     print(f"[EXTRACT] {len(result)} isim bulundu")
     return result
 
-def get_meeting_title():
-    """bot_task.json'dan toplantı başlığını al"""
+def get_meeting_title(task_id=None):
+    """Görev kaydından (meeting_state: task_id / TASK_ID veya eski bot_task.json) toplantı başlığını al"""
     try:
-        task_file = Path("data/bot_task.json")
-        if task_file.exists():
-            task_data = json.loads(task_file.read_text(encoding="utf-8"))
-            title = task_data.get("title", "")
-            if title and title.strip():
-                return title.strip()
+        task_data = meeting(task_id).get("task") or {}
+        title = task_data.get("title", "")
+        if title and title.strip():
+            return title.strip()
     except Exception as e:
         print(f"[WARN] Toplantı başlığı okunamadı: {e}")
     return None
 
-def generate_meeting_report(transcript_text):
-    """Toplantı raporu oluştur - İYİLEŞTİRİLMİŞ"""
+def generate_meeting_report(transcript_text, task_id=None):
+    """
+    Toplantı raporu oluştur - İYİLEŞTİRİLMİŞ
+    task_id: toplantı (verilmezse TASK_ID); worker dışından (API) çağrılırken verilmeli
+    """
     print("\n" + "="*60)
     print("[RAPOR] Rapor oluşturma başladı")
     print("="*60)
     
     # 0. TOPLANTI BAŞLIĞINI AL
-    meeting_title = get_meeting_title()
+    meeting_title = get_meeting_title(task_id)
     if meeting_title:
         print(f"[INFO] Toplantı başlığı: {meeting_title}")
     
     # 1. KATILIMCI BİLGİSİNİ YÜKLE
-    participant_names, participant_count, data_source = load_participant_data()
+    with stage("participants"):
+        participant_names, participant_count, data_source = load_participant_data(task_id)
     
     # 2. FALLBACK: Transkriptten isim çıkar
     if participant_count == 0:
@@ -521,7 +561,7 @@ def generate_meeting_report(transcript_text):
     data_source_note = source_notes.get(data_source, "Bilinmeyen veri kaynağı")
     
     # 4.1 VISION MONITOR VERİSİNİ YÜKLE (YENİ)
-    vision_stats = load_speaker_stats_json()
+    vision_stats = load_speaker_stats_json(task_id)
     vision_context = ""
     
     if vision_stats and vision_stats.get('statistics'):
@@ -649,7 +689,9 @@ SEN: Sen yüksek düzeyde profesyonel bir toplantı analisti ve formatlama uzman
             }
         ]
         
-        response = model.generate_content(FINAL_PROMPT, safety_settings=safety_settings)
+        # Ortak Gemini limiter'dan kapasite ayırarak gönder (API/worker çağrılarıyla yarışmasın)
+        with stage("gemini"):
+            response = limited_generate(model, FINAL_PROMPT, label="report", safety_settings=safety_settings)
         rapor_metni = response.text or "Rapor oluşturulamadı."
         
         # Markdown clean up (```html ... ``` temizle)
@@ -690,7 +732,8 @@ SEN: Sen yüksek düzeyde profesyonel bir toplantı analisti ve formatlama uzman
     
     html_path = str(temp_dir / f"Toplanti_Raporu_{timestamp}_{unique_id}.html")
     
-    result_path = raporu_html_olarak_kaydet(rapor_metni, html_path, meeting_title)
+    with stage("render"):
+        result_path = raporu_html_olarak_kaydet(rapor_metni, html_path, meeting_title, task_id)
     
     if result_path and Path(result_path).exists():
         file_size = os.path.getsize(result_path) / 1024
@@ -699,9 +742,11 @@ SEN: Sen yüksek düzeyde profesyonel bir toplantı analisti ve formatlama uzman
         # --- SUPABASE UPLOAD ---
         try:
             print("[UPLOAD] Rapor Supabase'e yükleniyor...")
-            public_url = upload_file("reports", result_path)
+            with stage("report_upload"):
+                public_url = upload_file("reports", result_path)
             if public_url:
                 print(f"[Cloud] Rapor URL: {public_url}")
+                report_registry.set_url(result_path, public_url)
                 return result_path, public_url  # URL'i de döndür
         except Exception as e:
             print(f"[WARN] Upload hatası: {e}")
@@ -712,18 +757,76 @@ SEN: Sen yüksek düzeyde profesyonel bir toplantı analisti ve formatlama uzman
         print("[ERROR] HTML dosyası oluşturulamadı!")
         return None, None
 
-def save_to_supabase(html_report_path, html_report_url, transcript_text):
+class TranscriptUpload:
+    """Arka planda süren transkript yüklemesi (start_transcript_upload)"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.future = _upload_executor.submit(self._upload)
+
+    def _upload(self):
+        with stage("transcript_upload"):
+            return upload_file("transcripts", str(self.path))
+
+    def result(self):
+        """Public URL (yükleme bitene kadar bekler)"""
+        return self.future.result()
+
+    def discard(self):
+        """
+        Rapor oluşmadı / DB kaydı yapılmayacak: yükleme başlamadıysa iptal et,
+        bittiyse storage'dan sil (hiçbir toplantıya bağlı olmayan nesne kalmasın)
+        """
+        if self.future.cancel():
+            print("[UPLOAD] Transkript yüklemesi iptal edildi (rapor yok)")
+            return
+        try:
+            url = self.future.result()
+        except Exception:
+            url = None
+        if url:
+            delete_file("transcripts", self.path.name)
+
+
+def start_transcript_upload(transcript_text, task_id=None):
+    """
+    Transkripti diske yazıp yüklemeyi arka planda başlatır; rapor (Gemini +
+    HTML + rapor upload) üretilirken yükleme sürer. TranscriptUpload döner;
+    görev kaydı / kullanıcı yoksa (DB kaydı yapılmayacak) None. Rapor
+    oluşmazsa çağıran discard() ile yüklemeyi geri almalıdır.
+    """
+    try:
+        task_data = meeting(task_id).get("task") or {}
+        if not task_data.get("user_id"):
+            return None
+        # Benzersiz dosya adı oluştur (timestamp + UUID) - Her toplantı için farklı dosya
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        unique_id = uuid.uuid4().hex[:8]  # 8 karakter kısa UUID
+        t_path = Path(f"temp_reports/transcript_{timestamp}_{unique_id}.txt")
+        t_path.parent.mkdir(exist_ok=True)
+        t_path.write_text(transcript_text, encoding="utf-8")
+
+        print("[UPLOAD] Transkript yükleniyor (arka planda)...")
+        return TranscriptUpload(t_path)
+    except Exception as e:
+        print(f"[WARN] Transkript upload başlatılamadı: {e}")
+        return None
+
+
+def save_to_supabase(html_report_path, html_report_url, transcript_text, transcript_upload=None, task_id=None):
     """
     Rapor ve transkripti Supabase'e kaydeder.
-    bot_task.json'dan toplantı bilgilerini okur.
+    Toplantı bilgilerini görev kaydından (meeting_state) okur.
+    transcript_upload: start_transcript_upload()'ın sonucu (verilmezse burada başlatılır);
+    DB kaydı iki URL de hazır olur olmaz eklenir.
+    task_id: toplantı (verilmezse TASK_ID)
     """
     try:
-        task_file = Path("data/bot_task.json")
-        if not task_file.exists():
-            print("[WARN] bot_task.json bulunamadı, DB kaydı yapılamıyor.")
+        task_data = meeting(task_id).get("task")
+        if not task_data:
+            print("[WARN] Görev kaydı (bot_task) bulunamadı, DB kaydı yapılamıyor.")
             return
 
-        task_data = json.loads(task_file.read_text(encoding="utf-8"))
         user_id = task_data.get("user_id")
         
         if not user_id:
@@ -732,18 +835,12 @@ def save_to_supabase(html_report_path, html_report_url, transcript_text):
 
         print(f"[DB] Kayıt başlıyor... User: {user_id}")
 
-        # 1. Transkripti yükle
+        # 1. Transkript yüklemesinin bitmesini bekle
         transcript_url = None
         try:
-            # Benzersiz dosya adı oluştur (timestamp + UUID) - Her toplantı için farklı dosya
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            unique_id = uuid.uuid4().hex[:8]  # 8 karakter kısa UUID
-            t_path = Path(f"temp_reports/transcript_{timestamp}_{unique_id}.txt")
-            t_path.parent.mkdir(exist_ok=True)
-            t_path.write_text(transcript_text, encoding="utf-8")
-            
-            print("[UPLOAD] Transkript yükleniyor...")
-            transcript_url = upload_file("transcripts", str(t_path))
+            transcript_upload = transcript_upload or start_transcript_upload(transcript_text, task_id)
+            if transcript_upload is not None:
+                transcript_url = transcript_upload.result()
             if transcript_url:
                 print(f"[Cloud] Transkript URL: {transcript_url}")
         except Exception as e:
@@ -755,16 +852,17 @@ def save_to_supabase(html_report_path, html_report_url, transcript_text):
         duration_min = len(transcript_text) // 1000  # Çok kaba taslak
         duration_str = f"{duration_min} dk" if duration_min > 0 else "1 dk"
 
-        success = save_meeting_record(
-            user_id=user_id,
-            title=task_data.get("title", "İsimsiz Toplantı"),
-            platform=task_data.get("platform", "Zoom"),
-            start_time=datetime.datetime.utcnow().isoformat(), # UTC olarak kaydet
-            duration=duration_str,
-            transcript_url=transcript_url,
-            report_url=html_report_url,
-            summary_text="Otomatik oluşturulan toplantı raporu." # İleride AI özeti buraya gelebilir
-        )
+        with stage("db_insert"):
+            success = save_meeting_record(
+                user_id=user_id,
+                title=task_data.get("title", "İsimsiz Toplantı"),
+                platform=task_data.get("platform", "Zoom"),
+                start_time=datetime.datetime.utcnow().isoformat(), # UTC olarak kaydet
+                duration=duration_str,
+                transcript_url=transcript_url,
+                report_url=html_report_url,
+                summary_text="Otomatik oluşturulan toplantı raporu." # İleride AI özeti buraya gelebilir
+            )
         
         if success:
             print("[SUCCESS] Toplantı veritabanına başarıyla kaydedildi!")
@@ -786,19 +884,30 @@ def save_to_supabase(html_report_path, html_report_url, transcript_text):
 if __name__ == "__main__":
     print("[MAIN] Rapor oluşturma başlatılıyor...", flush=True)
     
-    transcript_file = Path("latest_transcript.txt")
-    if not transcript_file.exists():
-        print("[ERROR] latest_transcript.txt bulunamadı!", flush=True)
+    # Segment kayıtlarından (transcript_segments.jsonl) veya eski latest_transcript.txt'den
+    text = load_transcript()
+    if not text:
+        print("[ERROR] Transkript bulunamadı (transcript_segments.jsonl / latest_transcript.txt)!", flush=True)
     else:
-        text = transcript_file.read_text(encoding="utf-8")
         if not text.strip():
             print("[ERROR] Transkript dosyası boş!", flush=True)
         else:
             print(f"[INFO] Transkript yüklendi ({len(text)} karakter). Rapor üretiliyor...", flush=True)
+            started_at = time.perf_counter()
             
-            # 1. Raporu oluştur
-            report_path, report_url = generate_meeting_report(text)
+            # 1. Transkript yüklemesini başlat (rapor üretilirken paralel yürür)
+            transcript_upload = start_transcript_upload(text)
+
+            # 2. Raporu oluştur (Gemini + HTML + rapor upload)
+            report_path, report_url = None, None
+            try:
+                report_path, report_url = generate_meeting_report(text)
+            finally:
+                # Rapor yoksa DB kaydı da yok: transkript sahipsiz kalmasın
+                if transcript_upload and not (report_path and report_url):
+                    transcript_upload.discard()
             
-            # 2. Veritabanına kaydet (Eğer rapor başarılıysa)
+            # 3. Veritabanına kaydet (Eğer rapor başarılıysa; transkript URL'i hazır olunca)
             if report_path and report_url:
-                save_to_supabase(report_path, report_url, text)
\ No newline at end of file
+                save_to_supabase(report_path, report_url, text, transcript_upload)
+            print_stage_timings(started_at)
\ No newline at end of file
@@ -0,0 +1,232 @@
+"""
+Report Registry
+===============
+Oluşturulan raporların indeksi (data/report_registry.json). /latest-pdf ve
+/download-pdf her yoklamada temp_reports'u glob'layıp her dosyayı stat
+etmek yerine buradan okur.
+
+- Rapor yazıldığında (rapor.raporu_html_olarak_kaydet) kayıt eklenir,
+  Supabase'e yüklenince URL'i işlenir.
+- Kayıtlar kapsamlara göre indekslenir: tümü, kullanıcı (user_id) veya
+  kullanıcısız (misafir), toplantı görevi (task_id). "Bu kullanıcının son
+  raporu" = kapsam listesinin sonu.
+- Dosya data/ altında olduğu için worker process'leri yazar, API okur;
+  API sadece dosya imzası (mtime/boyut) değişince yeniden yükler.
+- Registry dosyası yoksa (eski kurulum) temp_reports bir kez taranıp
+  mevcut raporlar kaydedilir.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from meeting_state import meeting
+from workspace import SHARED_DATA_DIR, get_task_id
+
+try:
+    import fcntl  # Process'ler arası kilit (Windows'ta yok)
+except ImportError:
+    fcntl = None
+
+REGISTRY_FILE = SHARED_DATA_DIR / "report_registry.json"
+REPORTS_DIR = Path("temp_reports")
+REPORT_PATTERN = "Toplanti_Raporu_*"
+MAX_ENTRIES = 500
+
+
+def _scopes(entry: dict) -> list:
+    scopes = ["all"]
+    if entry.get("user_id"):
+        scopes.append(f"user:{entry['user_id']}")
+    else:
+        scopes.append("guest")
+    if entry.get("task_id"):
+        scopes.append(f"task:{entry['task_id']}")
+    return scopes
+
+
+class ReportRegistry:
+    """Rapor kayıtları + kapsam bazlı "en son rapor" indeksi"""
+
+    def __init__(self, path=REGISTRY_FILE, reports_dir=REPORTS_DIR):
+        self.path = Path(path)
+        self.reports_dir = Path(reports_dir)
+        self._lock = threading.RLock()
+        self._entries = {}   # rapor yolu → kayıt
+        self._index = {}     # kapsam → [rapor yolu, ...] (eskiden yeniye)
+        self._sig = None
+        self._bootstrapped = False
+
+    # --------------------------------------------------------
+    # Yükleme / kaydetme
+    # --------------------------------------------------------
+    def _signature(self):
+        try:
+            st = self.path.stat()
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _rebuild(self, entries: list):
+        entries = sorted(entries, key=lambda e: e.get("created", 0))[-MAX_ENTRIES:]
+        self._entries = {e["path"]: e for e in entries}
+        self._index = {}
+        for entry in entries:
+            for scope in _scopes(entry):
+                self._index.setdefault(scope, []).append(entry["path"])
+
+    def _reload(self):
+        """Dosya başka process tarafından değiştiyse yeniden yükle"""
+        sig = self._signature()
+        if sig is None:
+            if not self._bootstrapped:
+                self._bootstrapped = True
+                self._bootstrap()
+            return
+        if sig == self._sig:
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self._rebuild([e for e in data.get("reports", []) if e.get("path")])
+        except (OSError, ValueError) as e:
+            print(f"[REPORTS] Registry okunamadı: {e}")
+            return
+        self._sig = sig
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"reports": list(self._entries.values())}, ensure_ascii=False, indent=1),
+                       encoding="utf-8")
+        tmp.replace(self.path)
+        self._sig = self._signature()
+
+    @contextmanager
+    def _file_lock(self):
+        """Oku-değiştir-yaz sırasında diğer process'ler beklesin"""
+        if fcntl is None:
+            yield
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_suffix(".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _bootstrap(self):
+        """Registry öncesi raporlar: temp_reports'u bir kez tara"""
+        try:
+            files = [f for f in self.reports_dir.glob(REPORT_PATTERN) if f.suffix in (".pdf", ".html")]
+        except OSError:
+            return
+        if not files:
+            return
+        entries = []
+        for f in files:
+            try:
+                entries.append(self._make_entry(f, created=f.stat().st_mtime))
+            except OSError:
+                continue
+        self._rebuild(entries)
+        try:
+            self._save()
+            print(f"[REPORTS] {len(entries)} mevcut rapor registry'ye eklendi")
+        except OSError as e:
+            print(f"[REPORTS] Registry yazılamadı: {e}")
+
+    # --------------------------------------------------------
+    # Yazma
+    # --------------------------------------------------------
+    @staticmethod
+    def _make_entry(path, url=None, user_id=None, task_id=None, title=None, created=None) -> dict:
+        path = Path(path)
+        return {
+            "path": str(path),
+            "name": path.name,
+            "type": "html" if path.suffix == ".html" else "pdf",
+            "url": url,
+            "user_id": user_id or None,
+            "task_id": task_id or None,
+            "title": title,
+            "created": created or time.time(),
+        }
+
+    def register(self, path, url=None, user_id=None, task_id=None, title=None) -> dict:
+        """Yeni raporu kaydet (aynı yol tekrar kaydedilirse güncellenir)"""
+        entry = self._make_entry(path, url, user_id, task_id, title)
+        with self._lock, self._file_lock():
+            self._sig = None  # Kilit altında diskteki son hali oku
+            self._reload()
+            entries = [e for e in self._entries.values() if e["path"] != entry["path"]]
+            entries.append(entry)
+            self._rebuild(entries)
+            self._save()
+        return entry
+
+    def set_url(self, path, url: str):
+        """Supabase upload'ı bitince raporun public URL'i"""
+        try:
+            with self._lock, self._file_lock():
+                self._sig = None
+                self._reload()
+                entry = self._entries.get(str(Path(path)))
+                if entry is None or entry.get("url") == url:
+                    return
+                entry["url"] = url
+                self._save()
+        except OSError as e:
+            print(f"[REPORTS] Rapor URL'i kaydedilemedi: {e}")
+
+    # --------------------------------------------------------
+    # Okuma
+    # --------------------------------------------------------
+    def latest(self, user_id: str = None, task_id: str = None, guest: bool = False):
+        """
+        Kapsamdaki en son rapor: task_id verilirse o toplantının, yoksa user_id
+        verilirse o kullanıcının, guest=True ise kullanıcısız raporların, hiçbiri
+        yoksa herhangi birinin. Dosyası silinmiş ve URL'i olmayan kayıtlar atlanır.
+        """
+        scope = (f"task:{task_id}" if task_id else f"user:{user_id}" if user_id
+                 else "guest" if guest else "all")
+        with self._lock:
+            self._reload()
+            paths = self._index.get(scope, [])
+            while paths:
+                entry = self._entries[paths[-1]]
+                local = Path(entry["path"]).exists()
+                if local or entry.get("url"):
+                    return {**entry, "local": local}
+                paths.pop()  # Dosyası silinmiş: sonraki yoklamalarda tekrar bakılmasın
+        return None
+
+    def __len__(self):
+        with self._lock:
+            self._reload()
+            return len(self._entries)
+
+
+registry = ReportRegistry()
+
+
+def register_report(path, url=None, title=None, task_id=None) -> dict:
+    """
+    Worker / rapor tarafı: raporu görevin (meeting_state "task") kullanıcısına kaydet.
+    task_id verilmezse TASK_ID (worker); API'den (force-reset) açıkça verilir.
+    """
+    task_id = task_id or get_task_id()
+    task_data = meeting(task_id).get("task") or {}
+    try:
+        return registry.register(
+            path, url=url,
+            user_id=task_data.get("user_id"),
+            task_id=task_id or task_data.get("task_id"),
+            title=title or task_data.get("title"),
+        )
+    except OSError as e:
+        print(f"[REPORTS] Rapor kaydedilemedi: {e}")
+        return None
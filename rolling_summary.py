@@ -0,0 +1,167 @@
+"""
+Rolling Summary
+===============
+Ara özet (/summary, bot "summary" komutu) için artımlı map-reduce özetleyici.
+Her tıklamada transkriptin sadece son 12-15 bin karakterini Gemini'ye
+göndermek uzun toplantılarda baştaki kısmı yok sayıyor ve aynı token'ları
+tekrar tekrar ödetiyordu.
+
+- Transkript segment sınırlarından (boş satır) SUMMARY_WINDOW_CHARS'lık
+  pencerelere bölünür. Dolan (kapanmış) her pencere bir kez özetlenir
+  (map); özet, pencere metninin hash'i ile transcript_cache'e yazılır.
+- Kapanmış pencere sayısı SUMMARY_GROUP_SIZE'ı geçince tam gruplar tek bir
+  özet halinde birleştirilir (reduce, yine önbellekli) → son istem boyutu
+  toplantı uzadıkça büyümez.
+- Özet isteği: önbellekteki bölüm özetleri + sadece henüz kapanmamış son
+  pencerenin ham metni (delta). Tıklama başına tek yeni Gemini çağrısı.
+- Segment eklendikçe yeni kapanan pencereler arka planda önceden özetlenir
+  (ROLLING_SUMMARY_PREFETCH=0 ile kapatılabilir).
+
+Araya geç gelen segment girerse sonraki pencerelerin metni değiştiği için
+onlar yeniden özetlenir; önceki pencereler önbellekten gelir.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import transcript_cache
+from gemini_limiter import limited_generate
+from lazy_imports import genai
+
+MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+SUMMARY_WINDOW_CHARS = int(os.getenv("SUMMARY_WINDOW_CHARS", "12000"))
+SUMMARY_GROUP_SIZE = int(os.getenv("SUMMARY_GROUP_SIZE", "8"))
+SUMMARY_MAP_WORKERS = 3
+ROLLING_SUMMARY_PREFETCH = os.getenv("ROLLING_SUMMARY_PREFETCH", "1") == "1"
+SEPARATOR = "\n\n"
+
+MAP_PROMPT = """Aşağıda bir toplantı transkriptinin bir bölümü var. Bu bölümü Türkçe,
+kısa maddeler halinde özetle. Konuşmacı isimlerini, konuşulan başlıkları,
+alınan kararları ve aksiyonları (kim ne yapacak) mutlaka koru; yorum ekleme.
+
+Transkript bölümü:
+
+"""
+
+MERGE_PROMPT = """Aşağıda bir toplantının ardışık bölümlerinin özetleri var (kronolojik).
+Bunları tek bir kısa özet halinde birleştir: tekrarları çıkar, konuşmacı
+isimlerini, kararları ve aksiyonları koru. Maddeler halinde, Türkçe yaz.
+
+Bölüm özetleri:
+
+"""
+
+_locks = {}
+_locks_guard = threading.Lock()
+_prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary")
+_prefetch_state = {"length": 0, "pending": False}
+
+
+def _key_lock(key: str) -> threading.Lock:
+    """Aynı pencere için eşzamanlı iki Gemini çağrısı yapılmasın (prefetch + tıklama)"""
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def _split_long(block: str) -> list:
+    """Tek başına pencereden uzun blok (ör. /transcribe çıktısı): boşluktan böl"""
+    pieces = []
+    while len(block) > SUMMARY_WINDOW_CHARS:
+        cut = block.rfind(" ", 0, SUMMARY_WINDOW_CHARS)
+        if cut <= 0:
+            cut = SUMMARY_WINDOW_CHARS
+        pieces.append(block[:cut])
+        block = block[cut:].lstrip()
+    if block:
+        pieces.append(block)
+    return pieces
+
+
+def split_windows(text: str):
+    """Transkripti (kapanmış pencereler, son açık pencere metni) olarak böl"""
+    closed, current, size = [], [], 0
+    for block in text.split(SEPARATOR):
+        if not block.strip():
+            continue
+        for piece in _split_long(block):
+            current.append(piece)
+            size += len(piece) + len(SEPARATOR)
+            if size >= SUMMARY_WINDOW_CHARS:
+                closed.append(SEPARATOR.join(current))
+                current, size = [], 0
+    return closed, SEPARATOR.join(current)
+
+
+def _summarize(prompt: str, text: str, label: str) -> str:
+    """Önbellekli tek özet çağrısı (anahtar: metin hash'i + model + prompt)"""
+    key = transcript_cache.make_key(transcript_cache.audio_hash(text.encode("utf-8")), MODEL_NAME, prompt)
+    with _key_lock(key):
+        cached = transcript_cache.get(key)
+        if cached is not None:
+            return cached
+        model = genai.GenerativeModel(MODEL_NAME)
+        resp = limited_generate(model, prompt + text, label=label)
+        summary = (resp.text or "").strip()
+        transcript_cache.put(key, summary)
+        return summary
+
+
+def _partials(closed: list, label: str) -> list:
+    """Kapanmış pencerelerin özetleri: [(başlık, özet), ...] (tam gruplar birleştirilmiş)"""
+    if not closed:
+        return []
+    with ThreadPoolExecutor(max_workers=SUMMARY_MAP_WORKERS) as pool:
+        summaries = list(pool.map(lambda w: _summarize(MAP_PROMPT, w, f"{label}-map"), closed))
+
+    parts = []
+    full = len(summaries) - len(summaries) % SUMMARY_GROUP_SIZE if len(summaries) > SUMMARY_GROUP_SIZE else 0
+    for start in range(0, full, SUMMARY_GROUP_SIZE):
+        group = summaries[start:start + SUMMARY_GROUP_SIZE]
+        joined = SEPARATOR.join(f"[Bölüm {start + i + 1}]\n{s}" for i, s in enumerate(group))
+        parts.append((f"Bölüm {start + 1}-{start + len(group)}",
+                      _summarize(MERGE_PROMPT, joined, f"{label}-merge")))
+    for i in range(full, len(summaries)):
+        parts.append((f"Bölüm {i + 1}", summaries[i]))
+    return parts
+
+
+def summary_context(text: str, label: str = "summary") -> str:
+    """
+    Özet istemine transkript yerine konacak metin: önceki bölümlerin
+    (önbellekli) özetleri + son açık pencerenin ham metni.
+    """
+    closed, delta = split_windows(text)
+    parts = _partials(closed, label)
+    if not parts:
+        return delta
+
+    sections = ["Önceki bölümlerin özetleri (kronolojik):\n\n"
+                + SEPARATOR.join(f"[{title}]\n{summary}" for title, summary in parts)]
+    if delta.strip():
+        sections.append("Son bölümün transkripti (henüz özetlenmedi):\n\n" + delta)
+    return "\n\n---\n\n".join(sections)
+
+
+def _prefetch(text: str):
+    try:
+        closed, _ = split_windows(text)
+        _partials(closed, "summary-prefetch")
+    except Exception as e:
+        print(f"[SUMMARY] Ön özetleme hatası: {e}")
+    finally:
+        _prefetch_state["pending"] = False
+
+
+def schedule_prefetch(text: str):
+    """Yeni segment eklendi: yeni bir pencere kapanmış olabilir → arka planda özetle"""
+    if not ROLLING_SUMMARY_PREFETCH:
+        return
+    with _locks_guard:
+        if len(text) < _prefetch_state["length"]:
+            _prefetch_state["length"] = 0  # Yeni toplantı
+        if _prefetch_state["pending"] or len(text) - _prefetch_state["length"] < SUMMARY_WINDOW_CHARS:
+            return
+        _prefetch_state["length"] = len(text)
+        _prefetch_state["pending"] = True
+    _prefetch_executor.submit(_prefetch, text)
@@ -6,32 +6,48 @@ import tempfile
 import base64
 import json
 import time
+import asyncio
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from fastapi.staticfiles import StaticFiles
-from fastapi import FastAPI, UploadFile, File, Query, Body, Form, Request
+from fastapi import FastAPI, UploadFile, File, Query, Body, Form, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse, Response
-from fastapi.templating import Jinja2Templates
-from db_utils import upload_file, save_meeting_record, delete_user_account
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
+from db_utils import upload_file, save_meeting_record, adelete_user_account, get_async_client
+from webm_meta import read_webm_info, WebMStreamSplitter
+from speaker_timeline import get_timeline
+from workspace import data_file, meeting_file
+from meeting_state import MeetingState, meeting, active_meetings, state_version
+import transcript_cache
+from transcript_store import get_store as get_transcript_store, load_transcript, SEGMENTS_FILE
+from live_events import hub as event_hub, format_sse
+import proxy_cache
+import rolling_summary
+from report_registry import registry as report_registry, REGISTRY_FILE
+from gemini_limiter import (
+    gemini_limiter, limited_generate, estimate_tokens, retry_after_seconds,
+    GeminiQuotaExceeded, GeminiLimitTimeout
+)
 from starlette.middleware.base import BaseHTTPMiddleware
-import google.generativeai as genai
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
-import uvicorn
+# Ağır kütüphaneler (Gemini, Jinja, Celery, rapor) ilk kullanımda yüklenir: lazy_imports.py
+from lazy_imports import Lazy, genai, genai_types
 import logging
-from rapor import generate_meeting_report, save_to_supabase
 from urllib.parse import urlparse, parse_qs
 import re
 from dotenv import load_dotenv
 
-# Celery task queue
-from tasks import process_meeting
-
 load_dotenv(override=True)
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-templates = Jinja2Templates(directory="web_arayuz")
+def _create_templates():
+    from fastapi.templating import Jinja2Templates
+    return Jinja2Templates(directory="web_arayuz")
+
+templates = Lazy(_create_templates, "templates")
 
 
 def clean_transcript(text: str) -> str:
@@ -55,10 +71,16 @@ load_dotenv(override=True)
 API_KEY = os.getenv("GEMINI_API_KEY")
 if not API_KEY:
     print("[WARN] GEMINI_API_KEY bulunamadı! Transkripsiyon devre dışı.")
-else:
-    genai.configure(api_key=API_KEY, transport="rest")
+# genai.configure ilk Gemini çağrısında yapılır (lazy_imports._configure_genai)
 MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
 
+# Ses Gemini'ye nasıl gönderilir: "inline" (istek gövdesinde), "file" (Files API,
+# diskten akıtarak yükleme) veya "auto" (GEMINI_INLINE_MAX_MB'den büyükse file)
+GEMINI_AUDIO_TRANSPORT = os.getenv("GEMINI_AUDIO_TRANSPORT", "auto").lower()
+GEMINI_INLINE_MAX_MB = float(os.getenv("GEMINI_INLINE_MAX_MB", "2"))
+GEMINI_FILE_WAIT_SECONDS = 60
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 
 # Lifespan event handler (modern FastAPI pattern)
 from contextlib import asynccontextmanager
@@ -110,6 +132,7 @@ async def lifespan(app: FastAPI):
         
         cleanup_targets = [
             Path("latest_transcript.txt"),
+            Path(SEGMENTS_FILE),
             Path("live_transcript_cache.json"),
             Path("participants.json"),
             Path("speaker_activity_log.json")
@@ -133,17 +156,21 @@ async def lifespan(app: FastAPI):
         
     # Reset Worker Status (Ghost Bot önleme)
     try:
-        Path("data/worker_status.json").write_text(
-            json.dumps({"running": False, "recording": False, "status_message": "Sistem Hazır"}, ensure_ascii=False), 
-            encoding="utf-8"
-        )
+        MeetingState(None).set("status", {"running": False, "recording": False, "status_message": "Sistem Hazır"})
         print("[CLEANUP] Worker status sıfırlandı (data/worker_status.json)")
     except Exception: pass
     
+    # Canlı olaylar (/events): transkripsiyon thread'leri bu loop'a teslim eder
+    event_hub.attach_loop(asyncio.get_running_loop())
+    watcher = asyncio.create_task(status_watcher())
+
     yield  # Server çalışıyor
     
     # Shutdown (gerekirse buraya cleanup kodu eklenebilir)
     print("\n[SERVER] Kapatılıyor...")
+    watcher.cancel()
+    await proxy_cache.close_client()
+    transcribe_executor.shutdown(wait=False, cancel_futures=True)
 
 # FastAPI app'i lifespan ile oluştur
 app = FastAPI(
@@ -176,8 +203,8 @@ app.mount("/reports", StaticFiles(directory="temp_reports"), name="reports")
 
 # =========================================================
 # REPORT PROXY - Supabase HTML'i doğru Content-Type ile sun
+# (paylaşımlı HTTP client + LRU önbellek: proxy_cache.py)
 # =========================================================
-import httpx
 
 @app.get("/view-report")
 async def view_report(url: str = Query(..., description="Supabase report URL")):
@@ -190,22 +217,20 @@ async def view_report(url: str = Query(..., description="Supabase report URL")):
         if "supabase" not in url and "localhost" not in url:
             return Response(content="Geçersiz URL", status_code=400)
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=30.0)
-            
-        if response.status_code != 200:
-            return Response(content=f"Rapor yüklenemedi: {response.status_code}", status_code=response.status_code)
-        
         # HTML olarak döndür
-        return Response(
-            content=response.content,
-            media_type="text/html; charset=utf-8",
-            headers={"Content-Type": "text/html; charset=utf-8"}
-        )
+        return await proxy_cache.proxy_get(url, "text/html; charset=utf-8", label="Rapor")
         
     except Exception as e:
         return Response(content=f"Hata: {str(e)}", status_code=500)
 
+def _transcript_utf8(content: bytes) -> bytes:
+    """Metni UTF-8 olarak decode et; Supabase bazen Latin-1 olarak encode ediyor"""
+    try:
+        text = content.decode('utf-8')
+    except UnicodeDecodeError:
+        text = content.decode('latin-1')
+    return text.encode('utf-8')
+
 @app.get("/view-transcript")
 async def view_transcript(url: str = Query(..., description="Supabase transcript URL")):
     """
@@ -217,25 +242,9 @@ async def view_transcript(url: str = Query(..., description="Supabase transcript
         if "supabase" not in url and "localhost" not in url:
             return Response(content="Geçersiz URL", status_code=400)
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, timeout=30.0)
-            
-        if response.status_code != 200:
-            return Response(content=f"Transkript yüklenemedi: {response.status_code}", status_code=response.status_code)
-        
-        # Metni UTF-8 olarak decode et ve düzgün göster
-        # Supabase bazen Latin-1 olarak encode ediyor
-        try:
-            text = response.content.decode('utf-8')
-        except:
-            text = response.content.decode('latin-1')
-        
         # Plain text olarak döndür (UTF-8)
-        return Response(
-            content=text.encode('utf-8'),
-            media_type="text/plain; charset=utf-8",
-            headers={"Content-Type": "text/plain; charset=utf-8"}
-        )
+        return await proxy_cache.proxy_get(url, "text/plain; charset=utf-8", label="Transkript",
+                                           transform=_transcript_utf8)
         
     except Exception as e:
         return Response(content=f"Hata: {str(e)}", status_code=500)
@@ -339,18 +348,64 @@ def recompress_webm_for_gemini(src: Path, dst: Path, audio_bitrate="16k"):
     return True
 
 
-def transcribe_webm_segment(webm_path: Path, label: str, is_final: bool, speaker_hint: str = None, timeline_hint: str = None, platform: str = None):
+async def save_upload(upload: UploadFile, dest: Path) -> int:
+    """UploadFile'ı parça parça diske yaz (tamamı belleğe alınmaz); yazılan bayt sayısı"""
+    written = 0
+    with open(dest, "wb") as f:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            f.write(chunk)
+            written += len(chunk)
+    return written
+
+
+def prepare_audio_part(webm_path: Path, size: int = None):
+    """
+    Model isteğine eklenecek ses parçası ve (Files API kullanıldıysa) yüklenen dosya.
+
+    Küçük segmentler inline gider; büyükler Files API ile diskten akıtılarak
+    yüklenir, böylece API container'ı segmentin base64 kopyasını bellekte tutmaz.
+    """
+    size = webm_path.stat().st_size if size is None else size
+    use_file = GEMINI_AUDIO_TRANSPORT == "file" or (
+        GEMINI_AUDIO_TRANSPORT == "auto" and size > GEMINI_INLINE_MAX_MB * 1024 * 1024
+    )
+    if not use_file:
+        return {"mime_type": "audio/webm", "data": webm_path.read_bytes()}, None
+
+    print(f"[UPLOAD] Ses Files API ile yükleniyor ({size / 1024:.0f} KB)")
+    uploaded = genai.upload_file(path=str(webm_path), mime_type="audio/webm")
+    deadline = time.time() + GEMINI_FILE_WAIT_SECONDS
+    while getattr(uploaded.state, "name", "") == "PROCESSING" and time.time() < deadline:
+        time.sleep(1)
+        uploaded = genai.get_file(uploaded.name)
+    if getattr(uploaded.state, "name", "") == "FAILED":
+        release_audio_part(uploaded)
+        raise RuntimeError(f"Files API dosyayı işleyemedi: {uploaded.name}")
+    return uploaded, uploaded
+
+
+def release_audio_part(uploaded):
+    """Files API'ye yüklenen dosyayı sil (48 saat beklemesin)"""
+    if uploaded is None:
+        return
+    try:
+        genai.delete_file(uploaded.name)
+    except Exception as e:
+        print(f"[WARN] Yüklenen ses silinemedi ({uploaded.name}): {e}")
+
+
+def transcribe_webm_segment(webm_path: Path, label: str, is_final: bool, speaker_hint: str = None, timeline_hint: str = None, platform: str = None,
+                            task_id: str = None):
     """
     Tek bir WebM segmenti için konuşmacı tanımlı transkripsiyon
     (eski transcribe_wav ile aynı mantık, sadece mime_type değişti)
     """
-    with open(webm_path, "rb") as f:
-        webm_bytes = f.read()
+    webm_size = webm_path.stat().st_size
 
-    audio_b64 = base64.b64encode(webm_bytes).decode("utf-8")
-    audio_part = {"mime_type": "audio/webm", "data": audio_b64}
-
-    participants_file = Path("current_meeting_participants.json")
+    participants_file = meeting_file("current_meeting_participants.json", task_id)
     participant_names = []
 
     if participants_file.exists():
@@ -434,17 +489,47 @@ Bu bir Türkçe toplantı ses kaydıdır. Lütfen konuşmacı diarization (konu
 - Müzik veya gürültü varsa [MÜZİK] veya [GÜRÜLTÜ] yaz.
 """
 
+    # Aynı ses + aynı prompt daha önce transkribe edildiyse Gemini'ye gitme
+    cache_key = transcript_cache.make_key(transcript_cache.file_hash(webm_path), MODEL_NAME, prompt)
+    cached_text = transcript_cache.get(cache_key)
+    if cached_text is not None:
+        print(f"[CACHE] {label}: önbellekten döndü ({len(cached_text)} karakter)")
+        return cached_text
+
     model = genai.GenerativeModel(MODEL_NAME)
 
     max_retries = 5
     base_delay = 30  # saniye
 
+    # Ortak limiter için token tahmini (ses ~32 token/sn; 16 kbps ≈ 2 KB/sn)
+    audio_info = read_webm_info(webm_path)
+    audio_seconds = audio_info["duration"] if audio_info else webm_size / 2000
+    request_tokens = estimate_tokens(prompt, audio_seconds)
+
+    try:
+        audio_part, uploaded_file = prepare_audio_part(webm_path, webm_size)
+    except Exception as e:
+        print(f"[ERROR] Ses Gemini'ye yüklenemedi: {e}")
+        return f"[HATA] Transkripsiyon yapılamadı: {e}"
+
+    try:
+        return _generate_transcript(model, prompt, audio_part, request_tokens, label,
+                                    participant_names, cache_key, max_retries, base_delay)
+    finally:
+        release_audio_part(uploaded_file)
+
+
+def _generate_transcript(model, prompt, audio_part, request_tokens, label,
+                         participant_names, cache_key, max_retries, base_delay):
+    """transcribe_webm_segment'in retry döngüsü (yüklenen dosya her durumda silinsin diye ayrı)"""
     for attempt in range(max_retries):
         try:
+            # Göndermeden önce RPM/TPM/günlük kotadan yer ayır (API + worker'lar ortak)
+            gemini_limiter.acquire(request_tokens, label=label)
             resp = model.generate_content(
                 [prompt, audio_part],
                 safety_settings={
-                    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+                    genai_types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: genai_types.HarmBlockThreshold.BLOCK_NONE,
                 }
             )
 
@@ -473,6 +558,7 @@ Bu bir Türkçe toplantı ses kaydıdır. Lütfen konuşmacı diarization (konu
             # Çok kısa veya boş ise atla (minimum 2 karakter)
             if len(clean_text) < 2:
                 print(f"[INFO] Sessizlik/kısa içerik tespit edildi ({len(clean_text)} char) - Transkript oluşturulmadı.")
+                transcript_cache.put(cache_key, "")
                 return ""
             
             # Temizlenmiş metni kullan
@@ -485,8 +571,17 @@ Bu bir Türkçe toplantı ses kaydıdır. Lütfen konuşmacı diarization (konu
                     transcript_text = pattern.sub(name, transcript_text)
 
             print(f"[SUCCESS] Transkripsiyon başarılı (deneme {attempt + 1})")
+            transcript_cache.put(cache_key, transcript_text)
             return transcript_text
 
+        except GeminiLimitTimeout as e:
+            print(f"[ERROR] {e}")
+            return f"[HATA] Transkripsiyon yapılamadı: {e}"
+
+        except GeminiQuotaExceeded:
+            print("[CRITICAL] GÜNLÜK QUOTA DOLDU! (limiter)")
+            return "[HATA] Günlük API quota doldu. Yarın tekrar deneyin."
+
         except Exception as e:
             error_str = str(e)
 
@@ -506,11 +601,12 @@ Bu bir Türkçe toplantı ses kaydıdır. Lütfen konuşmacı diarization (konu
                 # Retry yok
                 return "[HATA] Günlük API quota doldu. Yarın tekrar deneyin."
 
-            # RPM (rate limit) için exponential backoff
+            # RPM (rate limit): bekleme limiter'a bildirilir, böylece diğer
+            # çağıranlar da (tüm process'ler) aynı süre yeni istek göndermez
             if "429" in error_str and attempt < max_retries - 1:
-                delay = base_delay * (2 ** attempt)  # 30→60→120→240
-                print(f"[QUOTA] Rate limit aşıldı, {delay}s bekleniyor...  (deneme {attempt+1}/{max_retries})")
-                time.sleep(delay)
+                delay = retry_after_seconds(e, base_delay * (2 ** attempt))  # ipucu yoksa 30→60→120→240
+                print(f"[QUOTA] Rate limit aşıldı, {delay:.0f}s bekleniyor...  (deneme {attempt+1}/{max_retries})")
+                gemini_limiter.penalize(delay)
                 continue
 
             # Diğer hatalar
@@ -606,11 +702,16 @@ async def transcribe_endpoint(audio: UploadFile = File(...)):
     with tempfile.TemporaryDirectory() as tmp:
         tmp = Path(tmp)
         webm = tmp / "x.webm"
-        webm.write_bytes(await audio.read())
+        await save_upload(audio, webm)
 
         text = transcribe_webm_segment(webm, "segment", True)
         text = clean_transcript(text)
-        Path("latest_transcript.txt").write_text(text, encoding="utf-8")
+        store = get_transcript_store()
+        store.reset()
+        event_hub.publish("transcript_reset", {"meeting": None})
+        store.append(text, source="transcribe")
+        store.export()
+        from rapor import generate_meeting_report
         html_path = generate_meeting_report(text)
         return {
             "ok": True,
@@ -624,65 +725,28 @@ async def transcribe_endpoint(audio: UploadFile = File(...)):
 # ZOOM BOT WebM → TRANSCRIBE (WAV YOK)
 # =========================================================
 
-def generate_timeline_hint(start_time: float, duration: float) -> str:
+def generate_timeline_hint(start_time: float, duration: float, task_id: str = None) -> str:
     """Speaker timeline'dan zaman çizelgesi oluşturur (JSONL ve JSON destekli)"""
     try:
-        data = []
-        
-        # ÖNCE speaker_timeline.jsonl'ı dene (JSONL format - Zoom/Teams için)
-        jsonl_path = Path("speaker_timeline.jsonl")
-        if jsonl_path.exists():
-            try:
-                lines = jsonl_path.read_text(encoding="utf-8").strip().split("\n")
-                for line in lines:
-                    if line.strip():
-                        try:
-                            entry = json.loads(line)
-                            # JSONL formatında 'ts' kullanıyoruz
-                            if "ts" in entry:
-                                data.append({
-                                    "timestamp": entry["ts"],
-                                    "speakers": entry.get("speakers", [])
-                                })
-                        except: pass
-                print(f"[TIMELINE] {len(data)} satır speaker_timeline.jsonl'dan okundu")
-            except Exception as e:
-                print(f"[WARN] JSONL okuma hatası: {e}")
-        
-        # Eğer JSONL boşsa, speaker_activity_log.json'ı dene (legacy)
-        if not data:
-            log_path = Path("speaker_activity_log.json")
-            if log_path.exists():
-                try:
-                    json_data = json.loads(log_path.read_text(encoding="utf-8"))
-                    if isinstance(json_data, list):
-                        data = json_data
-                        print(f"[TIMELINE] {len(data)} satır speaker_activity_log.json'dan okundu")
-                except: pass
-        
-        if not data:
+        # speaker_timeline.jsonl (yoksa legacy speaker_activity_log.json) indeksi:
+        # sadece yeni satırlar okunur, aralık bisect ile bulunur
+        entries = get_timeline(task_id=task_id).between(start_time, start_time + duration)
+        if not entries:
             return None
-            
-        end_time = start_time + duration
+
         relevant_logs = []
         last_speakers = None
-        
-        for entry in data:
-            t = entry.get("timestamp", 0)
-            
-            # Sadece bu segmentin zaman aralığındaki loglar
-            if start_time <= t <= end_time:
-                speakers = entry.get("speakers", [])
-                
-                # Sadece konuşmacı değiştiyse listeye ekle (Dedup)
-                if speakers and speakers != last_speakers:
-                    rel_seconds = int(t - start_time)
-                    if rel_seconds < 0: rel_seconds = 0
-                    
-                    m, s = divmod(rel_seconds, 60)
-                    time_str = f"{m:02d}:{s:02d}"
-                    relevant_logs.append(f"- {time_str}: {', '.join(speakers)}")
-                    last_speakers = speakers
+
+        for t, speakers in entries:
+            # Sadece konuşmacı değiştiyse listeye ekle (Dedup)
+            if speakers and speakers != last_speakers:
+                rel_seconds = int(t - start_time)
+                if rel_seconds < 0: rel_seconds = 0
+
+                m, s = divmod(rel_seconds, 60)
+                time_str = f"{m:02d}:{s:02d}"
+                relevant_logs.append(f"- {time_str}: {', '.join(speakers)}")
+                last_speakers = speakers
         
         if not relevant_logs:
             return None
@@ -694,209 +758,531 @@ def generate_timeline_hint(start_time: float, duration: float) -> str:
         print(f"[WARN] Timeline hint hatası: {e}")
         return None
 
-@app.post("/transcribe-webm")
-async def transcribe_webm_endpoint(
-    audio: UploadFile = File(...),
-    speaker_name: str = Form(None),  # Legacy fallback
-    start_time: str = Form(None),    # Yeni timestamp from recorder
-    duration: str = Form(None),
-    platform: str = Form(None)       # Platform: meet, zoom, teams
-):
+def process_webm_file(webm: Path, speaker_name: str = None, start_time: str = None,
+                      duration: str = None, platform: str = None,
+                      seq: int = None, recording_id: str = None, task_id: str = None) -> dict:
     """
-    WebM/Opus dosyasını transkribe et (direkt WebM üzerinden)
+    Diskteki WebM segmentini transkribe edip transkript deposuna ekler.
+    /transcribe-webm (dosya upload) ve /stream-audio (WebSocket) ortak yolu.
+    task_id verilirse segment o toplantının deposuna yazılır (yoksa eski tek depo).
+
+    Aynı ses (recorder retry'ı, tekrar gönderilen segment) ikinci kez gelirse
+    transkripte tekrar eklenmez; eşzamanlı kopyalar sırayla işlenir.
+    seq verilmişse metin üretmeyen sonuçlar da (sessizlik, tekrar, hata)
+    depoya "atlandı" olarak yazılır; böylece sıralama watermark'ı ilerler.
     """
+    audio_sha = transcript_cache.file_hash(webm)
+    with transcript_cache.audio_lock(audio_sha):
+        # İşaret toplantının deposunda: depo sıfırlanınca / başka toplantıda geçerli değil
+        if get_transcript_store(task_id=task_id).has_audio(audio_sha):
+            print(f"[CACHE] Bu ses zaten transkripte eklendi ({audio_sha[:12]}) - EKLENMEDİ.")
+            result = {
+                "ok": True,
+                "transcript": load_transcript(task_id=task_id),
+                "info": "Duplicate audio skipped"
+            }
+        else:
+            result = _transcribe_and_append(webm, speaker_name, start_time, duration, platform,
+                                            seq, recording_id, task_id, audio_sha)
+
+    if seq is not None and not result.get("segment_length"):
+        get_transcript_store(task_id=task_id).mark_skipped(seq, recording_id, result.get("info") or result.get("error"))
+    return result
+
+
+def _transcribe_and_append(webm: Path, speaker_name: str = None, start_time: str = None,
+                           duration: str = None, platform: str = None,
+                           seq: int = None, recording_id: str = None, task_id: str = None,
+                           audio_sha: str = None) -> dict:
+    file_size_mb = webm.stat().st_size / (1024 * 1024)
+    print(f"[OK] WebM dosyası alındı: {file_size_mb:.2f} MB")
+
+    # Süre gelmediyse WebM metadata'sından oku (ffprobe subprocess'i yok)
+    webm_info = read_webm_info(webm)
+    if webm_info:
+        print(f"[INFO] WebM: {webm_info['duration']:.1f}s, {webm_info['packets']} paket, codec={webm_info['codec']}")
+        if not duration:
+            duration = str(webm_info["duration"])
+
+    if file_size_mb < 0.01:
+        print("[ERROR] Dosya çok küçük!")
+        return {
+            "ok": False,
+            "error": "WebM dosyası çok küçük (< 0.01 MB)"
+        }
+
     print("\n" + "="*60)
-    print(f"[API] /transcribe-webm endpoint çağrıldı. Speaker: {speaker_name}")
+    print("[STEP 1/2] TRANSKRİPSİYON BAŞLIYOR (WEBM)")
     print("="*60)
 
-    try:
-        with tempfile.TemporaryDirectory() as tmp:
-            tmp = Path(tmp)
-            webm = tmp / "zoom.webm"
+    # BYPASS: Recorder already encodes at 16k CBR, no need to recompress
+    # (Recompression saves only ~80KB but wastes CPU)
+    webm_for_model = webm
+    print("[INFO] Using original WebM (recorder already optimized at 16k CBR)")
+
+    # 2) Transkripsiyon
+    transcript_start = time.time()
+    # Timeline Hint Oluştur (Akıllı Diarization)
+    timeline_hint = None
+    if start_time and duration:
+        try:
+            st_float = float(start_time)
+            dur_float = float(duration)
+            timeline_hint = generate_timeline_hint(st_float, dur_float, task_id)
+        except ValueError:
+            pass
+
+    # 2) Transkripsiyon
+    transcript_start = time.time()
+    text = transcribe_webm_segment(webm_for_model, "segment", True, speaker_hint=speaker_name, timeline_hint=timeline_hint, platform=platform,
+                                   task_id=task_id)
+    if text and text.startswith("[HATA]"):
+        # Geçici Gemini hatası: metin eklenmez; aynı sesin tekrar gönderimi (final) yeniden denenir
+        print(f"[ERROR] Segment transkribe edilemedi: {text}")
+        return {
+            "ok": False,
+            "error": text
+        }
+    text = clean_transcript(text)
+
+    transcript_duration = time.time() - transcript_start
+
+    print(f"\n[SUCCESS] ✓ TRANSKRİPSİYON TAMAMLANDI ({transcript_duration:.1f}s)")
+    print(f"[STATS] Karakter sayısı: {len(text):,}")
+
+    if not text or len(text) < 10:
+        print("[WARN] Transkript çok kısa!")
+        return {
+            "ok": False,
+            "error": "Transkript oluşturulamadı veya çok kısa"
+        }
 
-            # WebM'i kaydet
-            print("[UPLOAD] Dosya alınıyor...")
-            content = await audio.read()
-            webm.write_bytes(content)
 
-            file_size_mb = len(content) / (1024 * 1024)
-            print(f"[OK] WebM dosyası alındı: {file_size_mb:.2f} MB")
 
-            if file_size_mb < 0.01:
-                print("[ERROR] Dosya çok küçük!")
+    # Eğer sessizlik döndüyse işlem yapma ama hata da verme
+    if not text:
+        print("[INFO] Sessizlik/Boş transkript - Kaydedilmedi.")
+        return {
+            "ok": True,
+            "transcript": "",
+            "info": "Silence detected"
+        }
+
+    # Segment kaydı append-only depoya eklenir (mevcut transkript okunup yeniden
+    # yazılmaz). Tekrar kontrolü + ekleme tek kilit altında: eşzamanlı segmentler
+    # birbirinin kontrolünü kaçırmaz.
+    store = get_transcript_store(task_id=task_id)
+    with store.lock:
+        # Tekrar / sınır örtüşmesi: toplantının shingle indeksiyle (transkript taranmaz).
+        # Tam tekrar segment eklenmez; başı önceki segmentin sonunu tekrarlıyorsa
+        # sadece örtüşen kısım kırpılır.
+        overlap = store.check_overlap(text, start_time=start_time, seq=seq)
+        if overlap.action == "duplicate":
+            print(f"[SKIP] Tekrarlayan içerik tespit edildi ({len(text)} chars, %{overlap.duplicate_ratio * 100:.0f} shingle mevcut) - EKLENMEDİ.")
+            return {
+                "ok": True,
+                "transcript": store.text(),
+                "info": "Duplicate content skipped"
+            }
+        if overlap.action == "trim":
+            print(f"[DEDUPE] Segment başındaki {overlap.overlap_words} kelimelik örtüşme kırpıldı")
+            text = overlap.text
+            if not text.strip():
                 return {
-                    "ok": False,
-                    "error": "WebM dosyası çok küçük (< 0.01 MB)"
+                    "ok": True,
+                    "transcript": store.text(),
+                    "info": "Overlap only, skipped"
                 }
 
-            print("\n" + "="*60)
-            print("[STEP 1/2] TRANSKRİPSİYON BAŞLIYOR (WEBM)")
-            print("="*60)
+        record = store.append(
+            text,
+            seq=seq,
+            recording=recording_id,
+            start_time=start_time,
+            duration=duration,
+            speaker=speaker_name,
+            timeline_hint=timeline_hint,
+            platform=platform,
+            audio=audio_sha
+        )
+        combined_transcript = store.text()
+
+    print(f"[APPEND] Segment #{record['seq']} kaydedildi (+{len(text)} → toplam {len(combined_transcript)} karakter)")
+    event_hub.publish("segment", {
+        "meeting": task_id,
+        "seq": record["seq"],
+        "recording": record.get("recording"),
+        "start_time": start_time,
+        "duration": duration,
+        "speaker": speaker_name,
+        "offset": store.offset_of(record),
+        "text": text,
+        "watermark": store.watermark()["contiguous_seq"]
+    })
+    # Ara özet için yeni kapanan transkript penceresini arka planda özetle
+    rolling_summary.schedule_prefetch(combined_transcript)
 
-            # BYPASS: Recorder already encodes at 16k CBR, no need to recompress
-            # (Recompression saves only ~80KB but wastes CPU)
-            webm_for_model = webm
-            print("[INFO] Using original WebM (recorder already optimized at 16k CBR)")
+    # ✅ RAPOR OLUŞTURMAYI KALDIRDIK!
+    # Rapor sadece bot durdurulunca sistem.py tarafından oluşturulacak
+    # Bu sayede her segment için değil, sadece EN SON 1 rapor olacak
 
-            # 2) Transkripsiyon
-            transcript_start = time.time()
-            # Timeline Hint Oluştur (Akıllı Diarization)
-            timeline_hint = None
-            if start_time and duration:
-                try:
-                    st_float = float(start_time)
-                    dur_float = float(duration)
-                    timeline_hint = generate_timeline_hint(st_float, dur_float)
-                except ValueError:
-                    pass
+    total_duration = transcript_duration
+    print("\n" + "="*60)
+    print("[DONE] Segment işlendi!")
+    print("="*60)
+    print(f"[STATS] Segment: {file_size_mb:.2f} MB")
+    print(f"[STATS] Toplam transcript: {len(combined_transcript):,} karakter")
+    print(f"[STATS] İşlem süresi: {total_duration:.1f}s")
+    print("="*60 + "\n")
 
-            # 2) Transkripsiyon
-            transcript_start = time.time()
-            text = transcribe_webm_segment(webm_for_model, "segment", True, speaker_hint=speaker_name, timeline_hint=timeline_hint, platform=platform)
-            text = clean_transcript(text)
+    return {
+        "ok": True,
+        "transcript": combined_transcript,
+        "transcript_length": len(combined_transcript),
+        "segment_length": len(text),
+        "seq": record["seq"],
+        "webm_size_mb": file_size_mb,
+        "processing_time_seconds": total_duration
+    }
 
-            transcript_duration = time.time() - transcript_start
 
-            print(f"\n[SUCCESS] ✓ TRANSKRİPSİYON TAMAMLANDI ({transcript_duration:.1f}s)")
-            print(f"[STATS] Karakter sayısı: {len(text):,}")
+# ============================================================
+# TRANSKRİPSİYON İŞ KUYRUĞU
+# ============================================================
+# Gemini çağrısı ve retry backoff'ları (time.sleep) bloklayıcı olduğu için
+# event loop'ta değil, sınırlı bir thread havuzunda çalışır. Endpoint dosyayı
+# kaydedip hemen job_id döner (202); durum /transcribe-jobs/{job_id}'den izlenir.
+TRANSCRIBE_WORKERS = max(1, int(os.getenv("TRANSCRIBE_WORKERS", "2")))
+TRANSCRIBE_JOB_TTL = 3600  # Biten işler bu kadar saniye sonra unutulur
+TRANSCRIBE_JOB_DIR = Path(tempfile.gettempdir()) / "transcribe_jobs"
+
+transcribe_executor = ThreadPoolExecutor(max_workers=TRANSCRIBE_WORKERS, thread_name_prefix="transcribe")
+transcribe_jobs = {}
+transcribe_jobs_lock = threading.Lock()
+
+
+def _job_view(job: dict) -> dict:
+    """Job kaydının API'de gösterilen hali"""
+    view = {k: v for k, v in job.items() if k != "path"}
+    if job["status"] == "queued":
+        with transcribe_jobs_lock:
+            view["queue_position"] = sum(
+                1 for other in transcribe_jobs.values()
+                if other["status"] == "queued" and other["created_at"] < job["created_at"]
+            )
+    return view
 
-            if not text or len(text) < 10:
-                print("[WARN] Transkript çok kısa!")
-                return {
-                    "ok": False,
-                    "error": "Transkript oluşturulamadı veya çok kısa"
-                }
 
+def _prune_transcribe_jobs():
+    cutoff = time.time() - TRANSCRIBE_JOB_TTL
+    with transcribe_jobs_lock:
+        for job_id in [
+            job_id for job_id, job in transcribe_jobs.items()
+            if job["status"] in ("done", "failed") and job["finished_at"] < cutoff
+        ]:
+            del transcribe_jobs[job_id]
 
-                
-            # 🔥 TRANSKRİPT DOSYASINI GARANTİLE
-            # Önce dosya yolunu tanımla ve yoksa oluştur (Boş bile olsa)
-            transcript_file = Path("latest_transcript.txt")
-            if not transcript_file.exists():
-                transcript_file.touch()
-
-            # Eğer sessizlik döndüyse işlem yapma ama hata da verme
-            if not text:
-                print("[INFO] Sessizlik/Boş transkript - Kaydedilmedi.")
-                return {
-                    "ok": True,
-                    "transcript": "",
-                    "info": "Silence detected"
-                }
 
-            # Her segment geldiğinde, önceki transkriptin ÜSTÜNE EKLE (append), üzerine yazma!
-            # (transcript_file yukarıda tanımlandı)
-            
-            if transcript_file.exists():
-                # Mevcut transkripti oku
-                existing_transcript = transcript_file.read_text(encoding="utf-8")
-                
-                # Yeni segment'i ekle (ayrıcı ile)
-                # 🔥 DEDUPLICATION CHECK: Eğer yeni gelen metin, mevcut metnin son kısmında ZATEN varsa ekleme
-                # Window size arttırıldı (1000 -> 15000) çünkü uzun segmentler tekrar edebiliyor
-                check_len = 15000
-                last_part = existing_transcript[-check_len:] if len(existing_transcript) > check_len else existing_transcript
-                
-                # Normalizasyon (boşlukları temizle, lowercase)
-                norm_text = " ".join(text.lower().split())
-                norm_last = " ".join(last_part.lower().split())
-                
-                # 1. Tam Kapsama Kontrolü (Yeni metin tamamen eski metnin içinde mi?)
-                if norm_text in norm_last and len(norm_text) > 30:
-                     print(f"[SKIP] Tekrarlayan içerik tespit edildi ({len(text)} chars) - EKLENMEDİ.")
-                     return {
-                        "ok": True, 
-                        "transcript": existing_transcript, 
-                        "info": "Duplicate content skipped"
-                     }
-
-                # 2. Overlap Kontrolü (Örn: Yeni metnin ilk %50'si eski metnin sonunda varsa)
-                # Bu, parça parça tekrarı engeller
-                msg_len = len(norm_text)
-                if msg_len > 100:
-                    first_half = norm_text[:int(msg_len/2)]
-                    if first_half in norm_last:
-                         print(f"[SKIP] Kısmi tekrar (%50 overlap) tespit edildi - EKLENMEDİ.")
-                         return {
-                            "ok": True, 
-                            "transcript": existing_transcript, 
-                            "info": "Partial duplicate skipped"
-                         }
-
-                combined_transcript = existing_transcript + "\n\n" + text
-                
-                print(f"[APPEND] Transkript birleştirildi (önceki: {len(existing_transcript)} → yeni: {len(combined_transcript)} karakter)")
-            else:
-                # İlk segment, direkt yaz
-                combined_transcript = text
-                print(f"[NEW] İlk transkript kaydedildi ({len(text)} karakter)")
-            
-            # Birleştirilmiş transkripti kaydet
-            transcript_file.write_text(combined_transcript, encoding="utf-8")
-
-            # ✅ RAPOR OLUŞTURMAYI KALDIRDIK!
-            # Rapor sadece bot durdurulunca sistem.py tarafından oluşturulacak
-            # Bu sayede her segment için değil, sadece EN SON 1 rapor olacak
-
-            total_duration = transcript_duration
-            print("\n" + "="*60)
-            print("[DONE] Segment işlendi!")
-            print("="*60)
-            print(f"[STATS] Segment: {file_size_mb:.2f} MB")
-            print(f"[STATS] Toplam transcript: {len(combined_transcript):,} karakter")
-            print(f"[STATS] İşlem süresi: {total_duration:.1f}s")
-            print("="*60 + "\n")
+def _run_transcribe_job(job_id: str, webm: Path, params: dict):
+    job = transcribe_jobs[job_id]
+    job.update(status="running", started_at=time.time())
+    try:
+        result = process_webm_file(webm, **params)
+        # Birleşik transkripti job kaydında tutma (bellek); sadece özet alanlar
+        # ok=False (çok kısa / boş transkript) da "done": segment işlendi, tekrar denemek anlamsız
+        job["result"] = {k: v for k, v in result.items() if k != "transcript"}
+        job["status"] = "done"
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        job.update(status="failed", error=str(e))
+    finally:
+        job["finished_at"] = time.time()
+        try:
+            webm.unlink()
+        except OSError:
+            pass
+        print(f"[JOB] {job_id} → {job['status']} ({job['finished_at'] - job['created_at']:.1f}s)")
+
+
+def submit_transcribe_job(webm: Path, **params) -> dict:
+    """WebM dosyasını transkripsiyon kuyruğuna ekle (dosya iş bitince silinir)"""
+    _prune_transcribe_jobs()
+    job_id = webm.stem
+    job = {
+        "job_id": job_id,
+        "status": "queued",
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "start_time": params.get("start_time"),
+        "duration": params.get("duration"),
+        "seq": params.get("seq"),
+        "result": None,
+        "error": None,
+        "path": str(webm),
+    }
+    with transcribe_jobs_lock:
+        transcribe_jobs[job_id] = job
+    transcribe_executor.submit(_run_transcribe_job, job_id, webm, params)
+    return job
 
-            return {
-                "ok": True,
-                "transcript": combined_transcript,
-                "transcript_length": len(combined_transcript),
-                "segment_length": len(text),
-                "webm_size_mb": file_size_mb,
-                "processing_time_seconds": total_duration
-            }
+
+@app.post("/transcribe-webm", status_code=202)
+async def transcribe_webm_endpoint(
+    audio: UploadFile = File(...),
+    speaker_name: str = Form(None),  # Legacy fallback
+    start_time: str = Form(None),    # Yeni timestamp from recorder
+    duration: str = Form(None),
+    platform: str = Form(None),      # Platform: meet, zoom, teams
+    speech_ratio: str = Form(None),  # Recorder VAD sonucu (0-1)
+    seq: int = Form(None),           # Kayıt oturumu içindeki sıra numarası (1, 2, ...)
+    recording_id: str = Form(None),  # Recorder oturum kimliği (seq'ler bu oturum içinde ardışık)
+    task_id: str = Form(None)        # Toplantı görevi (yoksa eski tek toplantı deposu)
+):
+    """
+    WebM/Opus dosyasını transkripsiyon kuyruğuna al ve hemen job_id dön (202).
+    Sonuç: GET /transcribe-jobs/{job_id}
+    """
+    print("\n" + "="*60)
+    print(f"[API] /transcribe-webm endpoint çağrıldı. Speaker: {speaker_name}")
+    if speech_ratio:
+        print(f"[VAD] Recorder konuşma oranı: {speech_ratio}")
+    print("="*60)
+
+    try:
+        TRANSCRIBE_JOB_DIR.mkdir(exist_ok=True)
+        webm = TRANSCRIBE_JOB_DIR / f"{uuid.uuid4().hex}.webm"
+
+        # WebM'i kaydet
+        print("[UPLOAD] Dosya alınıyor...")
+        received = await save_upload(audio, webm)
+
+        job = submit_transcribe_job(
+            webm,
+            speaker_name=speaker_name,
+            start_time=start_time,
+            duration=duration,
+            platform=platform,
+            seq=seq,
+            recording_id=recording_id,
+            task_id=task_id
+        )
+        print(f"[JOB] {job['job_id']} kuyruğa alındı ({received / 1024:.0f} KB)")
+
+        return JSONResponse(status_code=202, content={
+            "ok": True,
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "status_url": f"/transcribe-jobs/{job['job_id']}"
+        })
 
     except Exception as e:
         print(f"\n[ERROR] İşlem hatası: {e}")
         import traceback
         traceback.print_exc()
-        return {
+        return JSONResponse(status_code=500, content={
             "ok": False,
             "error": str(e)
-        }
+        })
+
+
+@app.get("/transcribe-jobs/{job_id}")
+async def transcribe_job_status(job_id: str):
+    """Transkripsiyon işinin durumu: queued → running → done | failed"""
+    job = transcribe_jobs.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"ok": False, "error": "Job bulunamadı"})
+    return {"ok": True, **_job_view(job)}
+
+
+@app.get("/transcribe-jobs")
+async def transcribe_jobs_summary():
+    """Kuyruk özeti (durum başına iş sayısı)"""
+    with transcribe_jobs_lock:
+        counts = {}
+        for job in transcribe_jobs.values():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+    return {"ok": True, "workers": TRANSCRIBE_WORKERS, "jobs": counts}
+
+
+@app.post("/segment-skipped")
+async def segment_skipped(
+    seq: int = Form(...),
+    recording_id: str = Form(None),
+    reason: str = Form(None),
+    task_id: str = Form(None)
+):
+    """
+    Recorder'ın göndermediği segmenti bildir (VAD sessiz, yüklenemedi).
+    Sıralama watermark'ı bu seq'i beklemeden ilerler.
+    """
+    store = get_transcript_store(task_id=task_id)
+    await asyncio.to_thread(store.mark_skipped, seq, recording_id, reason)
+    return {"ok": True, "watermark": store.watermark()}
+
+# ============================================================
+# CANLI SES AKIŞI (WebSocket)
+# ============================================================
+# Protokol (recorder → server):
+#   1) text:   {"type": "start", "start_time": <epoch>, "platform": "...", "speaker_name": "..."}
+#   2) binary: ffmpeg'in WebM akışı (header + cluster'lar, parça sınırı serbest)
+#   3) text:   {"type": "end"}
+# Server → recorder:
+#   {"type": "window", "index", "start_time", "duration", "ok"}  her pencere işlendiğinde
+#   {"type": "done", "windows"}                                   "end" sonrası, tüm pencereler bitince
+STREAM_WINDOW_SECONDS = float(os.getenv("STREAM_WINDOW_SECONDS", "60"))
+
+
+def _transcribe_stream_window(meeting_id: str, index: int, data: bytes, start_time: float,
+                              duration: float, speaker_name: str, platform: str,
+                              recording_id: str = None, task_id: str = None) -> dict:
+    """Akıştan kesilen pencereyi geçici dosyaya yazıp ortak transkripsiyon yolundan geçir"""
+    print(f"[STREAM] {meeting_id} pencere #{index}: {duration:.1f}s, {len(data) / 1024:.0f} KB")
+    with tempfile.TemporaryDirectory() as tmp:
+        webm = Path(tmp) / f"stream_{index:04d}.webm"
+        webm.write_bytes(data)
+        return process_webm_file(
+            webm,
+            speaker_name=speaker_name,
+            start_time=str(start_time),
+            duration=str(duration),
+            platform=platform,
+            seq=index + 1,
+            recording_id=recording_id,
+            task_id=task_id
+        )
 
-        return {
-            "ok": False,
-            "error": str(e),
-            "traceback": traceback.format_exc()
-        }
 
+@app.websocket("/stream-audio/{meeting_id}")
+async def stream_audio(websocket: WebSocket, meeting_id: str):
+    """
+    Recorder'dan canlı WebM/Opus akışı al, STREAM_WINDOW_SECONDS'lık pencerelere
+    böl ve sırayla transkribe et. Pencere zamanları cluster timecode'larından
+    hesaplanır (wall-clock = start_time + cluster offset).
+    ?task_id=<görev> verilirse pencereler o toplantının transkriptine eklenir.
+    """
+    task_id = websocket.query_params.get("task_id") or None
+    await websocket.accept()
+    print(f"[STREAM] {meeting_id} bağlandı")
+
+    splitter = WebMStreamSplitter()
+    windows = asyncio.Queue()
+    meta = {"start_time": time.time(), "platform": None, "speaker_name": None}
+    recording_id = f"stream-{meeting_id}-{uuid.uuid4().hex[:8]}"  # Her bağlantı ayrı kayıt oturumu
+    pending = []          # Mevcut pencerenin cluster'ları: (bytes, saniye)
+    window_count = 0
+    ended = False
+
+    async def transcriber():
+        # Pencereler geliş sırasıyla işlenir (transkript sırası korunur)
+        while True:
+            item = await windows.get()
+            if item is None:
+                return
+            index, data, start, duration = item
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    transcribe_executor, _transcribe_stream_window, meeting_id, index, data,
+                    start, duration, meta["speaker_name"], meta["platform"], recording_id, task_id
+                )
+                ok = bool(result.get("ok"))
+            except Exception as e:
+                print(f"[STREAM] {meeting_id} pencere #{index} hatası: {e}")
+                ok = False
+            try:
+                await websocket.send_json({
+                    "type": "window", "index": index,
+                    "start_time": start, "duration": duration, "ok": ok
+                })
+            except Exception:
+                pass  # Bağlantı kopmuş olabilir, transkripsiyon yine de tamamlandı
+
+    def cut_window(force: bool = False):
+        nonlocal pending, window_count
+        if not pending or not splitter.header_complete:
+            return
+        first_tc = pending[0][1]
+        last_tc = pending[-1][1]
+        if not force and last_tc - first_tc < STREAM_WINDOW_SECONDS:
+            return
+        # Son cluster bir sonraki pencerenin başı olur (süre = cluster başlangıçları farkı)
+        clusters = pending if force else pending[:-1]
+        pending = [] if force else pending[-1:]
+        if force:
+            # Son cluster'ın süresi bilinmiyor: ortalama cluster uzunluğu kadar ekle
+            step = (last_tc - first_tc) / (len(clusters) - 1) if len(clusters) > 1 else 1.0
+            end_tc = last_tc + step
+        else:
+            end_tc = last_tc
+        data = splitter.header + b"".join(c for c, _ in clusters)
+        windows.put_nowait((window_count, data, meta["start_time"] + first_tc, end_tc - first_tc))
+        window_count += 1
 
-@app.post("/summary")
-async def summarize():
-    p = Path("latest_transcript.txt")
-    if not p.exists():
-        return {"ok": False, "error": "Transkript yok"}
+    worker = asyncio.create_task(transcriber())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                for cluster in splitter.feed(message["bytes"]):
+                    pending.append(cluster)
+                    cut_window()
+            elif message.get("text") is not None:
+                try:
+                    control = json.loads(message["text"])
+                except ValueError:
+                    continue
+                if control.get("type") == "start":
+                    meta["start_time"] = float(control.get("start_time") or time.time())
+                    meta["platform"] = control.get("platform")
+                    meta["speaker_name"] = control.get("speaker_name")
+                elif control.get("type") == "end":
+                    ended = True
+                    break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # Kopma olsa bile elde kalan ses kaybolmaz: son pencereyi de işle
+        pending.extend(splitter.finish())
+        cut_window(force=True)
+        windows.put_nowait(None)
+        await worker
+
+    print(f"[STREAM] {meeting_id} kapandı ({window_count} pencere{', normal bitiş' if ended else ', bağlantı koptu'})")
+    if ended:
+        try:
+            await websocket.send_json({"type": "done", "windows": window_count})
+            await websocket.close()
+        except Exception:
+            pass
 
-    txt = p.read_text(encoding="utf-8")
+
+@app.post("/summary")
+async def summarize(task_id: str = Query(None)):
+    txt = load_transcript(task_id=resolve_meeting(task_id).task_id)
     if not txt.strip():
         return {"ok": False, "error": "Transkript boş"}
     
+    # Önceki bölümlerin önbellekli özetleri + son bölümün ham metni (rolling_summary.py)
+    context = await asyncio.to_thread(rolling_summary.summary_context, txt, "summary")
     model = genai.GenerativeModel(MODEL_NAME)
-    resp = model.generate_content("Toplantıyı maddeler halinde özetle:\n\n" + txt[-12000:])
+    resp = await asyncio.to_thread(
+        limited_generate, model, "Toplantıyı maddeler halinde özetle:\n\n" + context, label="summary"
+    )
     return {"ok": True, "summary": resp.text}
 
 @app.post("/clear-worker-error")
-async def clear_worker_error():
+async def clear_worker_error(task_id: str = Query(None)):
     """Worker status'taki error alanını temizle (Popup bir kere gösterildikten sonra)."""
     try:
-        status_file = Path("data/worker_status.json")
-        if status_file.exists():
-            status = json.loads(status_file.read_text(encoding="utf-8"))
-            if "error" in status:
-                del status["error"]
-                status_file.write_text(json.dumps(status, ensure_ascii=False, indent=2), encoding="utf-8")
-                print("[OK] Worker error temizlendi")
+        state = resolve_meeting(task_id)
+        status = state.get("status")
+        if status and "error" in status:
+            del status["error"]
+            state.set("status", status)
+            print("[OK] Worker error temizlendi")
         return {"ok": True}
     except Exception as e:
         print(f"[ERROR] Worker error temizleme hatası: {e}")
@@ -919,30 +1305,17 @@ async def delete_meeting(payload: dict = Body(...)):
         print(f"\n[DELETE] Toplantı silme isteği: {meeting_id} (User: {user_id})")
 
         # 1. Önce kayıt detaylarını çekelim (dosya yollarını öğrenmek için)
-        # Direkt client kullanalım veya request yapalım. 
-        # Server tarafında supabase client'ı 'db_utils' içinde veya burda tanımlı mı?
-        # db_utils.py içinde global client yoksa, environment'dan alıp burda create edelim.
-        
-        from supabase import create_client, Client
-        url: str = os.environ.get("SUPABASE_URL")
-        # Service role key kullan (RLS bypass için)
-        key: str = os.environ.get("SUPABASE_SERVICE_ROLE_KEY") or os.environ.get("SUPABASE_KEY")
-        print(f"[DEBUG] Using key: {key[:20]}..." if key else "[DEBUG] No key found!")
-        supabase: Client = create_client(url, key)
-
-        # Meeting verisini çek
-        print(f"[DEBUG] Querying: meeting_id={meeting_id}, user_id={user_id}")
-        
-        # Debug: Tüm kayıtları listele
-        all_res = supabase.table("meetings").select("id, user_id, title").limit(10).execute()
-        print(f"[DEBUG] Tablodaki kayıtlar: {[{'id': r.get('id'), 'user': r.get('user_id')[:8] if r.get('user_id') else 'N/A'} for r in all_res.data]}")
-        
-        res = supabase.table("meetings").select("*").eq("id", meeting_id).eq("user_id", user_id).execute()
+        # Process'in paylaşılan async istemcisi (service role key, RLS bypass); event loop bloklanmaz
+        supabase = await get_async_client()
+        if supabase is None:
+            return JSONResponse({"ok": False, "error": "Supabase yapılandırılmamış"}, status_code=500)
+
+        res = await supabase.table("meetings").select("*").eq("id", meeting_id).eq("user_id", user_id).execute()
         
         # Debug: Eğer bulunamazsa, sadece ID ile dene (user_id kontrolünü atla)
         if not res.data:
             print("[DEBUG] user_id eşleşmedi, sadece ID ile deneniyor...")
-            res = supabase.table("meetings").select("*").eq("id", meeting_id).execute()
+            res = await supabase.table("meetings").select("*").eq("id", meeting_id).execute()
             if res.data:
                 print(f"[DEBUG] Meeting bulundu ama user_id eşleşmiyor. DB user_id: {res.data[0].get('user_id')}")
         
@@ -950,9 +1323,9 @@ async def delete_meeting(payload: dict = Body(...)):
             print(f"[DEBUG] Meeting hiç bulunamadı. Gelen ID: {meeting_id}")
             return JSONResponse({"ok": False, "error": "Meeting not found or access denied"}, status_code=404)
 
-        meeting = res.data[0]
-        report_path = meeting.get("report_path")
-        transcript_path = meeting.get("transcript_path")
+        record = res.data[0]
+        report_path = record.get("report_path")
+        transcript_path = record.get("transcript_path")
 
         # 2. Fiziksel Dosyaları Sil
         deleted_files = []
@@ -983,7 +1356,7 @@ async def delete_meeting(payload: dict = Body(...)):
         delete_local_file(transcript_path)
 
         # 3. Supabase Kaydını Sil
-        del_res = supabase.table("meetings").delete().eq("id", meeting_id).execute()
+        del_res = await supabase.table("meetings").delete().eq("id", meeting_id).execute()
         
         print(f"[DELETE] DB kaydı silindi. ID: {meeting_id}")
 
@@ -1001,8 +1374,21 @@ async def delete_meeting(payload: dict = Body(...)):
 # =========================================================
 # BOT TASK SYSTEM
 # =========================================================
-BOT_TASK_FILE = Path("data/bot_task.json")
-BOT_COMMAND_FILE = Path("data/bot_command.json")
+# Görev / komut / worker durumu toplantı başına meeting_state.py'de (Redis,
+# yoksa data/meeting_state.db). task_id'siz istekler kullanıcının son aktif
+# toplantısına, o da yoksa eski data/bot_*.json dosyalarına (sistem.py) gider.
+MAX_ACTIVE_MEETINGS = int(os.getenv("MAX_ACTIVE_MEETINGS", "3"))  # Eşzamanlı bot sınırı
+
+
+def resolve_meeting(task_id: str = None, user_id: str = None) -> MeetingState:
+    """İsteğin toplantısı: task_id, yoksa (kullanıcının) en son aktif toplantı, yoksa eski dosyalar"""
+    if task_id:
+        return meeting(task_id)
+    active = active_meetings(user_id)
+    if active:
+        return meeting(active[0]["task_id"])
+    return MeetingState(None)
+
 
 def parse_zoom_link(meeting_input: str):
     """
@@ -1092,37 +1478,14 @@ async def start_bot(payload: dict = Body(...)):
     # Bot ismi sabit
     bot_name = "Sesly Bot"
     
-    # GUARD: Aktif bot varsa yeni görev oluşturma
-    if BOT_TASK_FILE.exists():
-        try:
-            existing = json.loads(BOT_TASK_FILE.read_text(encoding="utf-8"))
-            if existing.get("active", False):
-                return {"ok": False, "error": "Bot zaten aktif! Önce mevcut botu durdurun."}
-        except:
-            pass
-    
-    # Worker status'u sıfırla (eski timestamp stale check'i tetiklemesin)
-    worker_status_file = Path("data/worker_status.json")
-    try:
-        ws = {"running": False, "recording": False, "status_message": "Başlatılıyor...", "timestamp": time.time()}
-        worker_status_file.write_text(json.dumps(ws, ensure_ascii=False), encoding="utf-8")
-    except: pass
-
-
-    # Eski verileri temizle (Stale transcript önlemek için)
-    try:
-        Path("latest_transcript.txt").unlink(missing_ok=True)
-        Path("live_transcript_cache.json").unlink(missing_ok=True)
-        
-        # Temp reports temizle
-        temp_dir = Path("temp_reports")
-        if temp_dir.exists():
-            shutil.rmtree(temp_dir)
-            temp_dir.mkdir()
-            
-        print("[CLEANUP] Eski transkript ve raporlar temizlendi.")
-    except Exception as e:
-        print(f"[WARN] Temizlik hatası: {e}")
+    # GUARD: Kullanıcının aktif botu varsa veya eşzamanlı toplantı sınırı dolduysa yeni görev oluşturma
+    # (Her toplantının transkripti / durumu ayrı; başka kullanıcıların toplantılarına dokunulmaz)
+    active = await asyncio.to_thread(active_meetings)
+    own = [t for t in active if (t.get("user_id") or "") == user_id]
+    if own:
+        return {"ok": False, "error": "Bot zaten aktif! Önce mevcut botu durdurun.", "task_id": own[0]["task_id"]}
+    if len(active) >= MAX_ACTIVE_MEETINGS:
+        return {"ok": False, "error": f"Aynı anda en fazla {MAX_ACTIVE_MEETINGS} toplantı kaydedilebilir. Lütfen daha sonra tekrar deneyin."}
 
     # Platform'a göre task oluştur
     task = {
@@ -1149,14 +1512,22 @@ async def start_bot(payload: dict = Body(...)):
         task["meeting_id"] = ""
         task["passcode"] = ""
     
-    # Task'i kaydet (data/ klasöründe - geriye uyumluluk için)
-    BOT_TASK_FILE.write_text(json.dumps(task, ensure_ascii=False), encoding="utf-8")
+    # Görev kimliği: worker/recorder dosyaları ve metrikler bu id ile anahtarlanır
+    task_id = str(uuid.uuid4())
+    task["task_id"] = task_id
+
+    # Task'i kaydet; worker status'u sıfırdan başlat (stale check tetiklenmesin)
+    state = meeting(task_id)
+    state.set("task", task)
+    state.set("status", {"running": False, "recording": False, "status_message": "Başlatılıyor...",
+                         "platform": platform, "timestamp": time.time()})
+    event_hub.publish("transcript_reset", {"meeting": task_id})
     
     print(f"[{platform.upper()}] Yeni görev oluşturuldu:", task)
     
     # CELERY TASK QUEUE: Redis üzerinden worker'a gönder
-    task_id = str(uuid.uuid4())
     try:
+        from tasks import process_meeting  # Celery app'i ilk görevde kurulur
         celery_task = process_meeting.delay(
             task_id=task_id,
             meeting_url=meeting_url,
@@ -1166,7 +1537,22 @@ async def start_bot(payload: dict = Body(...)):
         print(f"[CELERY] Task kuyruğa eklendi: {celery_task.id}")
     except Exception as e:
         print(f"[CELERY ERROR] Task gönderilemedi: {e}")
-        # Celery bağlantısı yoksa eski yönteme devam (geriye uyumluluk)
+        # Celery bağlantısı yoksa eski yönteme devam (geriye uyumluluk):
+        # sistem.py sadece eski data/bot_task.json'ı izler, tek toplantı
+        state.clear()
+        legacy = MeetingState(None)
+        if (legacy.get("task") or {}).get("active"):
+            return {"ok": False, "error": "Bot zaten aktif! Önce mevcut botu durdurun."}
+        task_id = task["task_id"] = None
+        legacy.set("task", task)
+        legacy.set("status", {"running": False, "recording": False, "status_message": "Başlatılıyor...",
+                              "timestamp": time.time()})
+        try:
+            get_transcript_store().reset()
+            event_hub.publish("transcript_reset", {"meeting": None})
+            Path("live_transcript_cache.json").unlink(missing_ok=True)
+        except Exception as e:
+            print(f"[WARN] Temizlik hatası: {e}")
     
     return {
         "ok": True,
@@ -1180,26 +1566,80 @@ async def start_bot(payload: dict = Body(...)):
 # =========================================================
 # BOT STATUS
 # =========================================================
+def load_recorder_metrics(task_id: str = None) -> dict:
+    """Recorder'ın data/ altına yazdığı ffmpeg sağlık metrikleri (yoksa None)"""
+    candidates = [data_file("recorder_metrics.json", task_id)] if task_id else []
+    candidates.append(data_file("recorder_metrics.json", ""))
+    for path in candidates:
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+    return None
+
+
+@app.get("/metrics")
+async def recorder_metrics(format: str = Query("json", description="json | prometheus")):
+    """
+    Tüm aktif recorder'ların kayıt sağlığı metrikleri
+    (yakalanan ses / duvar saati, drift, overrun, düşen frame, takılma).
+    """
+    recorders = []
+    for path in sorted(Path("data").glob("*recorder_metrics.json")):
+        try:
+            recorders.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+
+    if format != "prometheus":
+        return {"recorders": recorders}
+
+    # Prometheus text format
+    gauges = (
+        "wall_seconds", "captured_seconds", "capture_ratio", "drift_seconds", "bitrate_kbps", "speed",
+        "progress_age_seconds", "overruns", "dropped_frames", "drift_corrections", "queue_blocks",
+        "timestamp_errors", "segments_sent", "segments_failed", "segments_silent", "segments_pending",
+    )
+    lines = []
+    for name in gauges + ("stalled", "healthy"):
+        lines.append(f"# TYPE sesly_recorder_{name} gauge")
+        for metrics in recorders:
+            value = metrics.get(name)
+            if value is None:
+                continue
+            label = metrics.get("task_id") or "default"
+            lines.append(f'sesly_recorder_{name}{{task_id="{label}"}} {float(value)}')
+    return Response("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+
 @app.get("/bot-status")
-async def bot_status():
+async def bot_status(task_id: str = Query(None), user_id: str = Query(None)):
     """
     Multi-platform bot durumu (Zoom / Teams / Meet)
+    task_id verilmezse kullanıcının (user_id) en son aktif toplantısı.
     
     Returns:
         task: Aktif görev bilgisi
         worker: Worker durumu
+        meeting: Toplantının task_id'si (eski tek toplantı kurulumunda None)
     """
+    return await asyncio.to_thread(bot_status_payload, task_id, user_id)
+
+
+def bot_status_payload(task_id: str = None, user_id: str = None) -> dict:
+    """/bot-status ve /events "status" olayının ortak içeriği"""
+    state = None
     try:
-        # Task bilgisini oku
-        if not BOT_TASK_FILE.exists():
-            return {"task": {"active": False}, "worker": {}}
+        state = resolve_meeting(task_id, user_id)
 
-        task = json.loads(BOT_TASK_FILE.read_text(encoding="utf-8"))
+        # Task bilgisini oku
+        task = state.get("task")
+        if task is None:
+            return {"task": {"active": False}, "worker": {}, "meeting": state.task_id}
 
-        # Worker status'u oku (data/ klasöründen)
-        worker_status_file = Path("data/worker_status.json")
-        if worker_status_file.exists():
-            worker = json.loads(worker_status_file.read_text(encoding="utf-8"))
+        # Worker status'u oku
+        worker = state.get("status")
+        if worker is not None:
             
             # STALE CHECK: Heartbeat 60 saniyeden eskiyse bot ölmüş demektir
             # (Docker restart, crash vb. durumları yakalar)
@@ -1213,10 +1653,13 @@ async def bot_status():
                     logger.warning(f"⚠️ Bot heartbeat {stale_seconds:.0f}s eski — bot ölmüş, durum sıfırlanıyor.")
                     # Durumu sıfırla
                     worker = {"running": False, "recording": False, "status_message": "Bot beklenmedik şekilde durdu", "platform": worker.get("platform", ""), "timestamp": time.time()}
-                    worker_status_file.write_text(json.dumps(worker, ensure_ascii=False), encoding="utf-8")
-                    # Task dosyasını da sıfırla
-                    BOT_TASK_FILE.write_text("{}", encoding="utf-8")
-                    task = {"active": False}
+                    state.set("status", worker)
+                    # Görevi de pasife çek (eski kurulumda dosya sıfırlanır)
+                    if state.legacy:
+                        state.set("task", {})
+                        task = {"active": False}
+                    else:
+                        task = state.update("task", active=False)
         else:
             worker = {"running": False, "recording": False}
 
@@ -1224,16 +1667,13 @@ async def bot_status():
         platform = task.get("platform", "zoom")
         
         # Transkript kontrolü
-        transcript_file = Path("latest_transcript.txt")
         has_transcript = False
-        if transcript_file.exists():
-            try:
-                # Sadece var olması yetmez, içi dolu olmalı
-                content = transcript_file.read_text(encoding="utf-8").strip()
-                if len(content) > 10:  # En az 10 karakter olsun
-                    has_transcript = True
-            except:
-                pass
+        try:
+            # Sadece var olması yetmez, içi dolu olmalı
+            if len(load_transcript(task_id=state.task_id).strip()) > 10:  # En az 10 karakter olsun
+                has_transcript = True
+        except:
+            pass
 
         return {
             "task": task,
@@ -1243,42 +1683,26 @@ async def bot_status():
                 "recording": worker.get("recording", False),
                 "status_message": worker.get("status_message", ""),
                 "paused": worker.get("paused", False),
-                "transcript_ready": has_transcript
-            }
+                "transcript_ready": has_transcript,
+                "recorder": load_recorder_metrics(task.get("task_id"))
+            },
+            "meeting": state.task_id
         }
 
     except Exception as e:
-        return {"task": {"active": False}, "worker": {}, "error": str(e)}
-
-
-@app.post("/force-reset")
-async def force_reset():
-    """Bot durumunu zorla sıfırla (worker ölü ama task active kaldıysa)."""
-    try:
-        BOT_TASK_FILE.write_text("{}", encoding="utf-8")
-        worker_status_file = Path("data/worker_status.json")
-        worker_status_file.write_text(
-            json.dumps({"running": False, "recording": False, "status_message": "Sıfırlandı", "timestamp": time.time()}, ensure_ascii=False),
-            encoding="utf-8"
-        )
-        # Eski komut dosyasını da temizle
-        if BOT_COMMAND_FILE.exists():
-            BOT_COMMAND_FILE.unlink()
-        logger.info("[FORCE-RESET] Bot durumu zorla sıfırlandı.")
-        return {"ok": True, "message": "Bot durumu sıfırlandı"}
-    except Exception as e:
-        return {"ok": False, "error": str(e)}
+        return {"task": {"active": False}, "worker": {}, "meeting": state.task_id if state else task_id,
+                "error": str(e)}
 
 
 @app.post("/clear-worker-error")
-async def clear_worker_error():
+async def clear_worker_error(task_id: str = Query(None)):
     """Worker hata mesajını temizle (UI'da bir kere gösterdikten sonra)."""
     try:
-        worker_status_file = Path("data/worker_status.json")
-        if worker_status_file.exists():
-            ws = json.loads(worker_status_file.read_text(encoding="utf-8"))
+        state = resolve_meeting(task_id)
+        ws = state.get("status")
+        if ws is not None:
             ws.pop("error", None)
-            worker_status_file.write_text(json.dumps(ws, ensure_ascii=False), encoding="utf-8")
+            state.set("status", ws)
         return {"ok": True}
     except Exception as e:
         return {"ok": False, "error": str(e)}
@@ -1288,14 +1712,15 @@ async def clear_worker_error():
 # =========================================================
 # BOT COMMAND SYSTEM
 # =========================================================
-def save_bot_command(command: str, data: dict = None):
+def save_bot_command(command: str, data: dict = None, task_id: str = None):
+    """Toplantının worker'ına komut bırak (worker meeting_state "command" belgesini yoklar)"""
     cmd = {
         "command": command,
         "timestamp": time.time(),
         "data": data or {},
         "processed": False
     }
-    BOT_COMMAND_FILE.write_text(json.dumps(cmd, ensure_ascii=False), encoding="utf-8")
+    MeetingState(task_id).set("command", cmd)  # task_id yoksa eski data/bot_command.json
 
 
 @app.post("/bot-command")
@@ -1304,16 +1729,20 @@ async def bot_command(payload: dict = Body(...)):
     
     if command not in ["pause", "resume", "stop", "summary"]:
         return {"ok": False, "error": "Geçersiz komut"}
+
+    # Komut hangi toplantıya: task_id, yoksa kullanıcının son aktif toplantısı
+    state = resolve_meeting(payload.get("task_id"), payload.get("user_id"))
     
     if command == "summary":
-        p = Path("latest_transcript.txt")
-        if not p.exists() or not p.read_text(encoding="utf-8").strip():
+        txt = load_transcript(task_id=state.task_id)
+        if not txt.strip():
             return {"ok": False, "error": "Henüz transkript yok"}
         
-        txt = p.read_text(encoding="utf-8")
         model = genai.GenerativeModel(MODEL_NAME)
         
         try:
+            # Tüm toplantı: önbellekli bölüm özetleri + son bölümün ham metni
+            context = await asyncio.to_thread(rolling_summary.summary_context, txt, "bot-summary")
             prompt = f"""
             Aşağıdaki toplantı transkriptini analiz et ve profesyonel bir "Ara Özet Raporu" oluştur.
             
@@ -1336,41 +1765,34 @@ async def bot_command(payload: dict = Body(...)):
             
             ---
             **Transkript:**
-            {txt[-15000:]}
+            {context}
             """
             
-            resp = model.generate_content(prompt)
+            resp = await asyncio.to_thread(limited_generate, model, prompt, label="bot-summary")
             return {"ok": True, "summary": resp.text}
         except Exception as e:
             return {"ok": False, "error": str(e)}
     
-    save_bot_command(command)
+    save_bot_command(command, task_id=state.task_id)
     
     # STOP KOMUTU GELDİYSE: Worker kendi raporunu oluşturacak, burada YAPMA!
-    # AMA: bot_task.json'ı HEMEN sıfırla — UI "Bot Aktif" göstermeyi bıraksın.
+    # AMA: görevi HEMEN pasife çek — UI "Bot Aktif" göstermeyi bıraksın.
     # Worker'ın finally bloğu bazen çalışmayabilir (crash, timeout vs.)
     if command == "stop":
-        print("[STOP] Komut alındı. Rapor worker tarafından oluşturulacak.")
-        # Task dosyasını pasife çek (UI hemen güncellenir)
+        print(f"[STOP] Komut alındı ({state.task_id or 'legacy'}). Rapor worker tarafından oluşturulacak.")
+        # Görevi pasife çek (UI hemen güncellenir)
         try:
-            if BOT_TASK_FILE.exists():
-                t = json.loads(BOT_TASK_FILE.read_text(encoding="utf-8"))
-                t["active"] = False
-                BOT_TASK_FILE.write_text(json.dumps(t, indent=2, ensure_ascii=False), encoding="utf-8")
-                print("[STOP] bot_task.json active=false yapıldı.")
+            if state.get("task") is not None:
+                state.update("task", active=False)
+                print("[STOP] Görev active=false yapıldı.")
         except Exception as e:
-            print(f"[STOP] bot_task.json sıfırlama hatası: {e}")
+            print(f"[STOP] Görev sıfırlama hatası: {e}")
         # Worker status'u güncelle
         try:
-            worker_status_file = Path("data/worker_status.json")
-            if worker_status_file.exists():
-                ws = json.loads(worker_status_file.read_text(encoding="utf-8"))
-                ws["running"] = False
-                ws["status_message"] = "Bot durduruluyor..."
-                ws["timestamp"] = time.time()
-                worker_status_file.write_text(json.dumps(ws, ensure_ascii=False), encoding="utf-8")
+            if state.get("status") is not None:
+                state.update("status", running=False, status_message="Bot durduruluyor...", timestamp=time.time())
         except Exception as e:
-            print(f"[STOP] worker_status.json güncelleme hatası: {e}")
+            print(f"[STOP] Worker status güncelleme hatası: {e}")
     
     messages = {
         "pause": "Kayıt duraklatma komutu gönderildi",
@@ -1380,56 +1802,67 @@ async def bot_command(payload: dict = Body(...)):
     
     return {"ok": True, "message": messages.get(command, "Komut gönderildi")}
 
+def _recover_report(task_id: str = None):
+    """Sıfırlamadan önce transkriptten rapor üretip kaydet (hata sıfırlamayı durdurmaz)"""
+    try:
+        text = load_transcript(task_id=task_id).strip()
+        if len(text) > 50:
+            print(f"[RESET] Sıfırlama öncesi veri kurtarılıyor... ({len(text)} karakter)")
+            from rapor import generate_meeting_report, save_to_supabase, start_transcript_upload
+            # API process'inde TASK_ID yok: toplantı açıkça verilir
+            transcript_upload = start_transcript_upload(text, task_id)  # Rapor üretilirken yüklenir
+            report_path, report_url = None, None
+            try:
+                report_path, report_url = generate_meeting_report(text, task_id)
+            finally:
+                # Rapor yoksa DB kaydı da yok: transkript sahipsiz kalmasın
+                if transcript_upload and not (report_path and report_url):
+                    transcript_upload.discard()
+            if report_path and report_url:
+                save_to_supabase(report_path, report_url, text, transcript_upload, task_id=task_id)
+    except Exception as e:
+        print(f"[ERROR] Reset raporlama hatası: {e}")
+
+def _process_task_id(proc, cmdline: list):
+    """Recorder process'inin görev kimliği: --task-id argümanı, yoksa TASK_ID ortam değişkeni"""
+    if "--task-id" in cmdline[:-1]:
+        return cmdline[cmdline.index("--task-id") + 1]
+    try:
+        return proc.environ().get("TASK_ID") or None
+    except Exception:
+        return None
+
 @app.post("/force-reset")
-async def force_reset():
+async def force_reset(task_id: str = Query(None), user_id: str = Query(None)):
     """
-    Sistemi zorla sıfırla - Tüm işlemleri durdur ve temizle
-    Kullanım: Toplantı sonrası sistem kilitlendiyse
+    Toplantıyı zorla sıfırla - o toplantının işlemlerini durdur ve temizle
+    Kullanım: Toplantı sonrası sistem kilitlendiyse / worker ölü ama görev aktif kaldıysa
     """
     print("\n" + "="*60)
     print("[API] FORCE RESET çağrıldı")
     print("="*60)
     
     try:
-        command = {
-            "command": "force_reset",
-            "timestamp": time.time(),
-            "data": {},
-            "processed": False
-        }
-        BOT_COMMAND_FILE.write_text(
-            json.dumps(command, ensure_ascii=False),
-            encoding="utf-8"
-        )
+        state = resolve_meeting(task_id, user_id)
+        save_bot_command("force_reset", task_id=state.task_id)
         print("[OK] Worker'a force_reset komutu gönderildi")
         
-        # ZORLA KAPATMADAN ÖNCE: Kurtarabildiğin veriyi kurtar
-        try:
-             p = Path("latest_transcript.txt")
-             if p.exists():
-                 text = p.read_text(encoding="utf-8").strip()
-                 if len(text) > 50:
-                     print(f"[RESET] Sıfırlama öncesi veri kurtarılıyor... ({len(text)} karakter)")
-                     report_path, report_url = generate_meeting_report(text)
-                     if report_path and report_url:
-                         save_to_supabase(report_path, report_url, text)
-        except Exception as e:
-            print(f"[ERROR] Reset raporlama hatası: {e}")
+        # ZORLA KAPATMADAN ÖNCE: Kurtarabildiğin veriyi kurtar (Gemini çağrısı event loop'u bloklamasın)
+        await asyncio.to_thread(_recover_report, state.task_id)
 
+        state.delete("command")
         files_to_clean = [
-            "data/bot_task.json",
-            "data/bot_command.json",
-            "data/worker_status.json",
             "participants.json",
             "current_meeting_participants.json",
             "speaker_activity_log.json",
             "live_transcript_cache.json",
-            "latest_transcript.txt"
+            "latest_transcript.txt",
+            SEGMENTS_FILE
         ]
         
         cleaned_count = 0
         for filename in files_to_clean:
-            filepath = Path(filename)
+            filepath = meeting_file(filename, state.task_id)
             if filepath.exists():
                 try:
                     filepath.unlink()
@@ -1438,57 +1871,62 @@ async def force_reset():
                 except Exception as e:
                     print(f"[WARN] {filename} silinemedi: {e}")
         
-        empty_task = {
-            "active": False,
-            "meeting_id": "",
-            "passcode": "",
-            "bot_name": "Sesly Bot",  # SABİT DEĞER
-            "timestamp": time.time()
-        }
-        BOT_TASK_FILE.write_text(
-            json.dumps(empty_task, ensure_ascii=False),
-            encoding="utf-8"
-        )
-        print("[OK] bot_task.json sıfırlandı")
+        if state.legacy:
+            empty_task = {
+                "active": False,
+                "meeting_id": "",
+                "passcode": "",
+                "bot_name": "Sesly Bot",  # SABİT DEĞER
+                "timestamp": time.time()
+            }
+            state.set("task", empty_task)
+        else:
+            # Görev belgesi (user_id, başlık) kalır; sadece pasife çekilir
+            state.update("task", active=False)
+        print("[OK] Görev sıfırlandı")
         
         reset_status = {
+            "running": False,
             "zoom_running": False,
             "recording": False,
             "paused": False,
             "status_message": "Sistem sıfırlandı - Yeni toplantı için hazır",
             "timestamp": time.time()
         }
-        Path("data/worker_status.json").write_text(
-            json.dumps(reset_status, ensure_ascii=False),
-            encoding="utf-8"
-        )
-        print("[OK] worker_status.json güncellendi")
+        state.set("status", reset_status)
+        print("[OK] Worker status güncellendi")
         
         import psutil
         killed_procs = 0
         
+        # Sadece bu toplantının process'leri: aynı host'taki diğer toplantılar çalışmaya devam eder
         for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
             try:
-                cmdline = ' '.join(proc.info['cmdline'] or [])
+                cmdline = proc.info['cmdline'] or []
                 
-                if any(script in cmdline for script in [
+                if not any(script in ' '.join(cmdline) for script in [
                     'zoom_bot_recorder.py',
                     'zoom_vision_monitor.py'
                 ]):
-                    print(f"[KILL] Process durduruluyor: {proc.info['name']} (PID: {proc.pid})")
-                    proc.kill()
-                    killed_procs += 1
+                    continue
+                if _process_task_id(proc, cmdline) != state.task_id:
+                    continue
+                print(f"[KILL] Process durduruluyor: {proc.info['name']} (PID: {proc.pid})")
+                proc.kill()
+                killed_procs += 1
             except:
                 pass
         
         if killed_procs > 0:
             print(f"[OK] {killed_procs} Python process durduruldu")
         
-        try:
-            os.system("taskkill /F /IM Zoom.exe 2>nul")
-            print("[OK] Zoom kapatıldı")
-        except:
-            pass
+        # Masaüstü Zoom'u kapatmak host'taki tüm toplantıları etkiler: sadece eski tek toplantılı kurulumda
+        if state.task_id is None:
+            try:
+                os.system("taskkill /F /IM Zoom.exe 2>nul")
+                print("[OK] Zoom kapatıldı")
+            except:
+                pass
         
         print("\n" + "="*60)
         print("[SUCCESS] Force reset tamamlandı")
@@ -1498,7 +1936,7 @@ async def force_reset():
         
         return {
             "ok": True,
-            "message": "Sistem zorla sıfırlandı",
+            "message": "Bot durumu sıfırlandı",
             "cleaned_files": cleaned_count,
             "killed_processes": killed_procs,
             "status": "ready"
@@ -1517,28 +1955,233 @@ async def force_reset():
 
 
 @app.get("/bot-command-status")
-async def bot_command_status():
-    if not BOT_COMMAND_FILE.exists():
-        return {"command": None}
-    
+async def bot_command_status(task_id: str = Query(None), user_id: str = Query(None)):
     try:
-        cmd = json.loads(BOT_COMMAND_FILE.read_text(encoding="utf-8"))
-        return cmd
-    except:
+        return resolve_meeting(task_id, user_id).get("command") or {"command": None}
+    except Exception:
         return {"command": None}
 # =========================================================
 # DOWNLOAD REPORT
 # =========================================================
 @app.get("/download-report")
-async def download_report():
+async def download_report(user_id: str = Query(None), task_id: str = Query(None)):
     """En son PDF raporunu indir (eski endpoint - yeni /download-pdf kullanın)"""
     # Yeni endpoint'e yönlendir
-    return await download_pdf()
+    return await download_pdf(user_id=user_id, task_id=task_id)
+
+
+# ============================================================
+# CANLI OLAYLAR (SSE)
+# ============================================================
+# Dashboard /bot-status ve /latest-pdf'i yoklamak yerine /events'e bağlanır:
+#   status            → bot_status_payload() (toplantı başına, değiştiğinde)
+#   report            → latest_report_payload() (yeni rapor oluştuğunda; kullanıcı başına)
+#   segment           → transkripte eklenen segment (seq, offset, text, watermark)
+#   transcript_reset  → yeni toplantı, transkript temizlendi
+# status / segment / transcript_reset olaylarının "meeting" alanı toplantının
+# task_id'sidir; istemci sadece kendi toplantısınınkileri alır (?task_id=).
+# "report" olayının "audience" alanı raporun sahibi kullanıcıdır (misafir: None);
+# istemci sadece kendi son raporunu alır (?user_id=), başkasınınki gönderilmez.
+# Worker'ların yazdığı durum başka process'ten geldiği için tek bir izleyici
+# meeting_state sürümünü (state_version) kontrol eder; sadece bağlı istemci
+# varken ve değişiklik olduğunda durumlar okunur.
+STATUS_WATCH_INTERVAL = 1.0   # Durum sürümü kontrol aralığı (saniye)
+STATUS_REFRESH_SECONDS = 5.0  # Sürüm değişmese de durum bu aralıkla yeniden hesaplanır (heartbeat / metrikler)
+SSE_KEEPALIVE_SECONDS = 15.0
+
+
+def _file_signature(*paths) -> tuple:
+    sig = []
+    for path in paths:
+        try:
+            st = Path(path).stat()
+            sig.append((st.st_mtime_ns, st.st_size))
+        except OSError:
+            sig.append(None)
+    return tuple(sig)
+
+
+def _status_key(task_id: str = None) -> str:
+    """Toplantının durum anlık görüntüsünün event_hub'daki adı"""
+    return f"status:{task_id or 'legacy'}"
+
+
+def _report_key(user_id: str = None) -> str:
+    """Kullanıcının son rapor anlık görüntüsünün event_hub'daki adı"""
+    return f"report:{user_id or 'guest'}"
+
+
+# Bağlı /events abonelerinin kullanıcıları (None: misafir) → abone sayısı
+_report_audiences = Counter()
+
+
+def _meeting_filter(task_id: str = None, user_id: str = None):
+    """
+    /events aboneliği: "meeting" alanı olan olaylardan sadece bu toplantınınkiler,
+    "report" olaylarından sadece bu kullanıcınınki
+    """
+    def accept(event: str, data: dict) -> bool:
+        if event == "report":
+            return data.get("audience") == (user_id or None)
+        return "meeting" not in data or data["meeting"] == task_id
+    return accept
+
+
+def report_state_payload(user_id: str = None) -> dict:
+    """Kullanıcının (user_id yoksa kullanıcısız raporların) son raporu, "report" olayı olarak"""
+    payload = latest_report_payload(user_id, guest=not user_id)
+    return {**payload, "audience": user_id or None}
+
+
+def _refresh_reports(audiences) -> None:
+    for user_id in audiences:
+        event_hub.set_state(_report_key(user_id), report_state_payload(user_id), event="report")
+
+
+def _refresh_statuses(watched: set) -> set:
+    """Aktif toplantıların (+ az önce biten ve eski kurulumun) durumunu yayınla"""
+    active = {t["task_id"] for t in active_meetings()}
+    for task_id in watched | active | {None}:
+        event_hub.set_state(_status_key(task_id), bot_status_payload(task_id), event="status")
+    for task_id in watched - active:
+        event_hub.clear_state(_status_key(task_id))  # Son durumu gönderildi, artık izlenmez
+    return active
+
+
+async def status_watcher():
+    """Durum / rapor değişikliklerini event_hub'a aktaran tek arka plan görevi"""
+    last_state_version = last_report_sig = None
+    last_audiences = set()
+    last_status_refresh = 0.0
+    watched = set()
+    while True:
+        await asyncio.sleep(STATUS_WATCH_INTERVAL)
+        if not event_hub.subscriber_count:
+            last_state_version = last_report_sig = None  # Yeni bağlanan güncel durumu alsın
+            continue
+        try:
+            version = await asyncio.to_thread(state_version)
+            if version != last_state_version or time.time() - last_status_refresh >= STATUS_REFRESH_SECONDS:
+                watched = await asyncio.to_thread(_refresh_statuses, watched)
+                last_state_version = version
+                last_status_refresh = time.time()
+
+            report_sig = _file_signature(REGISTRY_FILE)
+            audiences = set(_report_audiences)
+            if report_sig != last_report_sig or audiences != last_audiences:
+                await asyncio.to_thread(_refresh_reports, audiences)
+                last_report_sig = report_sig
+                last_audiences = audiences
+        except Exception as e:
+            print(f"[EVENTS] Durum izleme hatası: {e}")
+
+
+@app.get("/events")
+async def events(request: Request, task_id: str = Query(None), user_id: str = Query(None)):
+    """
+    Canlı durum / transkript / rapor olayları (Server-Sent Events).
+    task_id verilmezse kullanıcının bağlandığı andaki son aktif toplantısı.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    task_id = (await asyncio.to_thread(resolve_meeting, task_id, user_id)).task_id
+    if event_hub.get_state(_status_key(task_id)) is None:
+        # İzleyici henüz çalışmadıysa ilk bağlanan beklemesin
+        event_hub.set_state(_status_key(task_id), await asyncio.to_thread(bot_status_payload, task_id),
+                            event="status")
+    user_id = user_id or None
+    _report_audiences[user_id] += 1
+    if event_hub.get_state(_report_key(user_id)) is None:
+        await asyncio.to_thread(_refresh_reports, [user_id])
+    queue, initial = event_hub.subscribe(last_event_id, accept=_meeting_filter(task_id, user_id))
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            for item in initial:
+                yield format_sse(*item)
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                if event_hub.is_close(item):
+                    return
+                yield format_sse(*item)
+        finally:
+            event_hub.unsubscribe(queue)
+            _report_audiences[user_id] -= 1
+            if _report_audiences[user_id] <= 0:
+                del _report_audiences[user_id]
+                event_hub.clear_state(_report_key(user_id))  # Bu kullanıcıya bağlı abone kalmadı
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"  # nginx arkasında tamponlamayı kapat
+    })
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match başlığı verilen ETag'i içeriyor mu?"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in [t.strip() for t in header.split(",")]
 
 
 @app.get("/live-transcript")
-async def get_live_transcript():
-    """Canlı transkript cache'ini döndür"""
+async def get_live_transcript(request: Request, after: int = Query(None), recording: str = Query(None),
+                              task_id: str = Query(None)):
+    """
+    Canlı transkript. Segment deposu doluysa sadece kesintisiz (önünde eksik
+    segment olmayan) kısım zaman sırasıyla döner; watermark hangi seq'e kadar
+    kesinleştiğini gösterir. Depo boşsa eski live_transcript_cache.json.
+
+    Artımlı kullanım: ?after=<seq>&recording=<id> sadece aktif kayıt oturumunda
+    seq'i after'dan büyük segmentleri döner; istemci yanıttaki next_after ve
+    recording'i bir sonraki istekte gönderir (yeniden bağlanınca da kaldığı
+    yerden devam eder). recording değiştiyse (recorder yeniden başladı) yeni
+    oturumun tamamı döner ve "reset": true işaretlenir. Değişiklik yoksa
+    If-None-Match ile 304 (gövdesiz) döner.
+
+    task_id verilmezse en son aktif toplantının (yoksa eski tek toplantının) transkripti.
+    """
+    store = get_transcript_store(task_id=resolve_meeting(task_id).task_id)
+    if len(store):
+        etag = f'"{store.version()}-{after}-{recording}"'
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+        records = store.records(contiguous_only=True)
+        watermark = store.watermark()
+        current = watermark["recording"]
+        reset = after is not None and recording is not None and recording != current
+        if after is not None:
+            cursor = 0 if reset else after
+            records = [r for r in records if r.get("recording") == current and r.get("seq", 0) > cursor]
+        last_seq = max((r.get("seq", 0) for r in records if r.get("recording") == current),
+                       default=0 if reset else (after or 0))
+        return JSONResponse(content={
+            "ok": True,
+            "segments": [
+                {k: r.get(k) for k in ("seq", "start_time", "duration", "speaker", "text")}
+                for r in records
+            ],
+            "total_blocks": len(records),
+            "last_update": records[-1]["time"] if records else 0,
+            "recording": current,
+            "next_after": last_seq,
+            "reset": reset,
+            "watermark": watermark
+        }, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
     cache_file = Path("live_transcript_cache.json")
     
     if not cache_file.exists():
@@ -1557,48 +2200,41 @@ async def get_live_transcript():
         return {"ok": False, "error": str(e)}
 
 @app.get("/latest-pdf")
-async def get_latest_pdf():
-    """En yeni Raporu (PDF veya HTML) döndür"""
+async def get_latest_pdf(user_id: str = Query(None), task_id: str = Query(None)):
+    """
+    En yeni Raporu (PDF veya HTML) döndür. user_id / task_id verilirse o
+    kullanıcının / toplantının son raporu (report_registry.py).
+    """
+    return latest_report_payload(user_id, task_id)
+
+
+def latest_report_payload(user_id: str = None, task_id: str = None, guest: bool = False) -> dict:
+    """/latest-pdf ve /events "report" olayının ortak içeriği"""
     try:
-        temp_dir = Path("temp_reports")
-        if not temp_dir.exists():
-            return {"ok": False, "error": "Rapor dizini bulunamadı"}
-        
-        # Hem PDF hem HTML ara
-        files = list(temp_dir.glob("Toplanti_Raporu_*"))
-        
-        # Sadece .pdf ve .html al
-        valid_files = [f for f in files if f.suffix in ['.pdf', '.html']]
-        
-        if not valid_files:
+        entry = report_registry.latest(user_id=user_id, task_id=task_id, guest=guest)
+        if not entry:
             return {"ok": False, "error": "Rapor bulunamadı"}
-            
-        # En yeniye göre sırala
-        latest_file = sorted(valid_files, key=lambda x: x.stat().st_mtime, reverse=True)[0]
-        
+
         return {
-            "ok": True, 
-            "pdf_path": str(latest_file),
-            "type": "html" if latest_file.suffix == '.html' else "pdf"
+            "ok": True,
+            "pdf_path": entry["path"] if entry["local"] else None,
+            "type": entry["type"],
+            "url": entry.get("url"),
+            "user_id": entry.get("user_id"),
+            "task_id": entry.get("task_id"),
+            "title": entry.get("title"),
+            "created": entry.get("created")
         }
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
 @app.get("/download-pdf")
-async def download_pdf():
-    """En yeni Raporu indir"""
+async def download_pdf(user_id: str = Query(None), task_id: str = Query(None)):
+    """En yeni Raporu indir (user_id / task_id ile kapsamlı)"""
     try:
-        temp_dir = Path("temp_reports")
-        if not temp_dir.exists():
-            return JSONResponse(status_code=404, content={"ok": False, "error": "Rapor dizini yok"})
-        
-        files = list(temp_dir.glob("Toplanti_Raporu_*"))
-        valid_files = [f for f in files if f.suffix in ['.pdf', '.html']]
-        
-        if valid_files:
-            # En yenisi
-            latest = sorted(valid_files, key=lambda x: x.stat().st_mtime, reverse=True)[0]
-            
+        entry = report_registry.latest(user_id=user_id, task_id=task_id)
+        if entry and entry["local"]:
+            latest = Path(entry["path"])
             media_type = "text/html" if latest.suffix == ".html" else "application/pdf"
             
             return FileResponse(
@@ -1618,22 +2254,30 @@ async def download_pdf():
         )
 
 @app.get("/download-transcript")
-async def download_transcript():
-    """En yeni transkripti indir"""
+async def download_transcript(request: Request, task_id: str = Query(None)):
+    """Toplantının (varsayılan: en son aktif) transkriptini indir (değişmediyse If-None-Match ile 304)"""
     try:
-        transcript_file = Path("latest_transcript.txt")
+        # Segment kayıtlarından düz metni üret (değişmediyse dosya yeniden yazılmaz)
+        transcript_file = get_transcript_store(task_id=resolve_meeting(task_id).task_id).export()
         if not transcript_file.exists():
             return JSONResponse(
                 status_code=404,
                 content={"ok": False, "error": "Transkript bulunamadı"}
             )
-        
+
+        st = transcript_file.stat()
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
         return FileResponse(
             path=str(transcript_file),
             media_type="text/plain",
             filename="transcript.txt",
             headers={
-                "Content-Disposition": 'attachment; filename="transcript.txt"'
+                "Content-Disposition": 'attachment; filename="transcript.txt"',
+                "ETag": etag,
+                "Cache-Control": "no-cache"
             }
         )
     except Exception as e:
@@ -1734,7 +2378,7 @@ async def delete_account_endpoint(payload: dict = Body(...)):
     if not user_id:
         return {"ok": False, "error": "User ID gerekli"}
 
-    success = delete_user_account(user_id)
+    success = await adelete_user_account(user_id)
     if success:
         return {"ok": True, "message": "Hesap silindi"}
     else:
@@ -8,6 +8,7 @@ import time
 from pathlib import Path
 import subprocess
 
+import workspace
 
 # Rapor için
 try:
@@ -124,7 +125,8 @@ def cleanup_files(keep_pdfs=True, close_zoom=False, verbose=True, delete_task_fi
         Path("speaker_activity_log.json"),
         Path("live_transcript_cache.json"),
         Path("latest_transcript.txt"),
-        Path("recorder_status.json")
+        Path("transcript_segments.jsonl"),
+        workspace.task_file("recorder_status.json")
     ]
     
     # PDF korunacaksa WORKER_STATUS ve current_meeting_participants.json'ı da temizle
@@ -144,10 +146,10 @@ def cleanup_files(keep_pdfs=True, close_zoom=False, verbose=True, delete_task_fi
                 if verbose:
                     print(f"[WARN] {file.name} silinemedi: {e}")
 
-    # ZOOM SEGMENTS KLASÖRÜNÜ TEMİZLE
+    # SEGMENT KLASÖRÜNÜ TEMİZLE (sadece bu görevin klasörü; diğer botlara dokunma)
     try:
         import tempfile
-        segment_dir = Path(tempfile.gettempdir()) / "zoom_segments"
+        segment_dir = workspace.segment_dir(create=False)
         if segment_dir.exists():
             for item in segment_dir.glob("*"):
                 try:
@@ -252,6 +254,7 @@ def start_recorder(platform: str):
             if old_transcript.exists():
                 old_transcript.unlink()
                 print("[CLEANUP] Start öncesi eski transkript silindi.")
+            Path("transcript_segments.jsonl").unlink(missing_ok=True)
         except: pass
 
         log_path = (log_dir / f"recorder_output_{platform}.log").resolve()
@@ -337,7 +340,8 @@ def handle_zoom_task(task: dict):
         # delete_task_file=False çünkü task daha yeni oluşturuldu!
         cleanup_files(keep_pdfs=True, close_zoom=True, verbose=True, delete_task_file=False) # Zoom.exe'yi kapat, web'den gireceğiz
         if Path("data/bot_command.json").exists(): Path("data/bot_command.json").unlink()
-        if Path("stop_recording.signal").exists(): Path("stop_recording.signal").unlink()
+        stop_signal = workspace.task_file("stop_recording.signal")
+        if stop_signal.exists(): stop_signal.unlink()
     except Exception as e:
         print(f"[INIT ERROR] Temizlik hatası: {e}")
 
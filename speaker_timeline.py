@@ -0,0 +1,176 @@
+"""
+Speaker Timeline Index
+======================
+Worker'ların yazdığı konuşmacı geçmişini (speaker_timeline.jsonl) zaman
+sıralı dizilerde tutar; "[t0, t1] aralığında kim konuştu?" sorusu bisect ile
+O(log n) cevaplanır.
+
+- JSONL append-only olduğu için her sorguda sadece dosyaya YENİ eklenen
+  satırlar okunur (offset takibi); dosya kısalırsa (yeni toplantı) indeks sıfırlanır.
+- JSONL yoksa / boşsa eski format speaker_activity_log.json (JSON liste)
+  kullanılır; bu dosya sadece boyutu/mtime'ı değiştiğinde yeniden parse edilir.
+
+Recorder, server ve rapor aynı modülü kullanır. Dosyalar toplantı başınadır
+(workspace.meeting_file: görev varsa data/<task_id>_speaker_timeline.jsonl).
+"""
+
+import json
+import threading
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+from workspace import meeting_file
+
+TIMELINE_FILE = "speaker_timeline.jsonl"
+LEGACY_LOG_FILE = "speaker_activity_log.json"
+
+
+def _entry_speakers(entry: dict) -> list:
+    # Zoom/Meet 'speakers', Teams 'current_speakers' kullanıyor
+    return entry.get("speakers") or entry.get("current_speakers") or []
+
+
+class SpeakerTimeline:
+    """Konuşmacı kayıtlarının artımlı, zaman sıralı indeksi (thread-safe)"""
+
+    def __init__(self, path=TIMELINE_FILE, legacy_path=LEGACY_LOG_FILE):
+        self.path = Path(path)
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._times = []
+        self._speakers = []
+        self._offset = 0
+        self._partial = ""
+        self._source = None
+        self._legacy_sig = None
+
+    def _add(self, ts: float, speakers: list):
+        if not self._times or ts >= self._times[-1]:
+            self._times.append(ts)
+            self._speakers.append(speakers)
+        else:
+            # Nadiren sırasız gelen kayıt (farklı process'ler): yerine yerleştir
+            i = bisect_right(self._times, ts)
+            self._times.insert(i, ts)
+            self._speakers.insert(i, speakers)
+
+    # --------------------------------------------------------
+    # Dosyadan artımlı yükleme
+    # --------------------------------------------------------
+    def _refresh_jsonl(self) -> bool:
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            return False
+        if size == 0 and self._source != "jsonl":
+            return False  # Boş JSONL: legacy kaynağı (önbellekli) kullanılmaya devam eder
+        if self._source != "jsonl" or size < self._offset:
+            self._reset()
+            self._source = "jsonl"
+        if size == self._offset:
+            return bool(self._times)
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            f.seek(self._offset)
+            chunk = f.read()
+            self._offset = f.tell()
+
+        lines = (self._partial + chunk).split("\n")
+        self._partial = lines.pop()  # Yarım yazılmış son satır
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                self._add(float(entry["ts"]), _entry_speakers(entry))
+            except (ValueError, KeyError, TypeError):
+                pass
+        return bool(self._times)
+
+    def _refresh_legacy(self):
+        if not self.legacy_path:
+            return
+        try:
+            st = self.legacy_path.stat()
+        except OSError:
+            return
+        sig = (st.st_size, st.st_mtime_ns)
+        if self._source == "legacy" and sig == self._legacy_sig:
+            return
+        try:
+            data = json.loads(self.legacy_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return  # Yazılırken okundu, bir sonraki sorguda tekrar denenir
+        self._reset()
+        self._source = "legacy"
+        self._legacy_sig = sig
+        if isinstance(data, list):
+            for entry in sorted(data, key=lambda e: e.get("timestamp", 0)):
+                self._add(float(entry.get("timestamp", 0)), _entry_speakers(entry))
+
+    def refresh(self):
+        """Dosyalarda yeni kayıt varsa indekse ekle"""
+        with self._lock:
+            if not self._refresh_jsonl():
+                self._refresh_legacy()
+
+    # --------------------------------------------------------
+    # Sorgular
+    # --------------------------------------------------------
+    def between(self, t0: float, t1: float) -> list:
+        """[t0, t1] aralığındaki kayıtlar: [(ts, speakers), ...] (zaman sıralı)"""
+        self.refresh()
+        with self._lock:
+            lo = bisect_left(self._times, t0)
+            hi = bisect_right(self._times, t1)
+            return list(zip(self._times[lo:hi], self._speakers[lo:hi]))
+
+    def at(self, t: float, max_age: float = None):
+        """t anında aktif olan konuşmacılar (t'den önceki son kayıt); yoksa None"""
+        self.refresh()
+        with self._lock:
+            i = bisect_right(self._times, t) - 1
+            if i < 0 or (max_age is not None and t - self._times[i] > max_age):
+                return None
+            return self._speakers[i]
+
+    def nearest(self, t: float, tolerance: float):
+        """t'ye en yakın (± tolerance) kaydın konuşmacıları; yoksa None"""
+        self.refresh()
+        with self._lock:
+            i = bisect_left(self._times, t)
+            best = None
+            for j in (i - 1, i):
+                if 0 <= j < len(self._times):
+                    diff = abs(self._times[j] - t)
+                    if diff <= tolerance and (best is None or diff < best[0]):
+                        best = (diff, self._speakers[j])
+            return best[1] if best else None
+
+    def entries(self) -> list:
+        """Tüm kayıtlar (zaman sıralı)"""
+        self.refresh()
+        with self._lock:
+            return list(zip(self._times, self._speakers))
+
+    def __len__(self):
+        return len(self._times)
+
+
+_timelines = {}
+_timelines_lock = threading.Lock()
+
+
+def get_timeline(path=None, legacy_path=None, task_id: str = None) -> SpeakerTimeline:
+    """Process içinde dosya başına tek indeks (yol verilmezse toplantının / TASK_ID'nin dosyaları)"""
+    path = path or meeting_file(TIMELINE_FILE, task_id)
+    legacy_path = legacy_path or meeting_file(LEGACY_LOG_FILE, task_id)
+    key = (str(path), str(legacy_path))
+    with _timelines_lock:
+        timeline = _timelines.get(key)
+        if timeline is None:
+            timeline = _timelines[key] = SpeakerTimeline(path, legacy_path)
+        return timeline
@@ -19,6 +19,10 @@ if '/app' not in sys.path:
 from celery import Celery
 from celery.exceptions import MaxRetriesExceededError
 
+from workspace import workspace_dir
+from meeting_state import meeting
+import db_utils
+
 # Redis connection
 REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 
@@ -44,18 +48,18 @@ app.conf.update(
 # ============================================================
 
 def get_supabase_client():
-    """Supabase client oluştur"""
-    from supabase import create_client
-    url = os.getenv('SUPABASE_URL')
-    key = os.getenv('SUPABASE_SERVICE_ROLE_KEY') or os.getenv('SUPABASE_KEY')
-    if not url or not key:
+    """Process'in paylaşılan Supabase istemcisi (db_utils; her çağrıda yeni bağlantı kurulmaz)"""
+    client = db_utils.get_client()
+    if client is None:
         raise ValueError("Supabase credentials missing!")
-    return create_client(url, key)
+    return client
 
 def update_task_status(task_id: str, status: str, error: str = None):
-    """Task status güncelle"""
+    """
+    Task status güncelle. Ara durumlar (processing) toplu yazılır; son durumlar
+    (completed / failed) bekleyenlerle birlikte hemen yazılır.
+    """
     try:
-        client = get_supabase_client()
         update_data = {"status": status}
         
         if status == "processing":
@@ -66,7 +70,7 @@ def update_task_status(task_id: str, status: str, error: str = None):
         if error:
             update_data["error_message"] = error[:500]  # Max 500 char
         
-        client.table("task_queue").update(update_data).eq("id", task_id).execute()
+        db_utils.status_batcher.update(task_id, update_data, flush=status in ("completed", "failed"))
         print(f"[TASK] {task_id} -> {status}")
     except Exception as e:
         print(f"[ERROR] Status update failed: {e}")
@@ -93,6 +97,9 @@ def process_meeting(self, task_id: str, meeting_url: str, platform: str, user_id
     print(f"[WORKER] URL: {meeting_url}")
     print(f"{'='*60}\n")
     
+    # Worker ve recorder dosyaları bu görevin klasörüne yazılır (TASK_ID alt process'lere miras kalır)
+    os.environ["TASK_ID"] = task_id
+
     try:
         # 1. Status güncelle
         update_task_status(task_id, 'processing')
@@ -111,7 +118,7 @@ def process_meeting(self, task_id: str, meeting_url: str, platform: str, user_id
         update_task_status(task_id, 'completed')
         
         # 4. Dashboard'u sıfırla
-        _reset_bot_task()
+        _reset_bot_task(task_id)
         
         print(f"\n[SUCCESS] Task tamamlandı: {task_id}\n")
         return {"success": True, "task_id": task_id}
@@ -125,17 +132,18 @@ def process_meeting(self, task_id: str, meeting_url: str, platform: str, user_id
             raise self.retry(exc=e, countdown=60)
         except MaxRetriesExceededError:
             update_task_status(task_id, 'failed', error_msg)
-            _reset_bot_task()
+            _reset_bot_task(task_id)
             return {"success": False, "task_id": task_id, "error": error_msg}
 
-def _reset_bot_task():
-    """Task bittikten sonra bot_task.json'ı sıfırla"""
+def _reset_bot_task(task_id: str):
+    """Task bittikten sonra toplantının görev kaydını pasife çek (meeting_state)"""
     try:
-        task_file = Path("data/bot_task.json")
-        task_file.write_text('{"active": false}', encoding="utf-8")
-        print("[CLEANUP] bot_task.json sıfırlandı")
+        state = meeting(task_id)
+        if state.get("task") is not None:
+            state.update("task", active=False)
+        print(f"[CLEANUP] Görev pasife çekildi: {task_id}")
     except Exception as e:
-        print(f"[WARN] bot_task.json sıfırlanamadı: {e}")
+        print(f"[WARN] Görev sıfırlanamadı ({task_id}): {e}")
 
 # ============================================================
 # PLATFORM-SPECIFIC RUNNERS
@@ -149,7 +157,7 @@ def run_zoom_task(meeting_url: str, task_id: str):
         return result
     finally:
         # Geçici dosyaları temizle
-        work_dir = Path(f"/tmp/workers/{task_id}")
+        work_dir = workspace_dir(task_id, create=False)
         cleanup_work_dir(work_dir, task_id)
 
 def run_meet_task(meeting_url: str, task_id: str):
@@ -159,7 +167,7 @@ def run_meet_task(meeting_url: str, task_id: str):
         result = asyncio.run(meet_runner(meeting_url))
         return result
     finally:
-        work_dir = Path(f"/tmp/workers/{task_id}")
+        work_dir = workspace_dir(task_id, create=False)
         cleanup_work_dir(work_dir, task_id)
 
 def run_teams_task(meeting_url: str, task_id: str):
@@ -169,7 +177,7 @@ def run_teams_task(meeting_url: str, task_id: str):
         result = asyncio.run(teams_runner(meeting_url))
         return result
     finally:
-        work_dir = Path(f"/tmp/workers/{task_id}")
+        work_dir = workspace_dir(task_id, create=False)
         cleanup_work_dir(work_dir, task_id)
 
 def cleanup_work_dir(work_dir: Path, task_id: str):
@@ -5,6 +5,8 @@ import asyncio
 import subprocess
 import traceback
 from pathlib import Path
+from workspace import recorder_command, task_file, meeting_file
+from meeting_state import meeting
 from teams_web_client import TeamsWebBot
 import logging
 
@@ -27,15 +29,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger("TeamsWorker")
 
-BOT_TASK_FILE = Path("data/bot_task.json")
-WORKER_STATUS_FILE = Path("data/worker_status.json")
-
 # Script Paths
 RECORDER_SCRIPT = "zoom_bot_recorder.py"
 RAPOR_SCRIPT = "rapor.py"
 
 def update_status(**kwargs):
-    """worker_status.json dosyasını güncelle."""
+    """Toplantının worker durumunu güncelle (meeting_state "status"; TASK_ID yoksa data/worker_status.json)."""
     status = {
         "running": False,  # FIXED: zoom_running -> running
         "recording": False,
@@ -45,19 +44,12 @@ def update_status(**kwargs):
         "timestamp": time.time(),
     }
 
-    if WORKER_STATUS_FILE.exists():
-        try:
-            old = json.loads(WORKER_STATUS_FILE.read_text(encoding="utf-8"))
-            status.update(old)
-        except Exception:
-            pass
+    state = meeting()
+    status.update(state.get("status") or {})
 
     status.update(kwargs)
     try:
-        WORKER_STATUS_FILE.write_text(
-            json.dumps(status, ensure_ascii=False, indent=2),
-            encoding="utf-8"
-        )
+        state.set("status", status)
     except Exception as e:
         logger.error(f"Status update error: {e}")
 
@@ -67,13 +59,13 @@ async def run_teams_task(meeting_url):
     recorder_proc = None
 
     try:
-        BOT_COMMAND_FILE = Path("data/bot_command.json")
-        STOP_SIGNAL_FILE = Path("stop_recording.signal")
+        state = meeting()
+        STOP_SIGNAL_FILE = task_file("stop_recording.signal")
         
-        if BOT_COMMAND_FILE.exists():
+        if state.get("command") is not None:
             try:
-                BOT_COMMAND_FILE.unlink()
-                logger.info("Eski bot komut dosyası temizlendi.")
+                state.delete("command")
+                logger.info("Eski bot komutu temizlendi.")
             except: pass
 
         if STOP_SIGNAL_FILE.exists():
@@ -85,11 +77,12 @@ async def run_teams_task(meeting_url):
         # Data dosyalarını temizle (Transkript, Katılımcılar vb.)
         files_to_clean = [
             "latest_transcript.txt", 
+            "transcript_segments.jsonl",
             "speaker_activity_log.json", 
             "current_meeting_participants.json"
         ]
         for fname in files_to_clean:
-            f = Path(fname)
+            f = meeting_file(fname)
             if f.exists():
                 try:
                     f.unlink()
@@ -125,14 +118,14 @@ async def run_teams_task(meeting_url):
         
         # Timeline dosyasını temizle (yeni toplantı için)
         try:
-            Path("speaker_timeline.jsonl").write_text("", encoding="utf-8")
+            meeting_file("speaker_timeline.jsonl").write_text("", encoding="utf-8")
             logger.info("Speaker timeline temizlendi.")
         except: pass
         
         try:
             # Recorder script'ini ayrı process olarak çalıştır
             # --platform teams argümanını ekle
-            recorder_proc = subprocess.Popen(["python", RECORDER_SCRIPT, "--platform", "teams"])
+            recorder_proc = subprocess.Popen(recorder_command(RECORDER_SCRIPT, "teams"))
             update_status(recording=True, status_message="🔴 Kayıt Alınıyor")
         except Exception as e:
             logger.error(f"Recorder hatası: {e}")
@@ -150,23 +143,21 @@ async def run_teams_task(meeting_url):
         # 5. Döngü: Toplantı Bitene Kadar Bekle
         logger.info("Toplantı izleniyor...")
         while True:
-            # NOT: bot_task.json kontrolü KALDIRILDI
-            # API dosyayı yeniden yazınca worker erkenden çıkıyordu (false positive)
-            # Stop komutu sadece bot_command.json ile gelir
+            # NOT: görev (task) kontrolü KALDIRILDI
+            # API görevi yeniden yazınca worker erkenden çıkıyordu (false positive)
+            # Stop komutu sadece meeting_state "command" belgesiyle gelir
 
             # Komut kontrolü (Stop/Pause)
-            BOT_COMMAND_FILE = Path("data/bot_command.json")
-            if BOT_COMMAND_FILE.exists():
-                try:
-                    cmd_data = json.loads(BOT_COMMAND_FILE.read_text(encoding="utf-8"))
-                    # Process edilmemiş ve 'stop' komutu ise
-                    if not cmd_data.get("processed", False) and cmd_data.get("command") == "stop":
-                         logger.info("🛑 STOP komutu alındı. Çıkış yapılıyor...")
-                         # Processed olarak işaretle
-                         cmd_data["processed"] = True
-                         BOT_COMMAND_FILE.write_text(json.dumps(cmd_data), encoding="utf-8")
-                         break
-                except: pass
+            try:
+                cmd_data = state.get("command")
+                # Process edilmemiş ve 'stop' komutu ise
+                if cmd_data and not cmd_data.get("processed", False) and cmd_data.get("command") == "stop":
+                     logger.info("🛑 STOP komutu alındı. Çıkış yapılıyor...")
+                     # Processed olarak işaretle
+                     cmd_data["processed"] = True
+                     state.set("command", cmd_data)
+                     break
+            except: pass
 
             # Toplantı bitti mi?
             if await bot.check_meeting_ended():
@@ -191,7 +182,7 @@ async def run_teams_task(meeting_url):
                     }
                     try:
                         # 1. Log History (Recorder bunu okur) - LIST FORMAT (Append)
-                        activity_log = Path("speaker_activity_log.json")
+                        activity_log = meeting_file("speaker_activity_log.json")
                         logs = []
                         if activity_log.exists():
                             try:
@@ -206,7 +197,7 @@ async def run_teams_task(meeting_url):
                         # ...
                         
                         # 3. Current Snapshot (UI/Backend integration)
-                        Path("current_meeting_participants.json").write_text(json.dumps(active_speakers, ensure_ascii=False), encoding="utf-8")
+                        meeting_file("current_meeting_participants.json").write_text(json.dumps(active_speakers, ensure_ascii=False), encoding="utf-8")
                     except: pass
             except Exception as e:
                 pass
@@ -226,7 +217,7 @@ async def run_teams_task(meeting_url):
         if recorder_proc:
             logger.info("Recorder durduruluyor (Graceful)...")
             # Signal dosyası oluştur (Recorder bunu bekliyor)
-            Path("stop_recording.signal").touch()
+            task_file("stop_recording.signal").touch()
             
             try:
                 # Recorder'ın işini bitirmesini bekle (Upload vs.)
@@ -267,6 +258,7 @@ async def run_teams_task(meeting_url):
                     "speaker_timeline.jsonl",
                     "speaker_activity_log.json",
                     "latest_transcript.txt",
+                    "transcript_segments.jsonl",
                     "current_meeting_participants.json",
                     "speaker_realtime_stats.json",
                     "debug_speaker_detection.txt",
@@ -275,7 +267,7 @@ async def run_teams_task(meeting_url):
                 
                 for filename in cleanup_files:
                     try:
-                        file_path = Path(filename)
+                        file_path = meeting_file(filename)
                         if file_path.exists():
                             file_path.unlink()
                             logger.info(f"  ✓ {filename} silindi")
@@ -295,23 +287,21 @@ async def run_teams_task(meeting_url):
         update_status(running=False, status_message="Görev Tamamlandı")
         
         # Task'i pasife çek
-        if BOT_TASK_FILE.exists():
-            try:
-                t = json.loads(BOT_TASK_FILE.read_text("utf-8"))
-                t["active"] = False
-                BOT_TASK_FILE.write_text(json.dumps(t, indent=2), "utf-8")
-            except:
-                pass
+        try:
+            if meeting().get("task") is not None:
+                meeting().update("task", active=False)
+        except:
+            pass
 
 async def main():
     logger.info("🤖 Teams Web Worker Başlatıldı")
     while True:
-        if not BOT_TASK_FILE.exists():
+        task = meeting().get("task")
+        if not task:
             await asyncio.sleep(2)
             continue
 
         try:
-            task = json.loads(BOT_TASK_FILE.read_text(encoding="utf-8"))
             if task.get("active") and task.get("platform") == "teams":
                 url = task.get("meeting_url")
                 if url:
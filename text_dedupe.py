@@ -0,0 +1,233 @@
+"""
+Segment Overlap Dedupe
+======================
+Ardışık segmentlerin transkriptleri sınırda örtüşebilir (chunk sınırında
+kesilen cümle iki segmentte de yazılır, retry farklı sınırla gelir).
+Transkript metnini her segmentte yeniden taramak yerine toplantı başına
+küçük bir parmak izi (fingerprint) indeksi tutulur:
+
+- Metin kelimelere ayrılır; SHINGLE_WORDS kelimelik her pencere (shingle)
+  Rabin–Karp rolling hash ile tek bir sayıya indirgenir.
+- Toplantı geneli: shingle hash → adet (tam tekrar segment tespiti).
+- Segment başına: son TAIL_WORDS kelimenin kelimeleri + shingle konumları
+  (sınır örtüşmesi tespiti).
+
+Karar:
+- Yeni segmentin shingle'larının DUPLICATE_RATIO kadarı zaten varsa → tekrar, eklenmez.
+- Yeni segmentin başı, zaman sırasında önceki segmentin sonuyla örtüşüyorsa
+  → sadece örtüşen baş kısım kırpılır, geri kalanı eklenir.
+- Transkriptin başka yerindeki kısa tekrar ifadeler ("evet, aynen öyle")
+  artık segmenti düşürmez.
+
+Benchmark (2 saatlik sentetik transkript):  python text_dedupe.py
+"""
+
+import re
+import zlib
+
+SHINGLE_WORDS = 8         # Shingle uzunluğu (kelime)
+TAIL_WORDS = 200          # Sınır kontrolü için segment sonunda saklanan kelime sayısı
+MIN_OVERLAP_SHINGLES = 2  # En az bu kadar ardışık shingle (= 9 kelime) örtüşmeli
+LEAD_SHINGLES = 4         # Örtüşme yeni segmentin ilk bu kadar shingle'ı içinde başlamalı
+END_SLACK_SHINGLES = 4    # Örtüşme önceki segmentin sonuna bu kadar shingle yakın bitmeli
+DUPLICATE_RATIO = 0.8     # Shingle'ların bu oranı zaten varsa segment tekrar sayılır
+
+_BASE = 1_000_003
+_MOD = (1 << 61) - 1
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list:
+    """Normalize kelimeler ve her kelimenin metindeki bitiş konumu: [(kelime, end), ...]"""
+    return [(m.group().casefold(), m.end()) for m in _WORD_RE.finditer(text)]
+
+
+def shingle_hashes(words: list, k: int = SHINGLE_WORDS) -> list:
+    """k kelimelik pencerelerin Rabin–Karp rolling hash'leri (len(words) - k + 1 adet)"""
+    if len(words) < k:
+        return []
+    values = [zlib.crc32(w.encode("utf-8")) + 1 for w in words]
+    top = pow(_BASE, k - 1, _MOD)
+    h = 0
+    for v in values[:k]:
+        h = (h * _BASE + v) % _MOD
+    hashes = [h]
+    for i in range(k, len(values)):
+        h = ((h - values[i - k] * top) * _BASE + values[i]) % _MOD
+        hashes.append(h)
+    return hashes
+
+
+class DedupeResult:
+    """check() sonucu: action = "append" | "trim" | "duplicate" """
+
+    __slots__ = ("action", "text", "overlap_words", "duplicate_ratio")
+
+    def __init__(self, action, text, overlap_words=0, duplicate_ratio=0.0):
+        self.action = action
+        self.text = text
+        self.overlap_words = overlap_words
+        self.duplicate_ratio = duplicate_ratio
+
+
+class MeetingFingerprints:
+    """Toplantı transkriptinin shingle indeksi (çağıran kilitler; transcript_store içinde)"""
+
+    def __init__(self, k: int = SHINGLE_WORDS, tail_words: int = TAIL_WORDS):
+        self.k = k
+        self.tail_words = tail_words
+        self.reset()
+
+    def reset(self):
+        self._counts = {}   # shingle hash → adet (tüm toplantı)
+        self._tails = {}    # segment id → (son kelimeler, {hash: konum})
+        self._checked = None  # Son check() sonucunun kelime/hash'leri (add() tekrar hesaplamasın)
+
+    def add(self, segment_id, text: str):
+        """Eklenen segmenti indekse kaydet"""
+        if self._checked and self._checked[0] == text:
+            _, words, hashes = self._checked
+        else:
+            words = [w for w, _ in tokenize(text)]
+            hashes = shingle_hashes(words, self.k)
+        self._checked = None
+
+        for h in hashes:
+            self._counts[h] = self._counts.get(h, 0) + 1
+        # Son TAIL_WORDS kelimenin shingle'ları = tüm hash'lerin son kısmı
+        start = max(0, len(words) - self.tail_words)
+        positions = {}
+        for i, h in enumerate(hashes[start:]):
+            positions[h] = i  # Aynı shingle tekrarlıyorsa en sondaki
+        self._tails[segment_id] = (words[start:], positions)
+
+    def _boundary_overlap(self, words: list, hashes: list, previous_id) -> int:
+        """Yeni segmentin başında, önceki segmentin sonuyla örtüşen kelime sayısı"""
+        prev = self._tails.get(previous_id)
+        if prev is None:
+            return 0
+        prev_words, positions = prev
+        last_pos = len(prev_words) - self.k
+        for i in range(min(LEAD_SHINGLES, len(hashes))):
+            p = positions.get(hashes[i])
+            if p is None:
+                continue
+            run = 1
+            while (i + run < len(hashes) and p + run <= last_pos
+                   and positions.get(hashes[i + run]) == p + run):
+                run += 1
+            if run < MIN_OVERLAP_SHINGLES or p + run - 1 < last_pos - END_SLACK_SHINGLES:
+                continue
+            # Hash çakışmasına karşı kelimeleri doğrula (Rabin–Karp)
+            span = run + self.k - 1
+            if words[i:i + span] != prev_words[p:p + span]:
+                continue
+            return i + span
+        return 0
+
+    def check(self, text: str, previous_id=None) -> DedupeResult:
+        """Yeni segment eklenmeden önce: tekrar mı, baştan kırpılmalı mı?"""
+        tokens = tokenize(text)
+        words = [w for w, _ in tokens]
+        hashes = shingle_hashes(words, self.k)
+        self._checked = (text, words, hashes)
+        if not hashes:
+            return DedupeResult("append", text)
+
+        seen = sum(1 for h in hashes if h in self._counts)
+        ratio = seen / len(hashes)
+        if ratio >= DUPLICATE_RATIO:
+            return DedupeResult("duplicate", "", len(words), ratio)
+
+        overlap = self._boundary_overlap(words, hashes, previous_id)
+        if overlap:
+            cut = tokens[overlap - 1][1]
+            rest = text[cut:].lstrip(" \t.,;:!?…-—")
+            # Kırpılan metnin kelimeleri = kalan kelimeler (kesim kelime sonunda)
+            self._checked = (rest, words[overlap:], hashes[overlap:])
+            return DedupeResult("trim", rest, overlap, ratio)
+        return DedupeResult("append", text, 0, ratio)
+
+
+# ============================================================
+# BENCHMARK
+# ============================================================
+
+def _legacy_check(existing: str, text: str) -> bool:
+    """Eski yöntem (server.py): son 15000 karakterde tam / ilk yarı kapsama"""
+    last_part = existing[-15000:]
+    norm_text = " ".join(text.lower().split())
+    norm_last = " ".join(last_part.lower().split())
+    if norm_text in norm_last and len(norm_text) > 30:
+        return True
+    if len(norm_text) > 100 and norm_text[:len(norm_text) // 2] in norm_last:
+        return True
+    return False
+
+
+def _benchmark(hours: float = 2.0, segment_seconds: int = 60, overlap_words: int = 12):
+    import random
+    import time
+
+    rng = random.Random(42)
+    vocab = [f"kelime{i}" for i in range(3000)] + ["ve", "bu", "bir", "evet", "tamam", "şimdi"]
+    speakers = ["Ahmet", "Ayşe", "Mehmet", "Zeynep"]
+    words_per_segment = int(150 * segment_seconds / 60)  # ~150 kelime/dk konuşma
+    segments_count = int(hours * 3600 / segment_seconds)
+
+    stream = [rng.choice(vocab) for _ in range(words_per_segment * segments_count)]
+    segments = []
+    for n in range(segments_count):
+        start = max(0, n * words_per_segment - (overlap_words if n else 0))
+        body = " ".join(stream[start:(n + 1) * words_per_segment])
+        segments.append(f"{rng.choice(speakers)}: {body}")
+    # %5 segment aynen tekrar gönderilmiş (retry)
+    for n in range(0, segments_count, 20):
+        segments.insert(n + 1, segments[n])
+
+    legacy_text = ""
+    t0 = time.perf_counter()
+    legacy_skipped = 0
+    for seg in segments:
+        if _legacy_check(legacy_text, seg):
+            legacy_skipped += 1
+            continue
+        legacy_text = legacy_text + "\n\n" + seg if legacy_text else seg
+    legacy_time = time.perf_counter() - t0
+
+    index = MeetingFingerprints()
+    t0 = time.perf_counter()
+    new_text_parts = []
+    stats = {"append": 0, "trim": 0, "duplicate": 0}
+    previous = None
+    for n, seg in enumerate(segments):
+        result = index.check(seg, previous_id=previous)
+        stats[result.action] += 1
+        if result.action == "duplicate":
+            continue
+        index.add(n, result.text)
+        new_text_parts.append(result.text)
+        previous = n
+    new_time = time.perf_counter() - t0
+
+    labels = {s.casefold() for s in speakers}
+
+    def spoken_words(text):
+        return sum(1 for w, _ in tokenize(text) if w not in labels)
+
+    expected_words = len(stream)
+    new_words = sum(spoken_words(p) for p in new_text_parts)
+    legacy_words = spoken_words(legacy_text)
+
+    print(f"{hours:.0f} saat, {len(segments)} segment ({segment_seconds}s, {overlap_words} kelime örtüşme)")
+    print(f"  eski yöntem : {legacy_time * 1000:8.1f} ms toplam, "
+          f"{legacy_time / len(segments) * 1000:6.3f} ms/segment, atlanan {legacy_skipped}, "
+          f"fazla kelime {legacy_words - expected_words}")
+    print(f"  fingerprint : {new_time * 1000:8.1f} ms toplam, "
+          f"{new_time / len(segments) * 1000:6.3f} ms/segment, {stats}, "
+          f"fazla kelime {new_words - expected_words}")
+
+
+if __name__ == "__main__":
+    _benchmark(segment_seconds=60)
+    _benchmark(segment_seconds=300)
@@ -0,0 +1,133 @@
+"""
+Transcript Cache
+================
+Aynı ses tekrar yüklendiğinde (recorder retry, final flush'ta yeniden gönderim)
+Gemini'yi tekrar çağırmamak için içerik adresli transkript önbelleği.
+
+- Anahtar: SHA-256(ses baytları) + SHA-256(model + prompt). Prompt; katılımcı
+  listesini, timeline ipucunu ve platformu içerdiği için bunlardan biri
+  değişirse yeni transkript üretilir.
+- Sesin transkripte eklenip eklenmediği burada değil, toplantının
+  transkript deposunda (segment kaydının "audio" alanı) tutulur; böylece
+  işaret toplantıya özeldir ve depo sıfırlanınca kalkar.
+- Disk üzerinde (data/transcript_cache), TTL ve toplam boyut sınırı ile.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+CACHE_DIR = Path(os.getenv("TRANSCRIPT_CACHE_DIR", "data/transcript_cache"))
+CACHE_TTL = float(os.getenv("TRANSCRIPT_CACHE_TTL", str(24 * 3600)))
+CACHE_MAX_MB = float(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "50"))
+EVICT_INTERVAL = 60  # Temizlik en fazla bu sıklıkla çalışır (saniye)
+
+_state = {"last_evict": 0.0}
+_state_lock = threading.Lock()
+_audio_locks = {}
+
+
+def audio_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path, chunk_size: int = 1024 * 1024) -> str:
+    """Dosyanın SHA-256'sı (tamamını belleğe almadan, parça parça)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_key(audio_sha: str, model: str, prompt: str) -> str:
+    """Ses + prompt girdilerinden önbellek anahtarı"""
+    prompt_sha = hashlib.sha256(f"{model}\n{prompt}".encode("utf-8")).hexdigest()
+    return f"{audio_sha[:32]}-{prompt_sha[:32]}"
+
+
+def _entry_path(key: str) -> Path:
+    return CACHE_DIR / key[:2] / f"{key}.json"
+
+
+def get(key: str):
+    """Önbellekteki transkript; yoksa / süresi geçmişse None"""
+    path = _entry_path(key)
+    try:
+        if time.time() - path.stat().st_mtime > CACHE_TTL:
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))["text"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def put(key: str, text: str):
+    """Transkripti önbelleğe yaz (atomik)"""
+    path = _entry_path(key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps({"text": text, "created": time.time()}, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(path)
+    except OSError as e:
+        print(f"[CACHE] Yazma hatası: {e}")
+        return
+    _maybe_evict()
+
+
+@contextmanager
+def audio_lock(audio_sha: str):
+    """Aynı ses için eşzamanlı işleri sıraya sok (ikincisi birincinin sonucunu görür)"""
+    with _state_lock:
+        entry = _audio_locks.setdefault(audio_sha, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _state_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                _audio_locks.pop(audio_sha, None)
+
+
+def _maybe_evict():
+    """Süresi geçenleri sil; toplam boyut sınırı aşılırsa en eskilerden başlayarak sil"""
+    now = time.time()
+    with _state_lock:
+        if now - _state["last_evict"] < EVICT_INTERVAL:
+            return
+        _state["last_evict"] = now
+
+    files = []
+    for path in CACHE_DIR.rglob("*"):
+        try:
+            if path.is_file():
+                st = path.stat()
+                files.append((st.st_mtime, st.st_size, path))
+        except OSError:
+            continue
+
+    total = 0
+    kept = []
+    for mtime, size, path in files:
+        if now - mtime > CACHE_TTL:
+            try: path.unlink()
+            except OSError: pass
+        else:
+            kept.append((mtime, size, path))
+            total += size
+
+    limit = CACHE_MAX_MB * 1024 * 1024
+    for mtime, size, path in sorted(kept):
+        if total <= limit:
+            break
+        try:
+            path.unlink()
+            total -= size
+        except OSError:
+            pass
@@ -0,0 +1,339 @@
+"""
+Transcript Store
+================
+Toplantı transkriptini segment başına bir satır olarak append-only JSONL'de
+tutar (transcript_segments.jsonl):
+
+    {"seq": 3, "recording": "9f2c...", "time": 1700000000.0, "start_time": "...",
+     "duration": "...", "speaker": "...", "platform": "meet", "text": "..."}
+
+- Ekleme O(1): dosyanın sonuna tek satır yazılır, mevcut transkript okunup
+  yeniden yazılmaz. Ekleme + tekrar kontrolü tek kilit altında yapıldığı için
+  eşzamanlı segmentler birbirinin üzerine yazmaz.
+- Düz metin okunurken üretilir (segmentler arası boş satır); sadece dosya
+  gereken yerlerde (indirme, rapor) latest_transcript.txt'e export edilir.
+- Dosya artımlı okunur (offset takibi); dosya silinir / kısalırsa (yeni
+  toplantı) bellekteki durum sıfırlanır.
+
+Sıralama (reorder buffer): paralel / tekrar denenen upload'lar geliş sırası
+karışık ulaşabilir. Metin geliş sırasına göre değil segmentin start_time'ına
+göre birleştirilir. Recorder her segmente kayıt oturumu (recording) içinde
+1'den başlayan ardışık bir seq verir; sessiz / atlanan segmentler de
+{"seq", "recording", "skipped": true} satırıyla bildirilir. "Kesintisiz
+gelinen son seq" (watermark) canlı görünümde sadece kesinleşmiş kısmı
+göstermek için kullanılır; eksik seq REORDER_GAP_TIMEOUT boyunca gelmezse
+atlanır.
+
+Segment kaydı sesinin hash'ini ("audio") taşır: aynı ses (recorder retry'ı,
+final gönderim) bu toplantıya tekrar gelirse has_audio() ile tanınır.
+
+JSONL yoksa eski latest_transcript.txt okunur (geriye dönük uyumluluk).
+
+Her toplantının (task_id) kendi deposu vardır: data/<task_id>_transcript_segments.jsonl
+(workspace.meeting_file); task_id yoksa çalışma dizinindeki eski dosyalar.
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+from text_dedupe import MeetingFingerprints
+from workspace import meeting_file
+
+SEGMENTS_FILE = "transcript_segments.jsonl"
+TEXT_FILE = "latest_transcript.txt"
+SEPARATOR = "\n\n"
+# Eksik seq bu kadar saniye gelmezse watermark onu atlar (recorder job bekleme süresi 900s)
+REORDER_GAP_TIMEOUT = float(os.getenv("REORDER_GAP_TIMEOUT", "900"))
+
+
+def _sort_key(record: dict) -> tuple:
+    """Segmentin zaman sırası: start_time (epoch), yoksa kayıt zamanı"""
+    try:
+        start = float(record.get("start_time"))
+    except (TypeError, ValueError):
+        start = record.get("time", 0.0)
+    return (start, record.get("seq") or 0)
+
+
+class TranscriptStore:
+    """Segment kayıtlarının append-only deposu (thread-safe)"""
+
+    def __init__(self, path=SEGMENTS_FILE, text_path=TEXT_FILE):
+        self.path = Path(path)
+        self.text_path = Path(text_path)
+        # Tekrar kontrolü + ekleme gibi birleşik işlemler için dışarıdan da alınabilir
+        self.lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._records = []        # Zaman sıralı
+        self._keys = []           # _records ile paralel sıralama anahtarları
+        self._offset = 0
+        self._partial = ""
+        self._text = ""
+        self._text_dirty = False
+        self._exported_sig = None
+        self._seen = {}           # recording → {seq: geliş zamanı}
+        self._watermarks = {}     # recording → kesintisiz son seq
+        self._skipped_gaps = {}   # recording → zaman aşımıyla atlanan seq'ler
+        self._current_recording = None
+        self._auto_seq = 0
+        self._audio = set()       # Transkripte eklenmiş seslerin hash'leri
+        self._fingerprints = MeetingFingerprints()  # Örtüşme / tekrar tespiti için shingle indeksi
+
+    def _add(self, record: dict):
+        seq = record.get("seq")
+        recording = record.get("recording")
+        if seq is not None:
+            self._seen.setdefault(recording, {}).setdefault(seq, record.get("time", time.time()))
+            if recording is not None:
+                self._current_recording = recording
+            else:
+                self._auto_seq = max(self._auto_seq, seq)
+        if record.get("skipped"):
+            return
+        text = record.get("text") or ""
+        if not text:
+            return
+        if record.get("audio"):
+            self._audio.add(record["audio"])
+
+        self._fingerprints.add((record.get("recording"), seq), text)
+        key = _sort_key(record)
+        if not self._keys or key >= self._keys[-1]:
+            self._records.append(record)
+            self._keys.append(key)
+            if not self._text_dirty:
+                self._text = self._text + SEPARATOR + text if self._text else text
+        else:
+            # Geç gelen segment: yerine yerleştir, metin okunurken yeniden üretilir
+            i = bisect_right(self._keys, key)
+            self._records.insert(i, record)
+            self._keys.insert(i, key)
+            self._text_dirty = True
+
+    # --------------------------------------------------------
+    # Dosyadan artımlı yükleme
+    # --------------------------------------------------------
+    def _refresh(self):
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            if self._records or self._offset:
+                self._reset()  # Dosya silindi: yeni toplantı
+            return
+        if size < self._offset:
+            self._reset()
+        if size == self._offset:
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            f.seek(self._offset)
+            chunk = f.read()
+            self._offset = f.tell()
+
+        lines = (self._partial + chunk).split("\n")
+        self._partial = lines.pop()  # Yarım yazılmış son satır
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                self._add(json.loads(line))
+            except (ValueError, TypeError, AttributeError):
+                continue
+
+    def refresh(self):
+        with self.lock:
+            self._refresh()
+
+    # --------------------------------------------------------
+    # Yazma
+    # --------------------------------------------------------
+    def _write(self, record: dict):
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+        self._refresh()
+
+    def append(self, text: str, seq: int = None, recording: str = None, **meta) -> dict:
+        """
+        Segmenti kaydet. seq verilmezse (recorder dışı kaynaklar) oturumsuz
+        kayıtlar için sıradaki numara verilir. Kaydı döner.
+        """
+        with self.lock:
+            self._refresh()
+            if seq is None:
+                recording = None
+                seq = self._auto_seq + 1
+            record = {"seq": seq, "recording": recording, "time": time.time(), **meta, "text": text}
+            self._write(record)
+            return record
+
+    def has_audio(self, audio_sha: str) -> bool:
+        """Bu ses bu toplantının transkriptine daha önce eklendi mi?"""
+        with self.lock:
+            self._refresh()
+            return audio_sha in self._audio
+
+    def mark_skipped(self, seq: int, recording: str = None, reason: str = None):
+        """Metin üretmeyen segment (sessizlik, tekrar, hata): watermark ilerleyebilsin"""
+        if seq is None:
+            return
+        with self.lock:
+            self._refresh()
+            if seq in self._seen.get(recording, {}):
+                return
+            self._write({"seq": seq, "recording": recording, "time": time.time(),
+                         "skipped": True, "reason": reason})
+
+    def reset(self):
+        """Yeni toplantı: segmentleri ve export edilen metni sil"""
+        with self.lock:
+            for path in (self.path, self.text_path):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+            self._reset()
+
+    def export(self) -> Path:
+        """Düz metni latest_transcript.txt'e yaz (sadece değiştiyse); dosya yolunu döner"""
+        with self.lock:
+            self._refresh()
+            if not self._records:
+                return self.text_path  # Eski (JSONL öncesi) dosya olduğu gibi kalır
+            sig = (len(self._records), self._offset)
+            if sig != self._exported_sig or not self.text_path.exists():
+                tmp = self.text_path.with_suffix(".tmp")
+                tmp.write_text(self._render(), encoding="utf-8")
+                tmp.replace(self.text_path)
+                self._exported_sig = sig
+            return self.text_path
+
+    # --------------------------------------------------------
+    # Okuma
+    # --------------------------------------------------------
+    def _render(self) -> str:
+        if self._text_dirty:
+            self._text = SEPARATOR.join(r["text"] for r in self._records)
+            self._text_dirty = False
+        return self._text
+
+    def _watermark(self, recording) -> int:
+        seen = self._seen.get(recording, {})
+        wm = self._watermarks.get(recording, 0)
+        now = time.time()
+        while True:
+            while wm + 1 in seen:
+                wm += 1
+            later = [seq for seq in seen if seq > wm]
+            if not later:
+                break
+            # Eksik seq'ten sonraki segment çok uzun süredir bekliyorsa boşluğu atla
+            first_later = min(later)
+            if now - seen[first_later] < REORDER_GAP_TIMEOUT:
+                break
+            self._skipped_gaps.setdefault(recording, []).extend(range(wm + 1, first_later))
+            wm = first_later
+        self._watermarks[recording] = wm
+        return wm
+
+    def watermark(self) -> dict:
+        """Aktif kayıt oturumunda kesintisiz gelinen son seq ve bekleyen (sırasız) seq'ler"""
+        with self.lock:
+            self._refresh()
+            recording = self._current_recording
+            wm = self._watermark(recording)
+            seen = self._seen.get(recording, {})
+            return {
+                "recording": recording,
+                "contiguous_seq": wm,
+                "pending_seqs": sorted(seq for seq in seen if seq > wm),
+                "skipped_gaps": list(self._skipped_gaps.get(recording, [])),
+            }
+
+    def version(self) -> str:
+        """İçerik sürümü (ETag için): log boyutu + aktif oturum + watermark"""
+        with self.lock:
+            self._refresh()
+            recording = self._current_recording
+            return f"{self._offset}-{recording or ''}-{self._watermark(recording)}"
+
+    def text(self) -> str:
+        """Tüm transkript (düz metin, zaman sıralı)"""
+        with self.lock:
+            self._refresh()
+            return self._render()
+
+    def check_overlap(self, text: str, start_time=None, seq: int = None):
+        """
+        Yeni segment tekrar mı / başı zaman sırasında önceki segmentle örtüşüyor mu?
+        (text_dedupe.DedupeResult). Ekleme ile aynı kilit altında çağrılmalı.
+        """
+        with self.lock:
+            self._refresh()
+            key = _sort_key({"start_time": start_time, "time": time.time(), "seq": seq})
+            i = bisect_left(self._keys, key)
+            previous = self._records[i - 1] if i > 0 else None
+            previous_id = (previous.get("recording"), previous.get("seq")) if previous else None
+            return self._fingerprints.check(text, previous_id)
+
+    def offset_of(self, record: dict) -> int:
+        """Kaydın düz metindeki başlangıç karakteri (geç gelen segmentler araya girer)"""
+        with self.lock:
+            self._refresh()
+            i = bisect_left(self._keys, _sort_key(record))
+            return sum(len(r["text"]) for r in self._records[:i]) + len(SEPARATOR) * i
+
+    def records(self, contiguous_only: bool = False) -> list:
+        """
+        Segment kayıtları (zaman sıralı). contiguous_only=True ise aktif kayıt
+        oturumunda watermark'tan sonraki (önünde eksik segment olan) kayıtlar hariç.
+        """
+        with self.lock:
+            self._refresh()
+            if not contiguous_only:
+                return list(self._records)
+            recording = self._current_recording
+            wm = self._watermark(recording)
+            return [r for r in self._records
+                    if r.get("recording") != recording or r.get("seq", 0) <= wm]
+
+    def __len__(self):
+        with self.lock:
+            self._refresh()
+            return len(self._records)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path=None, text_path=None, task_id: str = None) -> TranscriptStore:
+    """Process içinde dosya başına tek depo (yol verilmezse toplantının / TASK_ID'nin dosyaları)"""
+    path = path or meeting_file(SEGMENTS_FILE, task_id)
+    text_path = text_path or meeting_file(TEXT_FILE, task_id)
+    key = (str(path), str(text_path))
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = TranscriptStore(path, text_path)
+        return store
+
+
+def load_transcript(path=None, text_path=None, task_id: str = None) -> str:
+    """Güncel transkript metni; segment kaydı yoksa eski latest_transcript.txt"""
+    store = get_store(path, text_path, task_id)
+    if len(store):
+        return store.text()
+    try:
+        return store.text_path.read_text(encoding="utf-8")
+    except OSError:
+        return ""
@@ -0,0 +1,385 @@
+"""
+WebM / Matroska Metadata Reader
+===============================
+ffprobe subprocess'i çalıştırmadan, segment dosyasının EBML yapısından
+süre, paket sayısı ve codec bilgisini okur (saf Python).
+
+Sadece ihtiyaç duyulan elementlere inilir; SimpleBlock içerikleri seek ile
+atlanır, yani dosyanın ses verisi belleğe alınmaz.
+Sonuçlar (path, size, mtime) anahtarıyla önbelleklenir: her segment en fazla
+bir kez parse edilir.
+"""
+
+import os
+import struct
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+# ============================================================
+# EBML ELEMENT ID'LERİ
+# ============================================================
+EBML_HEADER = 0x1A45DFA3
+SEGMENT = 0x18538067
+INFO = 0x1549A966
+TIMECODE_SCALE = 0x2AD7B1
+DURATION = 0x4489
+TRACKS = 0x1654AE6B
+TRACK_ENTRY = 0xAE
+TRACK_NUMBER = 0xD7
+CODEC_ID = 0x86
+AUDIO = 0xE1
+SAMPLING_FREQUENCY = 0xB5
+CHANNELS = 0x9F
+CLUSTER = 0x1F43B675
+CLUSTER_TIMECODE = 0xE7
+SIMPLE_BLOCK = 0xA3
+BLOCK_GROUP = 0xA0
+BLOCK = 0xA1
+BLOCK_DURATION = 0x9B
+SEEK_HEAD = 0x114D9B74
+CUES = 0x1C53BB6B
+VOID = 0xEC
+
+# Cluster içinde görülebilecek çocuk elementler (boyutu bilinmeyen cluster'ın sonunu bulmak için)
+CLUSTER_CHILDREN = {CLUSTER_TIMECODE, SIMPLE_BLOCK, BLOCK_GROUP, 0xA7, 0xAB, VOID}
+
+# İçine inilecek master elementler (diğerleri atlanır)
+MASTER_ELEMENTS = {SEGMENT, INFO, TRACKS, TRACK_ENTRY, AUDIO, CLUSTER, BLOCK_GROUP}
+
+# Boyutu bilinmeyen element (canlı yayın / kapanmamış segment)
+UNKNOWN_SIZE = -1
+
+_CACHE_MAX = 256
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+# ============================================================
+# DÜŞÜK SEVİYE EBML OKUMA
+# ============================================================
+
+def read_vint(data: bytes, pos: int, keep_marker: bool = False):
+    """
+    EBML variable-length integer oku.
+
+    Returns:
+        tuple: (değer, uzunluk) — veri yetersizse (None, 0)
+    """
+    if pos >= len(data):
+        return None, 0
+    first = data[pos]
+    if first == 0:
+        raise ValueError("Geçersiz EBML vint (ilk bayt 0)")
+
+    length = 1
+    mask = 0x80
+    while not (first & mask):
+        mask >>= 1
+        length += 1
+
+    if pos + length > len(data):
+        return None, 0
+
+    value = first if keep_marker else first & (mask - 1)
+    all_ones = (first & (mask - 1)) == (mask - 1)
+    for b in data[pos + 1:pos + length]:
+        value = (value << 8) | b
+        all_ones = all_ones and b == 0xFF
+
+    if not keep_marker and all_ones:
+        return UNKNOWN_SIZE, length
+    return value, length
+
+
+def read_element_header(data: bytes, pos: int):
+    """
+    Element ID ve boyutunu oku.
+
+    Returns:
+        tuple: (element_id, size, header_length) — veri yetersizse (None, None, 0)
+    """
+    element_id, id_len = read_vint(data, pos, keep_marker=True)
+    if element_id is None:
+        return None, None, 0
+    size, size_len = read_vint(data, pos + id_len)
+    if size is None:
+        return None, None, 0
+    return element_id, size, id_len + size_len
+
+
+def _read_uint(payload: bytes) -> int:
+    return int.from_bytes(payload, "big") if payload else 0
+
+
+def _read_float(payload: bytes) -> float:
+    if len(payload) == 4:
+        return struct.unpack(">f", payload)[0]
+    if len(payload) == 8:
+        return struct.unpack(">d", payload)[0]
+    return 0.0
+
+
+def _block_timecode(header: bytes) -> int:
+    """SimpleBlock/Block başlığından (track vint + int16) relative timecode'u al"""
+    _, track_len = read_vint(header, 0)
+    if not track_len or len(header) < track_len + 2:
+        return 0
+    return struct.unpack(">h", header[track_len:track_len + 2])[0]
+
+
+# ============================================================
+# DOSYA PARSE
+# ============================================================
+
+def _parse(f, file_size: int) -> dict:
+    info = {
+        "duration": 0.0,
+        "packets": 0,
+        "codec": None,
+        "sample_rate": None,
+        "channels": None,
+        "timecode_scale": 1000000,
+        "size": file_size,
+    }
+
+    header = f.read(64)
+    element_id, _, _ = read_element_header(header, 0)
+    if element_id != EBML_HEADER:
+        raise ValueError("EBML başlığı bulunamadı")
+    f.seek(0)
+
+    declared_duration = None
+    cluster_tc = 0
+    first_block_tc = None
+    last_block_tc = None
+    end_stack = [file_size]
+
+    while True:
+        pos = f.tell()
+        # Bitmiş master elementlerden çık
+        while len(end_stack) > 1 and pos >= end_stack[-1]:
+            end_stack.pop()
+        if pos >= file_size:
+            break
+
+        raw = f.read(12)
+        element_id, size, header_len = read_element_header(raw, 0)
+        if element_id is None:
+            break  # Yarım element (dosya sonu)
+        payload_start = pos + header_len
+        payload_end = end_stack[-1] if size == UNKNOWN_SIZE else payload_start + size
+
+        if element_id in MASTER_ELEMENTS:
+            f.seek(payload_start)
+            if size != UNKNOWN_SIZE:
+                end_stack.append(min(payload_end, end_stack[-1]))
+            continue
+
+        if element_id in (SIMPLE_BLOCK, BLOCK):
+            f.seek(payload_start)
+            block_tc = cluster_tc + _block_timecode(f.read(min(size, 8)))
+            if first_block_tc is None:
+                first_block_tc = block_tc
+            last_block_tc = block_tc
+            info["packets"] += 1
+        elif element_id in (TIMECODE_SCALE, DURATION, CODEC_ID, SAMPLING_FREQUENCY,
+                            CHANNELS, CLUSTER_TIMECODE):
+            f.seek(payload_start)
+            payload = f.read(size)
+            if element_id == TIMECODE_SCALE:
+                info["timecode_scale"] = _read_uint(payload) or 1000000
+            elif element_id == DURATION:
+                declared_duration = _read_float(payload)
+            elif element_id == CODEC_ID:
+                info["codec"] = payload.decode("ascii", errors="ignore").rstrip("\x00")
+            elif element_id == SAMPLING_FREQUENCY:
+                info["sample_rate"] = _read_float(payload)
+            elif element_id == CHANNELS:
+                info["channels"] = _read_uint(payload)
+            elif element_id == CLUSTER_TIMECODE:
+                cluster_tc = _read_uint(payload)
+
+        f.seek(payload_end)
+
+    scale = info["timecode_scale"] / 1e9
+    if declared_duration:
+        info["duration"] = declared_duration * scale
+    elif first_block_tc is not None and info["packets"] > 1:
+        # Duration yazılmamışsa (canlı segment): bloklar arası ortalama adımı son bloğa ekle
+        span = last_block_tc - first_block_tc
+        step = span / (info["packets"] - 1)
+        info["duration"] = (span + step) * scale
+    return info
+
+
+def read_webm_info(path) -> dict:
+    """
+    WebM dosyasının metadata'sını döndürür (önbellekli).
+
+    Returns:
+        dict: duration (sn), packets, codec, sample_rate, channels, timecode_scale, size
+        None: Dosya okunamazsa / geçerli bir WebM değilse
+    """
+    path = Path(path)
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+
+    key = (str(path.resolve()), st.st_size, st.st_mtime_ns)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return dict(cached)
+
+    try:
+        with open(path, "rb") as f:
+            info = _parse(f, st.st_size)
+    except (OSError, ValueError, struct.error):
+        return None
+
+    with _cache_lock:
+        _cache[key] = info
+        while len(_cache) > _CACHE_MAX:
+            _cache.popitem(last=False)
+    return dict(info)
+
+
+# ============================================================
+# CANLI AKIŞ (ffmpeg -f webm pipe:1) → CLUSTER BÖLME
+# ============================================================
+
+def _encode_size(size: int) -> bytes:
+    """8 baytlık EBML boyut vint'i"""
+    return bytes([0x01]) + size.to_bytes(7, "big")
+
+
+def _element_id_bytes(element_id: int) -> bytes:
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+
+
+# Segment boyutu pencereye göre değiştiği için her zaman "bilinmiyor" yazılır
+_SEGMENT_UNKNOWN_SIZE = _element_id_bytes(SEGMENT) + bytes([0x01]) + b"\xff" * 7
+
+
+class WebMStreamSplitter:
+    """
+    Parça parça gelen canlı WebM akışını cluster'lara böler.
+
+    feed() ile gelen baytlar tamponlanır; tamamlanan her cluster
+    (cluster_bytes, başlangıç_saniyesi) olarak döner. İlk cluster'a kadar olan
+    kısım (EBML başlığı + Segment + Info + Tracks) `header` içinde tutulur:
+    header + ardışık cluster'lar tek başına çalınabilir bir WebM dosyasıdır.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._header = bytearray()
+        self.header_complete = False
+        self.timecode_scale = 1000000
+
+    @property
+    def header(self) -> bytes:
+        return bytes(self._header)
+
+    def feed(self, data: bytes) -> list:
+        self._buf.extend(data)
+        return self._drain(final=False)
+
+    def finish(self) -> list:
+        """Akış bitti: boyutu bilinmeyen son cluster'ı da döndür"""
+        clusters = self._drain(final=True)
+        self._buf.clear()
+        return clusters
+
+    def _drain(self, final: bool) -> list:
+        clusters = []
+        while self._buf:
+            element_id, size, header_len = read_element_header(self._buf, 0)
+            if element_id is None:
+                break
+
+            if element_id == SEGMENT:
+                # Segment'e in (içeriği bu döngüde okunur)
+                if not self.header_complete:
+                    self._header.extend(_SEGMENT_UNKNOWN_SIZE)
+                del self._buf[:header_len]
+                continue
+
+            if element_id == CLUSTER:
+                if size == UNKNOWN_SIZE:
+                    end = self._unknown_cluster_end(header_len, final)
+                else:
+                    end = header_len + size if len(self._buf) >= header_len + size else None
+                if end is None:
+                    break  # Cluster henüz tamamlanmadı
+                payload = bytes(self._buf[header_len:end])
+                del self._buf[:end]
+                self.header_complete = True
+                clusters.append((
+                    _element_id_bytes(CLUSTER) + _encode_size(len(payload)) + payload,
+                    self._cluster_seconds(payload)
+                ))
+                continue
+
+            if size == UNKNOWN_SIZE or len(self._buf) < header_len + size:
+                break
+            element = bytes(self._buf[:header_len + size])
+            del self._buf[:header_len + size]
+
+            if self.header_complete or element_id in (SEEK_HEAD, CUES, VOID):
+                continue  # Konum bilgileri pencere dosyalarında geçersiz, atla
+            if element_id == INFO:
+                self._read_timecode_scale(element[header_len:])
+            self._header.extend(element)
+        return clusters
+
+    def _unknown_cluster_end(self, pos: int, final: bool):
+        """Boyutu bilinmeyen cluster: cluster çocuğu olmayan ilk elementte biter"""
+        while pos < len(self._buf):
+            element_id, size, header_len = read_element_header(self._buf, pos)
+            if element_id is None:
+                break
+            if element_id not in CLUSTER_CHILDREN:
+                return pos
+            if size == UNKNOWN_SIZE or pos + header_len + size > len(self._buf):
+                break
+            pos += header_len + size
+        return len(self._buf) if final else None
+
+    def _read_timecode_scale(self, payload: bytes):
+        pos = 0
+        while pos < len(payload):
+            element_id, size, header_len = read_element_header(payload, pos)
+            if element_id is None or size == UNKNOWN_SIZE:
+                return
+            if element_id == TIMECODE_SCALE:
+                self.timecode_scale = _read_uint(payload[pos + header_len:pos + header_len + size]) or 1000000
+                return
+            pos += header_len + size
+
+    def _cluster_seconds(self, payload: bytes) -> float:
+        pos = 0
+        while pos < len(payload):
+            element_id, size, header_len = read_element_header(payload, pos)
+            if element_id is None or size == UNKNOWN_SIZE:
+                break
+            if element_id == CLUSTER_TIMECODE:
+                tc = _read_uint(payload[pos + header_len:pos + header_len + size])
+                return tc * self.timecode_scale / 1e9
+            pos += header_len + size
+        return 0.0
+
+
+def get_duration(path) -> float:
+    """Segment süresi (saniye), okunamazsa 0.0"""
+    info = read_webm_info(path)
+    return info["duration"] if info else 0.0
+
+
+if __name__ == "__main__":
+    import sys
+    for arg in sys.argv[1:]:
+        print(f"{os.path.basename(arg)}: {read_webm_info(arg)}")
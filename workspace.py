@@ -0,0 +1,97 @@
+"""
+Task Workspace
+==============
+Her görevin (task) kayıt dosyalarını kendi klasöründe tutar; böylece aynı
+host/container'da birden fazla bot birbirinin segmentlerini silmez.
+
+    <tmp>/workers/<task_id>/
+        segments/                 ffmpeg chunk'ları, segments.csv, VAD logu
+        stop_recording.signal     worker → recorder durdur sinyali
+        recorder_status.json      recorder → worker sonuç bildirimi
+
+Log dosyaları logs/ altında, API ile paylaşılan dosyalar (metrikler,
+transkript, katılımcı / konuşmacı kayıtları) data/ altında kalır; adlarının
+önüne task id eklenir. Görev / komut / durum belgeleri meeting_state.py'de.
+
+TASK_ID yoksa (tek bot / sistem.py) eski yerleşim kullanılır:
+segmentler <tmp>/zoom_segments, sinyal ve durum dosyaları çalışma dizininde.
+"""
+
+import os
+import re
+import tempfile
+from pathlib import Path
+
+WORKERS_ROOT = Path(tempfile.gettempdir()) / "workers"
+SHARED_DATA_DIR = Path("data")  # Docker'da worker ve api arasında paylaşılan volume
+LEGACY_SEGMENT_DIR = Path(tempfile.gettempdir()) / "zoom_segments"
+
+
+def get_task_id():
+    """Aktif görev kimliği (Celery task'ı TASK_ID ortam değişkeniyle iletir)"""
+    return os.getenv("TASK_ID") or None
+
+
+def recorder_command(script: str, platform: str) -> list:
+    """
+    Recorder process'inin komutu. Görev kimliği komut satırında da taşınır
+    (--task-id): force-reset sadece bu görevin recorder'ını bulup durdurur.
+    """
+    cmd = ["python", script, "--platform", platform]
+    task_id = get_task_id()
+    if task_id:
+        cmd += ["--task-id", task_id]
+    return cmd
+
+
+def _safe_id(task_id: str) -> str:
+    # Klasör adı olarak güvenli hale getir (path traversal önleme)
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", str(task_id)).strip(".") or "task"
+
+
+def workspace_dir(task_id: str = None, create: bool = True) -> Path:
+    """Görevin çalışma klasörü; görev yoksa None"""
+    task_id = task_id or get_task_id()
+    if not task_id:
+        return None
+    path = WORKERS_ROOT / _safe_id(task_id)
+    if create:
+        path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def segment_dir(task_id: str = None, create: bool = True) -> Path:
+    """ffmpeg segment klasörü"""
+    base = workspace_dir(task_id, create)
+    path = base / "segments" if base else LEGACY_SEGMENT_DIR
+    if create:
+        path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def task_file(name: str, task_id: str = None) -> Path:
+    """Sinyal / durum dosyası yolu (görev yoksa çalışma dizini)"""
+    base = workspace_dir(task_id)
+    return base / name if base else Path(name)
+
+
+def log_name(name: str, task_id: str = None) -> str:
+    """logs/ altındaki log dosya adı: görev varsa önüne task id eklenir"""
+    task_id = task_id or get_task_id()
+    return f"{_safe_id(task_id)}_{name}" if task_id else name
+
+
+def data_file(name: str, task_id: str = None) -> Path:
+    """data/ altında API'nin de okuyabildiği, görev bazlı dosya"""
+    SHARED_DATA_DIR.mkdir(exist_ok=True)
+    return SHARED_DATA_DIR / log_name(name, task_id)
+
+
+def meeting_file(name: str, task_id: str = None) -> Path:
+    """
+    Toplantıya ait, API ile worker arasında paylaşılan dosya (transkript,
+    katılımcılar, konuşmacı geçmişi): görev varsa data/<task_id>_<name>,
+    yoksa eski yerleşim (çalışma dizininde <name>).
+    """
+    task_id = task_id or get_task_id()
+    return data_file(name, task_id) if task_id else Path(name)
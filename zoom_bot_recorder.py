@@ -2,17 +2,34 @@ import sys
 import os
 os.environ['PYTHONIOENCODING'] = 'utf-8'
 
+# --task-id <id>: görev kimliği (worker'lar TASK_ID ortam değişkeniyle de iletebilir)
+if "--task-id" in sys.argv[:-1]:
+    os.environ["TASK_ID"] = sys.argv[sys.argv.index("--task-id") + 1]
+
+import workspace
 from logger_config import setup_logger
-logger = setup_logger(__name__, "recorder.log")
+logger = setup_logger(__name__, workspace.log_name("recorder.log"))
 
 import subprocess
 import requests
-import tempfile
 import time
 import psutil
 import json
+import queue
+import threading
+import uuid
+from collections import deque
 from pathlib import Path
 
+# WebM metadata (ffprobe yerine saf Python EBML okuyucu)
+from webm_meta import read_webm_info, WebMStreamSplitter
+# Sessiz segmentleri Gemini'ye göndermeden ele (enerji + ZCR VAD)
+from audio_vad import VAD_ENABLED, analyze_segment, tail_is_silent
+# Konuşmacı geçmişi (bisect indeksi, dosya her seferinde parse edilmez)
+from speaker_timeline import get_timeline
+# ffmpeg stderr → kayıt sağlığı metrikleri (drift, overrun, takılma)
+from ffmpeg_telemetry import FFmpegTelemetry
+
 # Platform abstraction
 from platform_utils import (
     IS_WINDOWS, IS_LINUX, 
@@ -42,6 +59,42 @@ api_host = os.getenv("API_HOST", "127.0.0.1")  # Docker: "api", Local: "127.0.0.
 api_port = os.getenv("API_PORT", os.getenv("PORT", "9000"))
 SERVER_URL = f"http://{api_host}:{api_port}/transcribe-webm"
 
+# Paralel upload: aynı anda kaç segment sunucuya gönderilebilir
+UPLOAD_CONCURRENCY = max(1, int(os.getenv("UPLOAD_CONCURRENCY", "2")))
+# Başarısız canlı upload aynı seq ile en fazla bu kadar denenir (bekleme: 5s, 10s, ...)
+UPLOAD_MAX_ATTEMPTS = max(1, int(os.getenv("UPLOAD_MAX_ATTEMPTS", "3")))
+UPLOAD_RETRY_DELAY = 5.0
+# Kayıt bitince kalan upload'lar için maksimum bekleme (saniye)
+FINAL_UPLOAD_TIMEOUT = float(os.getenv("FINAL_UPLOAD_TIMEOUT", "600"))
+# /transcribe-webm 202 döndüğünde job durumunu yoklama aralığı (saniye)
+JOB_POLL_INTERVAL = 2.0
+# Gönderilmeyen segmentlerin (sessiz / yüklenemedi) bildirildiği endpoint
+SKIP_URL = f"http://{api_host}:{api_port}/segment-skipped"
+# Bu recorder sürecinin kimliği: seq'ler bu oturum içinde 1'den başlayıp ardışık artar
+# (recorder yeniden başlarsa sunucu yeni oturumu ayrı sıralar)
+RECORDING_ID = uuid.uuid4().hex[:12]
+
+# Adaptif segmentasyon:
+# ffmpeg kısa "chunk"lar yazar, planner bunları upload birimlerine (unit) toplar.
+# Toplantı başında kısa birimler (ilk transkript hızlı gelsin), sonra uzun birimler.
+SEGMENT_CHUNK_SECONDS = int(os.getenv("SEGMENT_CHUNK_SECONDS", "10"))
+SEGMENT_SCHEDULE = [
+    float(x) for x in os.getenv("SEGMENT_SCHEDULE", "30,60,120,300").split(",") if x.strip()
+] or [300.0]
+SEGMENT_MIN_FACTOR = 0.75   # Hedefin %75'inden sonra iyi bir kesim noktasında kes
+SEGMENT_MAX_FACTOR = 1.5    # Hedefin 1.5 katında her durumda kes
+SPEAKER_CHANGE_WINDOW = 2.0  # Kesim noktası ± bu kadar saniyede konuşmacı değişimi aranır
+
+# Canlı akış modu: ffmpeg çıktısı diske yazılmadan WebSocket ile sunucuya aktarılır
+# (bağlantı kurulamazsa segment dosyası moduna dönülür)
+STREAM_AUDIO = os.getenv("STREAM_AUDIO", "0") in ("1", "true", "True")
+MEETING_ID = os.getenv("MEETING_ID") or os.getenv("TASK_ID") or uuid.uuid4().hex[:12]
+TASK_ID = workspace.get_task_id()  # Segmentler sunucuda bu toplantının transkriptine eklenir
+STREAM_URL = f"ws://{api_host}:{api_port}/stream-audio/{MEETING_ID}" + (f"?task_id={TASK_ID}" if TASK_ID else "")
+# Bağlantı koptuğunda bellekte tutulacak en fazla cluster (~1 sn/cluster);
+# aşılırsa birikenler dosyaya yazılıp HTTP upload havuzuyla gönderilir
+STREAM_BACKLOG_CLUSTERS = int(os.getenv("STREAM_BACKLOG_CLUSTERS", "120"))
+
 VISION_MONITOR_ENABLED = False
 
 logger.info("[RECORDER] Sesly Bot - WebM/Opus kaydedici başlatıldı...")
@@ -52,10 +105,14 @@ logger.info(f"[CONFIG] Vision Monitor: {'AKTIF' if VISION_MONITOR_ENABLED else '
 # ------------------------------------------------------------
 # SEGMENT KLASÖRÜ ve PATTERN
 # ------------------------------------------------------------
-segment_dir = Path(tempfile.gettempdir()) / "zoom_segments"
-segment_dir.mkdir(exist_ok=True)
-
-chunk_pattern = str(segment_dir / "chunk_%03d.webm")
+# Görev bazlı klasör: aynı host'taki diğer recorder'ların segmentlerine dokunulmaz
+segment_dir = workspace.segment_dir()
+
+chunk_pattern = str(segment_dir / "chunk_%05d.webm")  # 5 hane: ~11 gün (10 s chunk) boyunca ad sırası = zaman sırası
+# ffmpeg her segmenti kapattığında bu CSV'ye "dosya,başlangıç,bitiş" satırı ekler
+segment_list_file = segment_dir / "segments.csv"
+# VAD kararları (segment, konuşma oranı, atlandı mı) buraya yazılır
+vad_log_file = segment_dir / "vad_decisions.jsonl"
 logger.info(f"[INFO] Segment klasörü: {segment_dir}")
 
 ffmpeg_process = None
@@ -64,11 +121,38 @@ cleanup_done = False
 recording_start_time = None
 uploaded_chunks = set()
 
+# Upload havuzu durumu (kayıt döngüsü ağ için asla bloklanmaz)
+upload_queue = queue.Queue()
+upload_threads = []
+pending_chunks = set()      # Kuyrukta bekleyen veya yüklenmekte olan segmentler
+chunks_lock = threading.Lock()
+upload_stats = {"sent": 0, "failed": 0, "silent": 0}
+# Upload sıra numaraları: kuyruğa giriş sırası = zaman sırası (planner birimleri sırayla keser);
+# aynı dosya tekrar kuyruğa girerse (final retry) aynı seq'i kullanır
+upload_seq = {"next": 1, "by_name": {}}
+
+# Segment listesi (ffmpeg -segment_list) takip durumu
+segment_list_state = {"offset": 0, "partial": ""}
+segment_list_lock = threading.Lock()
+
+# Upload birimi planlayıcı durumu (biten chunk'lar birim tamamlanana kadar burada bekler)
+plan_state = {"chunks": [], "unit_index": 0}
+plan_lock = threading.Lock()
+_http = threading.local()    # Thread başına requests.Session (bağlantı tekrar kullanımı)
+
+# Canlı akış durumu
+stream_state = {"thread": None, "done": threading.Event(), "spill_index": 0}
+
+# ffmpeg telemetrisi (start_ffmpeg_recording'de oluşturulur)
+ffmpeg_telemetry = None
+METRICS_INTERVAL = 5  # Metrik dosyası yazma aralığı (saniye)
+metrics_file = workspace.data_file("recorder_metrics.json")
+
 
 def get_current_speaker():
     """Vision monitor veya Worker'dan güncel konuşmacıyı al"""
     try:
-        speaker_log_file = Path("speaker_activity_log.json")
+        speaker_log_file = workspace.meeting_file("speaker_activity_log.json")
 
         if not speaker_log_file.exists():
             return None
@@ -102,18 +186,31 @@ def get_current_speaker():
 
 
 
+def get_current_platform():
+    """Worker'ın yazdığı katılımcı dosyasından platform adını al (meet, zoom, teams)"""
+    try:
+        participants_file = workspace.meeting_file("current_meeting_participants.json")
+        if participants_file.exists():
+            pdata = json.loads(participants_file.read_text(encoding="utf-8"))
+            return pdata.get("platform")
+    except Exception:
+        pass
+    return None
+
+
 # ============================================================
 # FFMPEG İLE WebM SEGMENT KAYIT
 # ============================================================
 
-def start_ffmpeg_recording():
+def start_ffmpeg_recording(stream: bool = False):
     """
     ffmpeg ile VAC cihazından segment bazlı WebM/Opus kayıt başlat
+    stream=True: segment dosyaları yerine tek WebM akışı stdout'a yazılır
 
     Returns:
         subprocess.Popen: ffmpeg process
     """
-    global recording_start_time
+    global recording_start_time, ffmpeg_telemetry
     
     # ------------------------------------------------------------
     # 🔥 AGRESIF TEMİZLİK: Eski segment'leri zorla temizle
@@ -156,6 +253,14 @@ def start_ffmpeg_recording():
         
         logger.info(f"[CLEANUP] {cleaned}/{len(old_segments)} eski segment temizlendi")
 
+    # Eski segment listesini de sil (yeni ffmpeg baştan yazacak)
+    try:
+        segment_list_file.unlink(missing_ok=True)
+    except Exception as e:
+        logger.info(f"[WARN] {segment_list_file.name} silinemedi: {e}")
+    segment_list_state["offset"] = 0
+    segment_list_state["partial"] = ""
+
     logger.info("\n" + "=" * 60)
     logger.info("[FFMPEG] Segment bazlı WebM kayıt başlatılıyor...")
     logger.info("=" * 60)
@@ -196,34 +301,50 @@ def start_ffmpeg_recording():
         "-avoid_negative_ts", "make_zero",
         "-fflags", "+genpts",
         "-af", "aresample=async=1", # Audio sync fix
+    ])
 
-        # Segmentation
-        "-f", "segment",
-        "-segment_time", "300", # 5 dakika
-        "-break_non_keyframes", "1",
-        "-reset_timestamps", "1",
-        "-segment_format", "webm",
+    if stream:
+        cmd.extend([
+            "-f", "webm",
+            "-live", "1",
+            "-cluster_time_limit", "1000",  # ~1 sn'lik cluster'lar (akış birimi)
+            "pipe:1"
+        ])
+    else:
+        cmd.extend([
+            # Segmentation
+            "-f", "segment",
+            "-segment_time", str(SEGMENT_CHUNK_SECONDS),  # Kısa chunk, birimleri planner oluşturur
+            "-break_non_keyframes", "1",
+            "-reset_timestamps", "1",
+            "-segment_format", "webm",
+            # Biten her segment CSV'ye yazılır (dizin taraması yerine olay kaynağı)
+            "-segment_list", str(segment_list_file),
+            "-segment_list_type", "csv",
         
-        chunk_pattern
-    ])
+            chunk_pattern
+        ])
 
     logger.info("[CMD] ffmpeg komutu:")
     logger.info(f"  {' '.join(cmd)}")
     logger.info("-" * 60)
 
     try:
-        # ffmpeg stdout'u tamamen kapat, sadece HATALARI kaydet
-        log_file = open(Path("logs/ffmpeg_debug.log"), "w", encoding="utf-8")
-
         process = subprocess.Popen(
             cmd,
             stdin=subprocess.PIPE,
-            stdout=subprocess.DEVNULL,   # ← stdout artık asla yazmıyor
-            stderr=log_file,             # ← sadece HATALAR yazılıyor
+            stdout=subprocess.PIPE if stream else subprocess.DEVNULL,  # ← sadece akış modunda
+            stderr=subprocess.PIPE,      # ← telemetri thread'i okur, ffmpeg_debug.log'a da yazar
             creationflags=subprocess.CREATE_NO_WINDOW if IS_WINDOWS else 0
         )
 
         recording_start_time = time.time()
+        ffmpeg_telemetry = FFmpegTelemetry(recording_start_time)
+        threading.Thread(
+            target=ffmpeg_telemetry.follow,
+            args=(process.stderr, Path("logs") / workspace.log_name("ffmpeg_debug.log")),
+            name="ffmpeg-stderr", daemon=True
+        ).start()
         time.sleep(3)
 
 
@@ -315,68 +436,107 @@ def stop_ffmpeg_recording(process):
 # ============================================================
 
 def get_audio_duration(path: Path) -> float:
-    """ffprobe ile ses süresini saniye olarak al"""
+    """WebM metadata'sından ses süresini saniye olarak al (ffprobe yok, önbellekli)"""
+    info = read_webm_info(path)
+    return info["duration"] if info else 0.0
+
+def check_voice_activity(seg_path: Path) -> dict:
+    """
+    Segmentte konuşma var mı? Kararı ve konuşma oranını vad_decisions.jsonl'a kaydeder.
+
+    Returns:
+        dict: VAD sonucu ("silent", "speech_ratio", ...) veya None (VAD kapalı / analiz edilemedi)
+    """
+    if not VAD_ENABLED:
+        return None
+
+    t0 = time.time()
+    vad = analyze_segment(seg_path, FFMPEG_PATH)
+    if vad is None:
+        logger.info(f"[VAD] {seg_path.name} analiz edilemedi, segment gönderilecek")
+        return None
+
+    decision = "skip" if vad["silent"] else "send"
+    logger.info(
+        f"[VAD] {seg_path.name}: konuşma %{vad['speech_ratio'] * 100:.1f} "
+        f"({vad['speech_seconds']:.1f}s / {vad['total_seconds']:.0f}s) → {decision.upper()} "
+        f"[{time.time() - t0:.2f}s]"
+    )
+
     try:
-        ffprobe_path = FFMPEG_PATH.replace("ffmpeg.exe", "ffprobe.exe") if IS_WINDOWS else FFMPEG_PATH.replace("ffmpeg", "ffprobe")
-        cmd = [
-            ffprobe_path, "-v", "quiet", "-print_format", "json",
-            "-show_format", str(path)
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
-        info = json.loads(result.stdout or "{}")
-        return float(info.get("format", {}).get("duration", 0.0))
-    except Exception:
-        return 0.0
+        record = {"segment": seg_path.name, "decision": decision, "timestamp": time.time(), **vad}
+        with open(vad_log_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except Exception as e:
+        logger.debug(f"VAD log yazılamadı: {e}")
+
+    if vad["silent"]:
+        with chunks_lock:
+            uploaded_chunks.add(seg_path.name)  # Tekrar denenmesin
+            upload_stats["silent"] += 1
+    return vad
+
+def _get_http_session() -> requests.Session:
+    """Upload thread'ine ait requests.Session (keep-alive ile TCP bağlantısı tekrar kullanılır)"""
+    session = getattr(_http, "session", None)
+    if session is None:
+        session = requests.Session()
+        _http.session = session
+    return session
+
+def report_skipped_segment(seq: int, reason: str):
+    """Gönderilmeyen segmenti sunucuya bildir (sıralama watermark'ı onu beklemesin)"""
+    if seq is None:
+        return
+    try:
+        data = {"seq": str(seq), "recording_id": RECORDING_ID, "reason": reason}
+        if TASK_ID:
+            data["task_id"] = TASK_ID
+        _get_http_session().post(SKIP_URL, data=data, timeout=10)
+    except Exception as e:
+        logger.debug(f"Skip bildirimi gönderilemedi (seq {seq}): {e}")
 
-def upload_single_segment(seg_path: Path) -> bool:
-    """Tek bir segmenti sunucuya yükle"""
-    global uploaded_chunks
-    
-    if seg_path.name in uploaded_chunks:
-        return True
+def upload_single_segment(seg_path: Path, start_time: float = None, duration: float = None,
+                          seq: int = None) -> bool:
+    """
+    Tek bir segmenti sunucuya yükle.
+    start_time/duration segment listesinden geliyorsa kesin değerler kullanılır,
+    yoksa (fallback) WebM metadata süresi ve dosya mtime'ından tahmin edilir.
+    seq: sunucunun segmentleri geliş sırasından bağımsız, zaman sırasıyla birleştirmesi için.
+    """
+    with chunks_lock:
+        if seg_path.name in uploaded_chunks:
+            return True
 
     # Validasyon
     if not is_valid_chunk(seg_path):
+        report_skipped_segment(seq, "invalid")
         return False
 
+    # VAD: Sessiz segment ise hiç gönderme (Gemini quota + kuyruk süresi kazancı)
+    vad = check_voice_activity(seg_path)
+    if vad and vad["silent"]:
+        report_skipped_segment(seq, "silent")
+        return True
+
     size_mb = seg_path.stat().st_size / (1024 * 1024)
     file_mtime = seg_path.stat().st_mtime
     
     # Süreyi ve Başlangıç Zamanını Hesapla
-    duration = get_audio_duration(seg_path)
-    start_time = file_mtime - duration if duration > 0 else 0
+    if start_time is None or duration is None:
+        duration = get_audio_duration(seg_path)
+        start_time = file_mtime - duration if duration > 0 else 0
     
-    # "Speaker Timeline" log dosyasından (speaker_activity_log.json)
-    # Geçici logic: Server tarafında daha detaylı yapılacak ama burada da basit bir check kalsın
+    # Segment sonuna en yakın konuşmacı kaydı (10 sn tolerans)
+    # Detaylı eşleştirme server tarafında timeline hint ile yapılır
     detected_speaker = None
     try:
-        log_file = Path("speaker_activity_log.json") # DÜZELTME: Doğru dosya ismi
-        if log_file.exists():
-            data = json.loads(log_file.read_text(encoding="utf-8"))
-            # Data bir list olmalı
-            if isinstance(data, list):
-                # Bu dosyanın zamanına en yakın logu bul
-                closest_diff = 9999
-                for entry in data[-50:]: # Son 50 loga bak
-                    try:
-                        t = entry.get("timestamp", 0)
-                        speakers = entry.get("speakers", [])
-                        # Log zamanı, dosyanın başlangıç ve bitişi arasında mı?
-                        # Veya bitişine yakın mı?
-                        if abs(t - file_mtime) < 10: # 10 saniye tolerans
-                            detected_speaker = speakers[0] if speakers else None
-                            break
-                    except: pass
+        speakers = get_timeline().nearest(start_time + duration, tolerance=10)
+        detected_speaker = speakers[0] if speakers else None
     except Exception: pass
 
     # Platform tespiti (meet, zoom, teams)
-    platform = None
-    try:
-        participants_file = Path("current_meeting_participants.json")
-        if participants_file.exists():
-            pdata = json.loads(participants_file.read_text(encoding="utf-8"))
-            platform = pdata.get("platform")
-    except: pass
+    platform = get_current_platform()
 
     logger.info(f"[LIVE-UPLOAD] {seg_path.name} ({size_mb:.2f} MB) gönderiliyor... (Start: {start_time:.0f}, Platform: {platform})")
 
@@ -385,18 +545,32 @@ def upload_single_segment(seg_path: Path) -> bool:
         # METADATA GÖNDER
         data = {
             "start_time": str(start_time),  # String olarak gönder
-            "duration": str(duration)
+            "duration": str(duration),
+            "recording_id": RECORDING_ID
         }
+        if seq is not None:
+            data["seq"] = str(seq)
+        if vad:
+            data["speech_ratio"] = f"{vad['speech_ratio']:.4f}"
         if detected_speaker:
             data["speaker_name"] = detected_speaker
         if platform:
             data["platform"] = platform
+        if TASK_ID:
+            data["task_id"] = TASK_ID
             
         try:
-            r = requests.post(SERVER_URL, files=files, data=data, timeout=300)
-            if r.status_code == 200:
+            r = _get_http_session().post(SERVER_URL, files=files, data=data, timeout=300)
+            if r.status_code == 202:
+                # Sunucu işi kuyruğa aldı: sonucu bekle (havuz boyutu = eşzamanlı iş sınırı)
+                ok = wait_for_transcribe_job(r.json(), seg_path.name)
+            else:
+                ok = r.status_code == 200
+            if ok:
                 logger.info(f"[SUCCESS] {seg_path.name} yüklendi!")
-                uploaded_chunks.add(seg_path.name)
+                with chunks_lock:
+                    uploaded_chunks.add(seg_path.name)
+                    upload_stats["sent"] += 1
                 return True
             else:
                 logger.info(f"[ERROR] {seg_path.name} HTTP {r.status_code}")
@@ -404,43 +578,498 @@ def upload_single_segment(seg_path: Path) -> bool:
             logger.info(f"[ERROR] Upload hatası: {e}")
             
     return False
-            
+
+def wait_for_transcribe_job(job: dict, name: str, timeout: float = 900) -> bool:
+    """/transcribe-jobs/{job_id} durumunu iş bitene kadar yokla"""
+    status_url = SERVER_URL.rsplit("/", 1)[0] + job.get("status_url", f"/transcribe-jobs/{job.get('job_id')}")
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        time.sleep(JOB_POLL_INTERVAL)
+        try:
+            r = _get_http_session().get(status_url, timeout=30)
+        except Exception as e:
+            logger.debug(f"Job durum hatası ({name}): {e}")
+            continue
+        if r.status_code == 404:
+            logger.info(f"[ERROR] {name} job kayboldu (sunucu yeniden başlamış olabilir)")
+            return False
+        status = r.json().get("status")
+        if status == "done":
+            return True
+        if status == "failed":
+            logger.info(f"[ERROR] {name} transkripsiyon başarısız: {r.json().get('error')}")
+            return False
+    logger.info(f"[ERROR] {name} job zaman aşımı ({timeout:.0f}s)")
     return False
 
-def process_live_queue():
-    """Biten segmentleri bul ve hemen yükle"""
-    global segment_dir
-    
+# ============================================================
+# UPLOAD HAVUZU (Paralel, kayıt döngüsünden bağımsız)
+# ============================================================
+
+def upload_worker():
+    """Kuyruktan segment alıp yükleyen arka plan thread'i"""
+    while True:
+        item = upload_queue.get()
+        if item is None:
+            upload_queue.task_done()
+            break
+
+        seg_path, delete_after, start_time, duration, seq, attempt = item
+        success = retrying = False
+        try:
+            success = upload_single_segment(seg_path, start_time=start_time, duration=duration, seq=seq)
+            if success and delete_after:
+                # Yüklendiyse sil (yer kaplamasın)
+                try:
+                    seg_path.unlink()
+                    logger.info(f"[CLEAN] {seg_path.name} silindi (Live Mode)")
+                except Exception: pass
+        except Exception as e:
+            logger.info(f"[WARN] Upload worker hatası ({seg_path.name}): {e}")
+        try:
+            if not success:
+                # Segment listesi satırı zaten okundu: tekrar denenmezse sunucunun
+                # watermark'ı bu seq'i REORDER_GAP_TIMEOUT boyunca bekler
+                if attempt < UPLOAD_MAX_ATTEMPTS:
+                    delay = UPLOAD_RETRY_DELAY * 2 ** (attempt - 1)
+                    logger.info(f"[RETRY] {seg_path.name} {delay:.0f}s sonra tekrar denenecek "
+                                f"({attempt}/{UPLOAD_MAX_ATTEMPTS})")
+                    retry = threading.Timer(delay, upload_queue.put,
+                                            args=((seg_path, delete_after, start_time, duration, seq, attempt + 1),))
+                    retry.daemon = True
+                    retry.start()
+                    retrying = True
+                else:
+                    with chunks_lock:
+                        upload_stats["failed"] += 1
+                    # Watermark beklemesin; final gönderim aynı seq ile yine deneyebilir
+                    report_skipped_segment(seq, "upload_failed")
+        finally:
+            # Tekrar denenecek segment kuyrukta sayılır (final gönderim onu bekler)
+            if not retrying:
+                with chunks_lock:
+                    pending_chunks.discard(seg_path.name)
+            upload_queue.task_done()
+
+def start_upload_pool():
+    """UPLOAD_CONCURRENCY adet upload thread'i başlat"""
+    for i in range(UPLOAD_CONCURRENCY):
+        t = threading.Thread(target=upload_worker, name=f"upload-{i}", daemon=True)
+        t.start()
+        upload_threads.append(t)
+    logger.info(f"[UPLOAD-POOL] {UPLOAD_CONCURRENCY} upload thread'i başlatıldı")
+
+def enqueue_segment(seg_path: Path, delete_after: bool = True,
+                    start_time: float = None, duration: float = None) -> bool:
+    """Segmenti upload kuyruğuna ekle (zaten yüklendiyse veya kuyruktaysa eklemez)"""
+    with chunks_lock:
+        if seg_path.name in uploaded_chunks or seg_path.name in pending_chunks:
+            return False
+        pending_chunks.add(seg_path.name)
+        seq = upload_seq["by_name"].get(seg_path.name)
+        if seq is None:
+            seq = upload_seq["by_name"][seg_path.name] = upload_seq["next"]
+            upload_seq["next"] += 1
+
+    upload_queue.put((seg_path, delete_after, start_time, duration, seq, 1))
+    logger.debug(f"[UPLOAD-POOL] {seg_path.name} kuyruğa eklendi")
+    return True
+
+def wait_for_uploads(timeout: float) -> bool:
+    """Kuyruktaki ve devam eden tüm upload'ların bitmesini bekle (timeout ile)"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with chunks_lock:
+            if not pending_chunks:
+                return True
+        time.sleep(0.5)
+
+    with chunks_lock:
+        remaining = sorted(pending_chunks)
+    logger.info(f"[UPLOAD-POOL] Timeout! {len(remaining)} segment yüklenemedi: {remaining}")
+    return False
+
+def stop_upload_pool():
+    """Upload thread'lerini durdur (kuyruk boşaldıktan sonra çağrılmalı)"""
+    for _ in upload_threads:
+        upload_queue.put(None)
+    for t in upload_threads:
+        t.join(timeout=5)
+    upload_threads.clear()
+
+# ============================================================
+# SEGMENT LİSTESİ TAKİBİ (ffmpeg -segment_list → upload kuyruğu)
+# ============================================================
+
+def _segment_wallclock(ts: float) -> float:
+    """Segment listesindeki zamanı epoch saniyesine çevir"""
+    # Windows'ta -use_wallclock_as_timestamps ile zaman zaten epoch olabilir
+    if ts > 1e9 or not recording_start_time:
+        return ts
+    return recording_start_time + ts
+
+def read_new_segment_entries() -> list:
+    """
+    segments.csv dosyasına ffmpeg'in eklediği YENİ satırları oku.
+    Sadece son okunan offset'ten sonrası okunur; yarım satırlar bir sonraki okumaya kalır.
+
+    Returns:
+        list: [(Path, start_epoch, end_epoch), ...]
+    """
+    entries = []
+    with segment_list_lock:
+        if not segment_list_file.exists():
+            return entries
+
+        with open(segment_list_file, "r", encoding="utf-8") as f:
+            f.seek(segment_list_state["offset"])
+            chunk = f.read()
+            segment_list_state["offset"] = f.tell()
+
+        data = segment_list_state["partial"] + chunk
+        lines = data.split("\n")
+        segment_list_state["partial"] = lines.pop()  # Son eleman yarım satır olabilir
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            name, seg_start, seg_end = line.rsplit(",", 2)
+            name = name.strip('"')
+            start_epoch = _segment_wallclock(float(seg_start))
+            end_epoch = _segment_wallclock(float(seg_end))
+            entries.append((segment_dir / Path(name).name, start_epoch, end_epoch))
+        except ValueError:
+            logger.info(f"[WARN] Segment listesi satırı okunamadı: {line}")
+    return entries
+
+def dispatch_segment_entries(entries: list, delete_after: bool = True) -> int:
+    """Biten chunk'ları planlayıcıya ver; tamamlanan birimler upload kuyruğuna gider"""
+    queued = 0
+    for seg_path, start_epoch, end_epoch in entries:
+        logger.debug(f"[SEGMENT] {seg_path.name} kapandı ({end_epoch - start_epoch:.1f}s)")
+        queued += add_chunk_to_plan(seg_path, start_epoch, end_epoch, delete_after=delete_after)
+    return queued
+
+# ============================================================
+# ADAPTİF SEGMENTASYON (chunk → upload birimi)
+# ============================================================
+
+def _segment_order(path: Path):
+    """
+    Son gönderim sırası: dosyanın kapanma zamanı, eşitlikte numarası.
+    Ad sırası yetmez: unit_* birimleri kendilerinden sonraki chunk_* dosyalarından
+    önce gelmeli ve numara hane sayısını aşınca (chunk_1000 < chunk_101) bozulur.
+    """
     try:
-        # Tüm segmentleri al, isme göre sırala (tarih sırası)
-        all_segments = sorted(segment_dir.glob("chunk_*.webm"))
-        
-        # DEBUG: Segment sayısını logla
-        if len(all_segments) > 0:
-            try: logger.debug(f"[DEBUG] Live Check: {len(all_segments)} segment bulundu: {[s.name for s in all_segments]}")
-            except Exception: pass
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        mtime = 0.0  # Yüklenip silinmiş; aşağıdaki filtre atlar
+    digits = path.stem.rpartition("_")[2]
+    return (mtime, int(digits) if digits.isdigit() else 0)
 
-        # Eğer 2'den az dosya varsa (biri yazılıyor), işlem yapma
-        if len(all_segments) < 2:
-            return
 
-        # SON dosya hariç diğerleri bitmiş demektir
-        # Çünkü ffmpeg sırayla yazar (001, 002...)
-        # En sonuncusu (aktif olan) hariç hepsini yükle
-        finished_segments = all_segments[:-1]
-        
-        for seg in finished_segments:
-            if seg.name not in uploaded_chunks:
-                success = upload_single_segment(seg)
-                if success:
-                    # Yüklendiyse sil (yer kaplamasın)
-                    try:
-                        seg.unlink()
-                        logger.info(f"[CLEAN] {seg.name} silindi (Live Mode)")
-                    except Exception: pass
-                    
+def _unit_target(unit_index: int) -> float:
+    """unit_index'inci birim için hedef süre (saniye)"""
+    return SEGMENT_SCHEDULE[min(unit_index, len(SEGMENT_SCHEDULE) - 1)]
+
+def _speaker_change_near(t: float) -> bool:
+    """t anının ± SPEAKER_CHANGE_WINDOW çevresinde aktif konuşmacı değişti mi?"""
+    try:
+        entries = get_timeline().between(t - SPEAKER_CHANGE_WINDOW, t + SPEAKER_CHANGE_WINDOW)
     except Exception as e:
-        logger.info(f"[WARN] Live queue hatası: {e}")
+        logger.debug(f"Timeline okuma hatası: {e}")
+        return False
+
+    before = [speakers for ts, speakers in entries if ts <= t]
+    after = [speakers for ts, speakers in entries if ts > t]
+    return bool(before and after and set(before[-1]) != set(after[0]))
+
+def _cut_reason(chunk_path: Path, chunk_end: float):
+    """Bu chunk'ın sonu iyi bir kesim noktası mı? (konuşmacı değişimi veya sessizlik)"""
+    if _speaker_change_near(chunk_end):
+        return "speaker-change"
+    if tail_is_silent(chunk_path, FFMPEG_PATH):
+        return "silence"
+    return None
+
+def _concat_chunks(chunks: list, unit_path: Path) -> bool:
+    """Chunk'ları yeniden encode etmeden (-c copy) tek WebM birimde birleştir"""
+    list_path = unit_path.with_suffix(".txt")
+    try:
+        list_path.write_text(
+            "".join("file '{}'\n".format(str(c[0].resolve()).replace("'", "'\\''")) for c in chunks),
+            encoding="utf-8"
+        )
+        cmd = [
+            FFMPEG_PATH, "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "concat", "-safe", "0", "-i", str(list_path),
+            "-c", "copy", str(unit_path)
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60,
+                                creationflags=subprocess.CREATE_NO_WINDOW if IS_WINDOWS else 0)
+        if result.returncode != 0:
+            logger.info(f"[WARN] Chunk birleştirme başarısız: {result.stderr[:200]}")
+            return False
+        return unit_path.exists()
+    except Exception as e:
+        logger.info(f"[WARN] Chunk birleştirme hatası: {e}")
+        return False
+    finally:
+        try: list_path.unlink()
+        except Exception: pass
+
+def flush_unit(reason: str, delete_after: bool = True) -> int:
+    """Bekleyen chunk'ları tek birim olarak upload kuyruğuna ver (plan_lock altında çağrılır)"""
+    chunks = plan_state["chunks"]
+    if not chunks:
+        return 0
+    plan_state["chunks"] = []
+    unit_index = plan_state["unit_index"]
+    plan_state["unit_index"] += 1
+
+    start_epoch = chunks[0][1]
+    end_epoch = chunks[-1][2]
+    duration = max(0.0, end_epoch - start_epoch)
+
+    if len(chunks) == 1:
+        unit_path = chunks[0][0]
+    else:
+        unit_path = segment_dir / f"unit_{unit_index:05d}.webm"
+        if _concat_chunks(chunks, unit_path):
+            for c in chunks:
+                try: c[0].unlink()
+                except Exception: pass
+        else:
+            # Fallback: chunk'ları tek tek gönder
+            queued = 0
+            for c in chunks:
+                queued += enqueue_segment(c[0], delete_after=delete_after,
+                                          start_time=c[1], duration=max(0.0, c[2] - c[1]))
+            return queued
+
+    logger.info(
+        f"[PLAN] Birim #{unit_index}: {unit_path.name} ({len(chunks)} chunk, {duration:.1f}s, "
+        f"hedef {_unit_target(unit_index):.0f}s, kesim: {reason})"
+    )
+    return int(enqueue_segment(unit_path, delete_after=delete_after,
+                               start_time=start_epoch, duration=duration))
+
+def add_chunk_to_plan(chunk_path: Path, start_epoch: float, end_epoch: float,
+                      delete_after: bool = True) -> int:
+    """
+    Biten chunk'ı mevcut birime ekle; birim hedef süreye ulaştıysa uygun noktada kes.
+    - Hedefin %75'i geçildiyse: konuşmacı değişimi / sessizlikte kes
+    - Hedefin 1.5 katı geçildiyse: her durumda kes
+    """
+    with plan_lock:
+        plan_state["chunks"].append((chunk_path, start_epoch, end_epoch))
+        unit_len = end_epoch - plan_state["chunks"][0][1]
+        target = _unit_target(plan_state["unit_index"])
+
+        if unit_len >= target * SEGMENT_MAX_FACTOR:
+            return flush_unit("max-length", delete_after)
+        if unit_len >= target * SEGMENT_MIN_FACTOR:
+            reason = _cut_reason(chunk_path, end_epoch)
+            if reason:
+                return flush_unit(reason, delete_after)
+        return 0
+
+def flush_pending_plan(delete_after: bool = False) -> int:
+    """Kayıt bittiğinde yarım kalan birimi gönder"""
+    with plan_lock:
+        return flush_unit("final", delete_after)
+
+def segment_list_watcher(poll_interval: float = 0.25):
+    """
+    ffmpeg'in segment listesini takip eden thread.
+    Dizin taraması yapmaz; sadece CSV'nin yeni eklenen baytlarını okur.
+    """
+    while recording_active:
+        try:
+            entries = read_new_segment_entries()
+            if entries:
+                dispatch_segment_entries(entries, delete_after=True)
+        except Exception as e:
+            logger.info(f"[WARN] Segment listesi okuma hatası: {e}")
+        time.sleep(poll_interval)
+
+# ============================================================
+# KAYIT SAĞLIĞI METRİKLERİ
+# ============================================================
+
+def publish_recorder_metrics(final: bool = False) -> dict:
+    """ffmpeg telemetrisi + upload sayaçlarını data/ altına yaz"""
+    if ffmpeg_telemetry is None:
+        return None
+    metrics = ffmpeg_telemetry.snapshot()
+    with chunks_lock:
+        metrics.update(
+            segments_sent=upload_stats["sent"],
+            segments_failed=upload_stats["failed"],
+            segments_silent=upload_stats["silent"],
+            segments_pending=len(pending_chunks),
+        )
+    metrics["task_id"] = workspace.get_task_id()
+    metrics["mode"] = "stream" if stream_state["thread"] is not None else "segment"
+    metrics["final"] = final
+
+    # Sağlık durumu değiştiğinde logla (sorun transkriptte boşluk olarak görülmeden önce)
+    if metrics["healthy"] != publish_recorder_metrics.last_healthy:
+        if not metrics["healthy"]:
+            logger.info(
+                f"[HEALTH] ⚠ Kayıt sağlıksız: drift={metrics['drift_seconds']}s, "
+                f"stalled={metrics['stalled']}, overrun={metrics['overruns']}, drop={metrics['dropped_frames']}"
+            )
+        elif publish_recorder_metrics.last_healthy is not None:
+            logger.info("[HEALTH] ✓ Kayıt tekrar sağlıklı")
+        publish_recorder_metrics.last_healthy = metrics["healthy"]
+
+    try:
+        tmp = metrics_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps(metrics, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(metrics_file)
+    except Exception as e:
+        logger.debug(f"Metrik yazma hatası: {e}")
+    return metrics
+
+publish_recorder_metrics.last_healthy = None
+
+# ============================================================
+# CANLI AKIŞ (WebSocket /stream-audio)
+# ============================================================
+
+def open_audio_stream():
+    """Sunucuya WebSocket bağlantısı aç; kurulamazsa None (segment moduna dönülür)"""
+    try:
+        from websockets.sync.client import connect
+    except ImportError:
+        logger.info("[STREAM] websockets paketi yok, segment moduna dönülüyor")
+        return None
+    try:
+        ws = connect(STREAM_URL, open_timeout=10, max_size=None)
+    except Exception as e:
+        logger.info(f"[STREAM] Bağlantı kurulamadı ({STREAM_URL}): {e}")
+        return None
+
+    # Sunucu yanıtları: pencere sonuçları ve kapanıştaki "done"
+    def receive_loop():
+        try:
+            for message in ws:
+                msg = json.loads(message)
+                if msg.get("type") == "window":
+                    with chunks_lock:
+                        upload_stats["sent" if msg.get("ok") else "failed"] += 1
+                    logger.info(f"[STREAM] Pencere #{msg.get('index')} işlendi ({msg.get('duration', 0):.1f}s, ok={msg.get('ok')})")
+                elif msg.get("type") == "done":
+                    stream_state["done"].set()
+        except Exception:
+            pass
+
+    threading.Thread(target=receive_loop, name="stream-recv", daemon=True).start()
+    logger.info(f"[STREAM] Bağlandı: {STREAM_URL}")
+    return ws
+
+def _stream_hello(ws):
+    """Her (yeniden) bağlantıda ilk mesaj: wall-clock başlangıcı ve metadata"""
+    ws.send(json.dumps({
+        "type": "start",
+        "start_time": recording_start_time,
+        "platform": get_current_platform(),
+        "speaker_name": get_current_speaker()
+    }))
+
+def _spill_backlog(splitter, backlog: deque):
+    """Gönderilemeyen cluster'ları oynatılabilir WebM dosyasına yazıp HTTP upload havuzuna ver"""
+    if not backlog or not splitter.header_complete:
+        return
+    first_tc = backlog[0][1]
+    last_tc = backlog[-1][1]
+    spill_path = segment_dir / f"stream_spill_{stream_state['spill_index']:05d}.webm"
+    stream_state["spill_index"] += 1
+    with open(spill_path, "wb") as f:
+        f.write(splitter.header)
+        for cluster, _ in backlog:
+            f.write(cluster)
+    logger.info(f"[STREAM] {len(backlog)} cluster gönderilemedi → {spill_path.name} HTTP ile yüklenecek")
+    backlog.clear()
+    enqueue_segment(spill_path, delete_after=True,
+                    start_time=recording_start_time + first_tc,
+                    duration=max(0.0, last_tc - first_tc + 1.0))
+
+def audio_stream_sender(process, ws):
+    """
+    ffmpeg stdout'undaki WebM akışını cluster'lara bölüp WebSocket ile gönder.
+    Bağlantı koparsa yeniden bağlanır (header tekrar gönderilir); bu sırada
+    biriken cluster'lar bellekte tutulur, sınır aşılırsa dosya olarak yüklenir.
+    """
+    splitter = WebMStreamSplitter()
+    backlog = deque()          # (cluster_bytes, saniye)
+    header_sent = False
+    next_retry = 0.0
+
+    if ws is not None:
+        try:
+            _stream_hello(ws)
+        except Exception:
+            ws = None
+
+    while True:
+        data = process.stdout.read1(65536)
+        backlog.extend(splitter.feed(data) if data else splitter.finish())
+
+        if ws is None and time.time() >= next_retry:
+            ws = open_audio_stream()
+            header_sent = False
+            if ws is None:
+                next_retry = time.time() + 5
+            else:
+                try:
+                    _stream_hello(ws)
+                except Exception:
+                    ws = None
+
+        if ws is not None:
+            try:
+                if not header_sent and splitter.header_complete:
+                    ws.send(splitter.header)
+                    header_sent = True
+                while header_sent and backlog:
+                    ws.send(backlog[0][0])
+                    backlog.popleft()
+            except Exception as e:
+                logger.info(f"[STREAM] Gönderim hatası, yeniden bağlanılacak: {e}")
+                try: ws.close()
+                except Exception: pass
+                ws = None
+
+        if len(backlog) > STREAM_BACKLOG_CLUSTERS:
+            _spill_backlog(splitter, backlog)
+
+        if not data:
+            break  # ffmpeg kapandı (EOF)
+
+    # Akış bitti: kalanları gönder, sunucunun son pencereyi işlemesini bekle
+    if ws is not None and not backlog:
+        try:
+            ws.send(json.dumps({"type": "end"}))
+            if not stream_state["done"].wait(FINAL_UPLOAD_TIMEOUT):
+                logger.info("[STREAM] Sunucu son pencereyi zamanında bitirmedi")
+            ws.close()
+            logger.info("[STREAM] Akış tamamlandı")
+            return
+        except Exception as e:
+            logger.info(f"[STREAM] Kapanış hatası: {e}")
+    _spill_backlog(splitter, backlog)
+
+def finish_audio_stream():
+    """Akış thread'inin (ffmpeg EOF → end → done) bitmesini bekle"""
+    thread = stream_state["thread"]
+    if thread is not None:
+        thread.join(FINAL_UPLOAD_TIMEOUT)
+        if thread.is_alive():
+            logger.info("[STREAM] Akış thread'i zaman aşımına uğradı")
 
 # ============================================================
 # FINAL WebM SEGMENTLERİNİ GÖNDERME
@@ -459,48 +1088,29 @@ def is_valid_chunk(path: Path) -> bool:
         logger.info(f"[SKIP] {path.name} → Çok küçük ({size_kb:.1f} KB)")
         return False
 
-    # 2) ffprobe ile duration kontrolü
-    try:
-        ffprobe_path = FFMPEG_PATH.replace("ffmpeg.exe", "ffprobe.exe") if IS_WINDOWS else FFMPEG_PATH.replace("ffmpeg", "ffprobe")
-        cmd = [
-            ffprobe_path,
-            "-v", "quiet",
-            "-print_format", "json",
-            "-show_format",
-            "-show_streams",
-            str(path)
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-        info = json.loads(result.stdout or "{}")
+    # 2) WebM metadata ile duration kontrolü (EBML okuyucu, subprocess yok)
+    info = read_webm_info(path)
+    if info is None:
+        logger.info(f"[WARN] {path.name} → WebM metadata okunamadı, yine de gönderilecek")
+        return True  # 🔥 Hata durumunda skip etme (false positive önleme)
 
-        duration = float(info.get("format", {}).get("duration", 0.0))
+    duration = info["duration"]
 
-        # 🔥 GEVŞETME: 0.5s → 0.3s
-        if duration < 0.3:
-            # WebM/Opus segment dosyalarında ffprobe duration yanlış dönebilir
-            # Dosya boyutu > 100KB ise yine de gönder (gerçek ses var)
-            if size_kb > 100:
-                logger.info(f"[WARN] {path.name} → ffprobe duration={duration:.3f}s ama boyut={size_kb:.0f}KB, yine de gönderilecek")
-            else:
-                logger.info(f"[SKIP] {path.name} → Duration çok kısa ({duration:.3f} sn)")
-                return False
-
-        # 3) Paket (cluster) sayısı kontrolü
-        streams = info.get("streams", [])
-        if streams:
-            stream0 = streams[0]
-            if "nb_read_packets" in stream0:
-                packets = int(stream0["nb_read_packets"])
-                if packets < 2:
-                    logger.info(f"[SKIP] {path.name} → Bozuk WebM (paket sayısı çok az: {packets})")
-                    return False
+    # 🔥 GEVŞETME: 0.5s → 0.3s
+    if duration < 0.3:
+        # Kapanmamış segmentlerde duration eksik olabilir
+        # Dosya boyutu > 100KB ise yine de gönder (gerçek ses var)
+        if size_kb > 100:
+            logger.info(f"[WARN] {path.name} → duration={duration:.3f}s ama boyut={size_kb:.0f}KB, yine de gönderilecek")
+        else:
+            logger.info(f"[SKIP] {path.name} → Duration çok kısa ({duration:.3f} sn)")
+            return False
 
-    except subprocess.TimeoutExpired:
-        logger.info(f"[WARN] {path.name} → ffprobe timeout, yine de gönderilecek")
-        return True  # 🔥 Timeout durumunda skip etme
-    except Exception as e:
-        logger.info(f"[WARN] {path.name} → ffprobe hatası: {e}, yine de gönderilecek")
-        return True  # 🔥 Hata durumunda skip etme (false positive önleme)
+    # 3) Paket (block) sayısı kontrolü
+    packets = info["packets"]
+    if packets < 2:
+        logger.info(f"[SKIP] {path.name} → Bozuk WebM (paket sayısı çok az: {packets})")
+        return False
 
     return True
 
@@ -526,15 +1136,32 @@ def send_final_webm():
         stop_ffmpeg_recording(ffmpeg_process)
         ffmpeg_process = None
 
+    # 2.1 ffmpeg kapanırken listeye yazılan son segment(ler)i kesin zamanlarıyla kuyruğa al
+    if not upload_threads:
+        start_upload_pool()
+    if stream_state["thread"] is not None:
+        # Akış modu: ses zaten sunucuda, sadece son pencereyi bekle
+        finish_audio_stream()
+    try:
+        dispatch_segment_entries(read_new_segment_entries(), delete_after=False)
+        flush_pending_plan(delete_after=False)
+    except Exception as e:
+        logger.info(f"[WARN] Segment listesi son okuma hatası: {e}")
+
     # 3.  SADECE YENİ OLUŞTURULAN SEGMENT'LERİ LİSTELE
     # Kayıt başladıktan SONRA oluşturulan dosyaları al
-    all_segments = sorted(segment_dir.glob("chunk_*.webm"))
+    # (unit_*.webm: planner'ın birleştirdiği, henüz yüklenmemiş birimler)
+    all_segments = sorted(list(segment_dir.glob("chunk_*.webm")) + list(segment_dir.glob("unit_*.webm")),
+                          key=_segment_order)
     
     if recording_start_time:
         # Sadece kayıt başladıktan sonra değiştirilmiş dosyaları al
         segments = []
         for seg in all_segments:
-            file_mtime = seg.stat().st_mtime
+            try:
+                file_mtime = seg.stat().st_mtime
+            except FileNotFoundError:
+                continue  # Live upload thread'i az önce yükleyip sildi
             if file_mtime >= recording_start_time:
                 segments.append(seg)
             else:
@@ -545,8 +1172,11 @@ def send_final_webm():
         segments = all_segments
         logger.info(f"[WARN] recording_start_time yok, tüm dosyalar gönderilecek")
 
-    if not segments:
+    if not segments and stream_state["thread"] is None:
         logger.info("[ERROR] Hiç segment bulunamadı!")
+        # Yine de devam eden live upload'ları bitir
+        wait_for_uploads(FINAL_UPLOAD_TIMEOUT)
+        stop_upload_pool()
         return
 
     logger.info(f"[INFO] {len(segments)} segment bulundu")
@@ -559,58 +1189,56 @@ def send_final_webm():
     total_duration = 0.0
     
     for idx, seg in enumerate(segments, start=1):
-        size_mb = seg.stat().st_size / (1024 * 1024)
-        total_size_bytes += seg.stat().st_size
-        
-        # Süreyi al
         try:
-            ffprobe_path = FFMPEG_PATH.replace("ffmpeg.exe", "ffprobe.exe") if IS_WINDOWS else FFMPEG_PATH.replace("ffmpeg", "ffprobe")
-            cmd = [
-                ffprobe_path, "-v", "quiet", "-print_format", "json",
-                "-show_format", str(seg)
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=5)
-            info = json.loads(result.stdout or "{}")
-            duration = float(info.get("format", {}).get("duration", 0.0))
+            size_bytes = seg.stat().st_size
+        except FileNotFoundError:
+            logger.info(f"  [{idx}] {seg.name}: live upload ile gönderildi")
+            continue
+        size_mb = size_bytes / (1024 * 1024)
+        total_size_bytes += size_bytes
+        
+        # Süreyi al (önbellekten; upload sırasında tekrar parse edilmez)
+        info = read_webm_info(seg)
+        if info:
+            duration = info["duration"]
             total_duration += duration
-            logger.info(f"  [{idx}] {seg.name}: {size_mb:.2f} MB, {duration:.1f}s")
-        except Exception:
+            logger.info(f"  [{idx}] {seg.name}: {size_mb:.2f} MB, {duration:.1f}s, {info['packets']} paket ({info['codec']})")
+        else:
             logger.info(f"  [{idx}] {seg.name}: {size_mb:.2f} MB, (süre belirlenemedi)")
     
     logger.info("-" * 60 + "\n")
 
-    # 4. Timeline Verisini Oku (Teams için Speaker Match)
-    timeline_data = []
+    # 4. Timeline indeksini güncelle (Teams için Speaker Match; sadece yeni satırlar okunur)
     try:
-        timeline_file = Path("speaker_timeline.jsonl")
-        if timeline_file.exists():
-            lines = timeline_file.read_text(encoding="utf-8").strip().split("\n")
-            for line in lines:
-                try:
-                    timeline_data.append(json.loads(line))
-                except Exception: pass
-            logger.info(f"[TIMELINE] {len(timeline_data)} satır konuşmacı geçmişi yüklendi")
+        timeline = get_timeline()
+        timeline.refresh()
+        logger.info(f"[TIMELINE] {len(timeline)} satır konuşmacı geçmişi indekste")
     except Exception as e:
         logger.info(f"[WARN] Timeline okuma hatası: {e}")
 
-    # 5. Her segmenti sırayla backend'e gönder
-    sent_count = 0
-    skipped_count = 0
-    
-    for idx, seg in enumerate(segments, start=1):
-        # Zaten yüklendiyse geç (Live mode yüklemiştir)
-        if seg.name in uploaded_chunks:
-            continue
-            
-        success = upload_single_segment(seg)
-        if success:
-            sent_count += 1
-        else:
-            skipped_count += 1
+    # 5. Listede olmayan (fallback) segmentleri de havuza ver ve hepsinin bitmesini bekle
+    # (Live mode'un yüklediği / kuyruktaki segmentler enqueue_segment içinde atlanır)
+    for seg in segments:
+        enqueue_segment(seg, delete_after=False)
+
+    wait_for_uploads(FINAL_UPLOAD_TIMEOUT)
+    stop_upload_pool()
+
+    # Hiç yüklenemeyen segmentleri bildir: sunucu transkripti onları beklemeden kesinleştirir
+    with chunks_lock:
+        lost = [(seq, name) for name, seq in upload_seq["by_name"].items() if name not in uploaded_chunks]
+    for seq, name in sorted(lost):
+        logger.info(f"[ORDER] {name} (seq {seq}) yüklenemedi, sunucuya bildiriliyor")
+        report_skipped_segment(seq, "upload-failed")
+
+    with chunks_lock:
+        sent_count = upload_stats["sent"]
+        skipped_count = upload_stats["failed"]
+        silent_count = upload_stats["silent"]
 
     # ÖZET İSTATİSTİK
     logger.info("\n" + "=" * 60)
-    logger.info(f"[FINALIZE] Kalan segmentler tamamlandı. (Toplam gönderilen: {len(uploaded_chunks)})")
+    logger.info(f"[FINALIZE] Kalan segmentler tamamlandı. (Gönderilen: {sent_count}, sessiz/atlanan: {silent_count}, başarısız: {skipped_count})")
     logger.info("=" * 60 + "\n")
 
     # 6. Kalan dosyaları temizle
@@ -632,9 +1260,11 @@ def send_final_webm():
             "backend_success": True,
             "segments_sent": sent_count,
             "segments_skipped": skipped_count,
+            "segments_silent": silent_count,
+            "recorder_metrics": publish_recorder_metrics(final=True),
             "timestamp": time.time()
         }
-        Path("recorder_status.json").write_text(
+        workspace.task_file("recorder_status.json").write_text(
             json.dumps(status_data, ensure_ascii=False, indent=2),
             encoding="utf-8"
         )
@@ -650,22 +1280,34 @@ logger.info("[START] WebM kaydı başlatılıyor...")
 try:
 
 
-    ffmpeg_process = start_ffmpeg_recording()
+    stream_ws = open_audio_stream() if STREAM_AUDIO else None
+    ffmpeg_process = start_ffmpeg_recording(stream=stream_ws is not None)
 
     if ffmpeg_process is None:
         logger.info("[CRITICAL] ffmpeg başlatılamadı!")
         sys.exit(1)
 
+    start_upload_pool()
+    if stream_ws is not None:
+        stream_state["thread"] = threading.Thread(
+            target=audio_stream_sender, args=(ffmpeg_process, stream_ws),
+            name="audio-stream", daemon=True
+        )
+        stream_state["thread"].start()
+    else:
+        threading.Thread(target=segment_list_watcher, name="segment-list", daemon=True).start()
+
     logger.info("[RECORDING] ✓ Zoom sesi kaydediliyor (WebM/Opus, segmentli)...")
     logger.info("[INFO] Ses kaydı devam ediyor")
     logger.info("-" * 60)
 
     last_status_print = time.time()
+    last_metrics_write = 0.0
 
     while recording_active:
         try:
             # STOP SİNYALİ KONTROLÜ (Worker'dan gelen durdur komutu)
-            stop_signal = Path("stop_recording.signal")
+            stop_signal = workspace.task_file("stop_recording.signal")
             if stop_signal.exists():
                 logger.info("\n[SIGNAL] Stop sinyali alındı, kayıt sonlandırılıyor...")
                 try:
@@ -683,8 +1325,13 @@ try:
 
             time.sleep(1)
 
-            # Her 60 saniyede durum raporu
+            # Kayıt sağlığı metrikleri (server /metrics ve /bot-status okur)
             current_time = time.time()
+            if current_time - last_metrics_write >= METRICS_INTERVAL:
+                publish_recorder_metrics()
+                last_metrics_write = current_time
+
+            # Her 60 saniyede durum raporu
             if current_time - last_status_print >= 60:
                 if recording_start_time:
                     duration_min = (current_time - recording_start_time) / 60
@@ -701,14 +1348,12 @@ try:
 
                 if recording_start_time:
                     duration_min = (current_time - recording_start_time) / 60
-                    logger.info(f"[STATUS] Kayıt devam ediyor ({duration_min:.1f} dk)... Live Upload Aktif")
+                    with chunks_lock:
+                        in_flight = len(pending_chunks)
+                    logger.info(f"[STATUS] Kayıt devam ediyor ({duration_min:.1f} dk)... Live Upload Aktif ({in_flight} segment kuyrukta)")
                 
                 last_status_print = current_time
 
-            #  LIVE UPLOAD CHECK (Her 5 saniyede bir)
-            if int(current_time) % 5 == 0:
-                 process_live_queue()
-
         except Exception as loop_error:
             logger.info(f"\n[LOOP ERROR] {type(loop_error).__name__}: {loop_error}")
             time.sleep(1)
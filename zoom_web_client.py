@@ -7,6 +7,7 @@ from playwright.async_api import async_playwright
 
 # Platform abstraction
 from platform_utils import IS_WINDOWS, IS_LINUX, get_chrome_options_for_platform, setup_display
+from meeting_state import meeting
 
 # Linux'ta display ayarla
 setup_display()
@@ -672,11 +673,10 @@ class ZoomWebBot:
                 
                 # 10 DAKIKA BEKLEME DÖNGÜSÜ (Teams/Meet gibi)
                 import time
-                from pathlib import Path
                 
                 wait_start = time.time()
                 wait_timeout = 600  # 10 dakika
-                BOT_COMMAND_FILE = Path("data/bot_command.json")
+                state = meeting()  # Komutlar toplantının durum belgesinde (TASK_ID)
                 
                 while True:
                     elapsed = time.time() - wait_start
@@ -720,15 +720,13 @@ class ZoomWebBot:
                         logger.debug(f"Admission check error: {e}")
                     
                     # STOP komutu kontrolü
-                    if BOT_COMMAND_FILE.exists():
-                        try:
-                            import json
-                            cmd = json.loads(BOT_COMMAND_FILE.read_text("utf-8"))
-                            if cmd.get("command") == "stop":
-                                logger.info("⛔ STOP komutu alındı (Waiting room)")
-                                return False
-                        except:
-                            pass
+                    try:
+                        cmd = state.get("command") or {}
+                        if cmd.get("command") == "stop":
+                            logger.info("⛔ STOP komutu alındı (Waiting room)")
+                            return False
+                    except:
+                        pass
                     
                     # Her 30 saniyede log
                     if int(elapsed) % 30 == 0 and int(elapsed) > 0:
@@ -4,6 +4,8 @@ import asyncio
 import subprocess
 import traceback
 from pathlib import Path
+from workspace import recorder_command, task_file, meeting_file
+from meeting_state import meeting
 from zoom_web_client import ZoomWebBot
 import logging
 
@@ -56,9 +58,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger("ZoomWebWorker")
 
-BOT_TASK_FILE = Path("data/bot_task.json")
-WORKER_STATUS_FILE = Path("data/worker_status.json")
-
 RECORDER_SCRIPT = "zoom_bot_recorder.py"
 
 
@@ -292,7 +291,7 @@ def bring_chromium_to_front():
     logger.warning("[FOCUS] ❌ Tüm denemeler başarısız")
 
 def update_status(**kwargs):
-    """worker_status.json dosyasını güncelle."""
+    """Toplantının worker durumunu güncelle (meeting_state "status"; TASK_ID yoksa data/worker_status.json)."""
     status = {
         "running": False,
         "recording": False,
@@ -302,12 +301,8 @@ def update_status(**kwargs):
         "timestamp": time.time(),
     }
 
-    if WORKER_STATUS_FILE.exists():
-        try:
-            old = json.loads(WORKER_STATUS_FILE.read_text(encoding="utf-8"))
-            status.update(old)
-        except Exception:
-            pass
+    state = meeting()
+    status.update(state.get("status") or {})
 
     status.update(kwargs)
     
@@ -316,10 +311,7 @@ def update_status(**kwargs):
     #      status["running"] = kwargs["zoom_running"]
 
     try:
-        WORKER_STATUS_FILE.write_text(
-            json.dumps(status, ensure_ascii=False, indent=2),
-            encoding="utf-8"
-        )
+        state.set("status", status)
     except Exception as e:
         logger.error(f"Status update error: {e}")
 
@@ -330,21 +322,20 @@ async def run_zoom_web_task(meeting_url, bot_name="Sesly Bot", password=None):
 
     try:
         # Cleanup
-        BOT_COMMAND_FILE = Path("data/bot_command.json")
-        STOP_SIGNAL_FILE = Path("stop_recording.signal")
+        state = meeting()
+        STOP_SIGNAL_FILE = task_file("stop_recording.signal")
         
-        if BOT_COMMAND_FILE.exists():
-            try: BOT_COMMAND_FILE.unlink()
-            except: pass
+        try: state.delete("command")
+        except: pass
 
         if STOP_SIGNAL_FILE.exists():
             try: STOP_SIGNAL_FILE.unlink()
             except: pass
 
         # Veri temizliği
-        files_to_clean = ["latest_transcript.txt", "current_meeting_participants.json", "speaker_timeline.jsonl"]
+        files_to_clean = ["latest_transcript.txt", "transcript_segments.jsonl", "current_meeting_participants.json", "speaker_timeline.jsonl"]
         for fname in files_to_clean:
-            f = Path(fname)
+            f = meeting_file(fname)
             if f.exists():
                 try: f.unlink()
                 except: pass
@@ -434,7 +425,7 @@ async def run_zoom_web_task(meeting_url, bot_name="Sesly Bot", password=None):
         # Katılımcı listesi açıkken başlatıyoruz ki konuşmacı tespiti net olsun
         logger.info("Recorder başlatılıyor...")
         try:
-            recorder_proc = subprocess.Popen(["python", RECORDER_SCRIPT, "--platform", "zoom"])
+            recorder_proc = subprocess.Popen(recorder_command(RECORDER_SCRIPT, "zoom"))
             update_status(recording=True, status_message="🔴 Kayıt Alınıyor")
         except Exception as e:
             logger.error(f"Recorder hatası: {e}")
@@ -451,32 +442,22 @@ async def run_zoom_web_task(meeting_url, bot_name="Sesly Bot", password=None):
             # A. Task İptali Kontrolü - KALDIRILDI!
             # Bu kontrol gereksiz ve sorun yaratıyor:
             # - Worker subprocess olarak çalışıyor, sistem.py tarafından başlatılıyor
-            # - Stop komutu bot_command.json ile geliyor (B bloğu)
-            # - Server bot_task.json'ı worker çalışırken tekrar yaratıyor
-            # - Bu da "active: false" ile yaratılırsa worker hemen çıkıyor (YANLIŞ!)
-            # ÇÖZ ÜM: Bu kontrolü tamamen kaldır, sadece bot_command.json'a bak
-            
-            # if BOT_TASK_FILE.exists():
-            #     try:
-            #         task = json.loads(BOT_TASK_FILE.read_text(encoding="utf-8"))
-            #         if not task.get("active", False):
-            #             logger.info("Görev pasife çekildi (Task file).")
-            #             break
-            #     except: 
-            #         pass
+            # - Stop komutu meeting_state "command" belgesiyle geliyor (B bloğu)
+            # - Server görevi worker çalışırken tekrar yazabiliyor
+            # - Bu da "active: false" ile yazılırsa worker hemen çıkıyor (YANLIŞ!)
+            # ÇÖZ ÜM: Bu kontrolü tamamen kaldır, sadece komuta bak
 
             # B. Komut Kontrolü (Stop)
-            if BOT_COMMAND_FILE.exists():
-                try:
-                    cmd_data = json.loads(BOT_COMMAND_FILE.read_text(encoding="utf-8"))
-                    if not cmd_data.get("processed"):
-                        cmd = cmd_data.get("command")
-                        if cmd == "stop":
-                            logger.info("STOP komutu alındı.")
-                            cmd_data["processed"] = True
-                            BOT_COMMAND_FILE.write_text(json.dumps(cmd_data), encoding="utf-8")
-                            break
-                except: pass
+            try:
+                cmd_data = state.get("command")
+                if cmd_data and not cmd_data.get("processed"):
+                    cmd = cmd_data.get("command")
+                    if cmd == "stop":
+                        logger.info("STOP komutu alındı.")
+                        cmd_data["processed"] = True
+                        state.set("command", cmd_data)
+                        break
+            except: pass
 
             # C. Toplantı Bitti mi? (YENİ)
             if await bot.check_meeting_ended():
@@ -514,7 +495,7 @@ async def run_zoom_web_task(meeting_url, bot_name="Sesly Bot", password=None):
                         "method": "zoom-web-dom"
                     }
                     try:
-                        Path("current_meeting_participants.json").write_text(
+                        meeting_file("current_meeting_participants.json").write_text(
                             json.dumps(data, ensure_ascii=False), encoding="utf-8"
                         )
                     except: pass
@@ -529,7 +510,7 @@ async def run_zoom_web_task(meeting_url, bot_name="Sesly Bot", password=None):
                         }
                     
                         # Append to activity log (legacy JSON)
-                        activity_log = Path("speaker_activity_log.json")
+                        activity_log = meeting_file("speaker_activity_log.json")
                         if activity_log.exists():
                             try:
                                 logs = json.loads(activity_log.read_text(encoding="utf-8"))
@@ -554,7 +535,7 @@ async def run_zoom_web_task(meeting_url, bot_name="Sesly Bot", password=None):
                             "time": datetime.now().strftime("%H:%M:%S"),
                             "speakers": speakers
                         }
-                        timeline_file = Path("speaker_timeline.jsonl")
+                        timeline_file = meeting_file("speaker_timeline.jsonl")
                         with open(timeline_file, "a", encoding="utf-8") as tf:
                             tf.write(json.dumps(timeline_entry, ensure_ascii=False) + "\n")
                     except Exception as e:
@@ -569,7 +550,7 @@ async def run_zoom_web_task(meeting_url, bot_name="Sesly Bot", password=None):
                         "method": "zoom-web-participant-list"
                     }
                     try:
-                        Path("current_meeting_participants.json").write_text(
+                        meeting_file("current_meeting_participants.json").write_text(
                             json.dumps(data, ensure_ascii=False), encoding="utf-8"
                         )
                     except: pass
@@ -594,7 +575,7 @@ async def run_zoom_web_task(meeting_url, bot_name="Sesly Bot", password=None):
         # 1. Kaydı Durdur (Graceful)
         if recorder_proc:
             logger.info("Recorder durduruluyor (Graceful)...")
-            Path("stop_recording.signal").touch()
+            task_file("stop_recording.signal").touch()
             try:
                 recorder_proc.wait(timeout=60) # Upload süresi için 60sn
                 logger.info("Recorder başarıyla kapandı.")
@@ -627,8 +608,8 @@ async def run_zoom_web_task(meeting_url, bot_name="Sesly Bot", password=None):
                 # Temizlik
                 logger.info("Geçici dosyalar temizleniyor...")
                 cleanup_files = [
-                    "current_meeting_participants.json",
-                    "stop_recording.signal"
+                    meeting_file("current_meeting_participants.json"),
+                    task_file("stop_recording.signal")
                 ]
                 for f in cleanup_files:
                      try: Path(f).unlink(); logger.info(f"  ✓ {f} silindi") 
@@ -643,14 +624,12 @@ async def run_zoom_web_task(meeting_url, bot_name="Sesly Bot", password=None):
         logger.info("Görev tamamlandı.")
         
         # Task'i pasife çek (UI güncellemesi için KRITIK)
-        if BOT_TASK_FILE.exists():
-            try:
-                t = json.loads(BOT_TASK_FILE.read_text("utf-8"))
-                t["active"] = False
-                BOT_TASK_FILE.write_text(json.dumps(t, indent=2), "utf-8")
-                logger.info("✓ bot_task.json pasife çekildi")
-            except:
-                pass
+        try:
+            if meeting().get("task") is not None:
+                meeting().update("task", active=False)
+                logger.info("✓ Görev pasife çekildi")
+        except:
+            pass
 
 if __name__ == "__main__":
     import sys